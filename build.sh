@@ -28,41 +28,24 @@ else
     echo "Using existing python enviroment"
 fi
 
-builddir="${tmpdir}/${tarbase}"
-mkdir -p "${builddir}"
-echo "Building CWL in ${builddir} for GATK versions ${VERSIONS[@]}"
-
+version_args=()
 for ver in ${VERSIONS[@]}
 do
-    echo "Generating CWL for GATK version ${ver}"
-    set -x
-    PYTHONPATH=. python -m gatkcwlgenerator -v ${ver} -o "${builddir}/${ver}" "$@"
-    set +x
+    version_args+=( -v "${ver}" )
 done
 
+echo "Generating CWL for GATK versions ${VERSIONS[@]} into ${tarbase}.zip, ${tarbase}.tgz and ${tarbase}.tar.bz2"
+set -x
+PYTHONPATH=. python -m gatkcwlgenerator release "${version_args[@]}" \
+    -a "${tarbase}.zip" -a "${tarbase}.tgz" -a "${tarbase}.tar.bz2" \
+    --archive_root "${tarbase}" "$@"
+set +x
+
 if [ -z "${USE_EXISTING_PYTHON+x}" ]; then
     echo "Deactivating virtualenv"
     deactivate
 fi
 
-echo "Generating zip file"
-set -x
-( cd "${tmpdir}"; zip -r ${tarbase}.zip ${tarbase} )
-set +x
-cp "${tmpdir}/${tarbase}.zip" ./
-
-echo "Generating tgz file"
-set -x
-( cd "${tmpdir}"; tar zcvf ${tarbase}.tgz ${tarbase}/ )
-set +x
-cp "${tmpdir}/${tarbase}.tgz" ./
-
-echo "Generating .tar.bz2 file"
-set -x
-( cd "${tmpdir}"; tar jcvf ${tarbase}.tar.bz2 ${tarbase}/ )
-set +x
-cp "${tmpdir}/${tarbase}.tar.bz2" ./
-
 echo "Removing tmpdir: ${tmpdir}"
 rm -rf "${tmpdir}"
 
@@ -1,6 +1,9 @@
+import json
 from types import SimpleNamespace
 from typing import *
 
+from .common import loads_json
+
 
 __all__ = ["OUTPUT_TYPE_FILE_EXT", "GATKArgument", "GATKTool"]
 
@@ -109,10 +112,46 @@ class GATKArgument:
 
 
 class GATKTool:
-    def __init__(self, original_dict: Dict, additional_arguments: List[Dict]) -> None:
-        self.original_dict = original_dict
+    def __init__(
+            self,
+            original_dict: Optional[Dict],
+            additional_arguments: List[Dict],
+            raw_json: Optional[bytes] = None,
+            url: Optional[str] = None
+        ) -> None:
+        self._original_dict = original_dict
+        self._raw_json = raw_json
+        self.url = url
         self._additional_arguments = additional_arguments
-        self._argument_dict, self._synonym_dict = self._build_argument_dict()
+        self._argument_dicts: Optional[Tuple[Dict, Dict]] = None
+
+    @classmethod
+    def from_raw_json(cls, raw_json: bytes, additional_arguments: List[Dict], url: Optional[str] = None) -> "GATKTool":
+        """
+        Create a GATKTool from the JSON documentation as it was downloaded (from url).
+        The JSON is only decoded when the documentation is first needed.
+        """
+        return cls(None, additional_arguments, raw_json, url)
+
+    @property
+    def original_dict(self) -> Dict:
+        if self._original_dict is None:
+            try:
+                self._original_dict = loads_json(self._raw_json)
+            except ValueError as error:
+                raise Exception("Could not decode JSON retrieved from " + (self.url or "an unknown URL")) from error
+
+        return self._original_dict
+
+    @property
+    def raw_json(self) -> bytes:
+        """
+        The JSON documentation for this tool, byte for byte as it was downloaded if possible.
+        """
+        if self._raw_json is None:
+            return json.dumps(self._original_dict).encode()
+
+        return self._raw_json
 
     def _build_argument_dict(self):
         argument_dict = {}
@@ -124,6 +163,20 @@ class GATKTool:
 
         return argument_dict, synonyms
 
+    @property
+    def _argument_dict(self) -> Dict:
+        if self._argument_dicts is None:
+            self._argument_dicts = self._build_argument_dict()
+
+        return self._argument_dicts[0]
+
+    @property
+    def _synonym_dict(self) -> Dict:
+        if self._argument_dicts is None:
+            self._argument_dicts = self._build_argument_dict()
+
+        return self._argument_dicts[1]
+
     def get_argument(self, name: str) -> GATKArgument:
         try:
             return GATKArgument(**self._argument_dict[name])
@@ -138,6 +191,33 @@ class GATKTool:
     def dict(self):
         return SimpleNamespace(**self.original_dict)
 
+    @property
+    def additional_arguments(self) -> List[Dict]:
+        """
+        The arguments added to this tool, rather than documented for it.
+        """
+        return self._additional_arguments
+
+    @property
+    def own_argument_names(self) -> Set[str]:
+        """
+        The names of the arguments documented for this tool, rather than added to it (e.g. the arguments of read filters).
+        """
+        return {argument["name"] for argument in self.original_dict["arguments"]}
+
+    @property
+    def takes_read_filters(self) -> bool:
+        """
+        Whether the tool processes reads, so can take the arguments of read filters.
+        """
+        if "walkertype" in self.original_dict:
+            # GATK 3: the walkers that only process variants are RodWalkers
+            return self.original_dict["walkertype"] != "RodWalker"
+
+        # GATK 4: every GATK tool has --read-filter, but only the ones that process reads require them as input
+        own_arguments = {argument["name"]: argument for argument in self.original_dict["arguments"]}
+        return "--read-filter" in own_arguments and own_arguments.get("--input", {}).get("required") == "yes"
+
     @property
     def arguments(self) -> Iterable[GATKArgument]:
         for argument_name in self._argument_dict:
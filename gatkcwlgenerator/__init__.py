@@ -3,12 +3,37 @@ import sys
 if sys.version_info[0] < 3:
     raise Exception("Must run in Python 3.")
 
-from .main import *
-import gatkcwlgenerator.web_to_gatk_tool
-import gatkcwlgenerator.gatk_tool_to_cwl
-import gatkcwlgenerator.gatk_argument_to_cwl
-
+import importlib
 import os.path as path
 
+from .main import *
+
 with open(path.join(path.dirname(__file__), "VERSION"), "r") as _version_file:
     __version__ = _version_file.read()
+
+# These pull in requests, bs4 and ruamel.yaml, so they are only imported when they are first used (from Python 3.7),
+# which keeps the start up time of the command line tool down.
+_LAZY_ATTRIBUTES = {
+    "web_to_gatk_tool": ("web_to_gatk_tool", None),
+    "gatk_tool_to_cwl": ("gatk_tool_to_cwl", None),
+    "gatk_argument_to_cwl": ("gatk_argument_to_cwl", None),
+    "get_tool_name": ("web_to_gatk_tool", "get_tool_name"),
+    "get_gatk_links": ("web_to_gatk_tool", "get_gatk_links"),
+    "get_gatk_tool": ("web_to_gatk_tool", "get_gatk_tool"),
+    "get_extra_arguments": ("web_to_gatk_tool", "get_extra_arguments"),
+    "get_read_filter_arguments": ("web_to_gatk_tool", "get_read_filter_arguments")
+}
+
+def __getattr__(name):
+    try:
+        module_name, attribute_name = _LAZY_ATTRIBUTES[name]
+    except KeyError:
+        raise AttributeError(f"module {__name__!r} has no attribute {name!r}") from None
+
+    module = importlib.import_module("." + module_name, __name__)
+    return module if attribute_name is None else getattr(module, attribute_name)
+
+if sys.version_info < (3, 7):
+    # Module __getattr__ (PEP 562) is only used from Python 3.7, so they are imported up front before that
+    for _name in _LAZY_ATTRIBUTES:
+        globals()[_name] = __getattr__(_name)
@@ -0,0 +1,256 @@
+"""
+Streaming writers for release archives (.zip, .tgz and .tar.bz2).
+
+Files are added to every archive as they are generated, so nothing is staged on disk.
+Compression is done in a thread pool (zlib and bz2 release the GIL, so this runs
+on several cores), while the compressed blocks are written out in order.
+"""
+
+import abc
+import bz2
+import collections
+import concurrent.futures
+import functools
+import gzip
+import io
+import os
+import struct
+import tarfile
+import time
+import zlib
+from abc import abstractmethod
+from typing import *
+
+
+__all__ = ["ArchiveWriter", "get_archive_format"]
+
+
+ARCHIVE_FORMATS = {
+    ".zip": "zip",
+    ".tgz": "gz",
+    ".tar.gz": "gz",
+    ".tar.bz2": "bz2",
+    ".tbz2": "bz2"
+}
+
+# Zip files are written without the zip64 extensions, which limits their size
+ZIP_MAX_ENTRIES = 0xFFFF
+ZIP_MAX_SIZE = 0xFFFFFFFF
+
+
+def get_archive_format(archive_path: str) -> str:
+    """
+    Return the archive format ("zip", "gz" or "bz2") of the given path, based on its extension.
+    """
+    for extension, archive_format in ARCHIVE_FORMATS.items():
+        if archive_path.endswith(extension):
+            return archive_format
+
+    raise ValueError(f"Unknown archive format for {archive_path}. Supported extensions are: " + ", ".join(ARCHIVE_FORMATS))
+
+
+def _deflate(data: bytes) -> Tuple[int, bytes]:
+    compressor = zlib.compressobj(6, zlib.DEFLATED, -zlib.MAX_WBITS)
+    return zlib.crc32(data), compressor.compress(data) + compressor.flush()
+
+
+def _dos_date_time(timestamp: float) -> Tuple[int, int]:
+    year, month, day, hour, minute, second = time.localtime(timestamp)[:6]
+    year = max(year, 1980)
+    return (year - 1980) << 9 | month << 5 | day, hour << 11 | minute << 5 | second // 2
+
+
+def _gzip(data: bytes, mtime: int) -> bytes:
+    # gzip.compress only takes an mtime from Python 3.8
+    output = io.BytesIO()
+    with gzip.GzipFile(fileobj=output, mode="wb", compresslevel=6, mtime=mtime) as gzip_file:
+        gzip_file.write(data)
+
+    return output.getvalue()
+
+
+class _ArchiveSink(metaclass=abc.ABCMeta):
+    """
+    Writes blocks that are compressed in the background to a file, in the order they were submitted.
+    """
+    def __init__(self, archive_path: str, executor: concurrent.futures.Executor, max_pending: int) -> None:
+        self._file = open(archive_path, "wb")
+        self._executor = executor
+        self._max_pending = max_pending
+        self._pending: Deque[Tuple[Any, concurrent.futures.Future]] = collections.deque()
+
+    def _submit(self, context: Any, function: Callable, data: bytes) -> None:
+        self._pending.append((context, self._executor.submit(function, data)))
+        self._drain()
+
+    def _drain(self, wait: bool = False) -> None:
+        while self._pending and (wait or len(self._pending) > self._max_pending or self._pending[0][1].done()):
+            context, future = self._pending.popleft()
+            self._write_block(context, future.result())
+
+    @abstractmethod
+    def _write_block(self, context: Any, result: Any) -> None:
+        pass
+
+    @abstractmethod
+    def add(self, name: str, data: bytes) -> None:
+        pass
+
+    def close(self) -> None:
+        self._drain(wait=True)
+        self._file.close()
+
+
+class _TarSink(_ArchiveSink):
+    """
+    Writes a compressed tar file as a series of independently compressed chunks.
+    Both gzip and bzip2 allow concatenating compressed streams, so the result is a normal .tgz or .tar.bz2.
+    """
+    CHUNK_SIZE = 1 << 20
+
+    def __init__(self, archive_path: str, executor: concurrent.futures.Executor, max_pending: int,
+                 compress: Callable[[bytes], bytes], mtime: float) -> None:
+        super(_TarSink, self).__init__(archive_path, executor, max_pending)
+        self._compress = compress
+        self._mtime = mtime
+        self._buffer = bytearray()
+        self._size = 0
+
+    def add(self, name: str, data: bytes) -> None:
+        tar_info = tarfile.TarInfo(name)
+        tar_info.size = len(data)
+        tar_info.mtime = int(self._mtime)
+        tar_info.mode = 0o644
+
+        self._append(tar_info.tobuf(format=tarfile.GNU_FORMAT))
+        self._append(data)
+
+        remainder = len(data) % tarfile.BLOCKSIZE
+        if remainder:
+            self._append(tarfile.NUL * (tarfile.BLOCKSIZE - remainder))
+
+        if len(self._buffer) >= self.CHUNK_SIZE:
+            self._flush_buffer()
+
+    def _append(self, data: bytes) -> None:
+        self._buffer += data
+        self._size += len(data)
+
+    def _flush_buffer(self) -> None:
+        if self._buffer:
+            self._submit(None, self._compress, bytes(self._buffer))
+            self._buffer.clear()
+
+    def _write_block(self, context: Any, result: bytes) -> None:
+        self._file.write(result)
+
+    def close(self) -> None:
+        # The end of the archive is marked by two empty blocks, and tar files are padded to a whole record
+        self._append(tarfile.NUL * tarfile.BLOCKSIZE * 2)
+        remainder = self._size % tarfile.RECORDSIZE
+        if remainder:
+            self._append(tarfile.NUL * (tarfile.RECORDSIZE - remainder))
+
+        self._flush_buffer()
+        super(_TarSink, self).close()
+
+
+class _ZipSink(_ArchiveSink):
+    """
+    Writes a zip file, deflating each entry in the background.
+    """
+    def __init__(self, archive_path: str, executor: concurrent.futures.Executor, max_pending: int, mtime: float) -> None:
+        super(_ZipSink, self).__init__(archive_path, executor, max_pending)
+        self._date, self._time = _dos_date_time(mtime)
+        self._central_directory: List[bytes] = []
+        self._offset = 0
+
+    def add(self, name: str, data: bytes) -> None:
+        if len(data) > ZIP_MAX_SIZE or len(self._central_directory) + len(self._pending) >= ZIP_MAX_ENTRIES:
+            raise Exception(f"Cannot add {name} to a zip file without the zip64 extensions")
+
+        self._submit((name.encode("utf-8"), len(data)), _deflate, data)
+
+    def _write_block(self, context: Tuple[bytes, int], result: Tuple[int, bytes]) -> None:
+        encoded_name, uncompressed_size = context
+        crc, compressed_data = result
+
+        # Version 2.0 of the format, the file name is UTF-8 (bit 11) and the data is deflated (method 8)
+        fields = (20, 0x800, 8, self._time, self._date, crc, len(compressed_data), uncompressed_size, len(encoded_name))
+
+        local_header = struct.pack("<IHHHHHIIIHH", 0x04034b50, *fields, 0)
+        self._central_directory.append(
+            struct.pack("<IH", 0x02014b50, 3 << 8 | 20)  # Made by unix, version 2.0
+            + struct.pack("<HHHHHIIIH", *fields)
+            + struct.pack("<HHHHII", 0, 0, 0, 0, 0o100644 << 16, self._offset)
+            + encoded_name
+        )
+
+        self._file.write(local_header)
+        self._file.write(encoded_name)
+        self._file.write(compressed_data)
+        self._offset += len(local_header) + len(encoded_name) + len(compressed_data)
+
+        if self._offset > ZIP_MAX_SIZE:
+            raise Exception("Zip file is too large to be written without the zip64 extensions")
+
+    def close(self) -> None:
+        self._drain(wait=True)
+
+        central_directory = b"".join(self._central_directory)
+        self._file.write(central_directory)
+        self._file.write(struct.pack(
+            "<IHHHHIIH",
+            0x06054b50, 0, 0,
+            len(self._central_directory), len(self._central_directory),
+            len(central_directory), self._offset,
+            0
+        ))
+
+        super(_ZipSink, self).close()
+
+
+class ArchiveWriter:
+    """
+    Streams files into one or more archives at once, compressing them in parallel.
+    The archive formats are inferred from the file extensions (see ARCHIVE_FORMATS).
+    """
+    def __init__(self, archive_paths: Iterable[str], jobs: Optional[int] = None) -> None:
+        if jobs is None:
+            jobs = os.cpu_count() or 1
+
+        self._executor = concurrent.futures.ThreadPoolExecutor(max_workers=jobs)
+        mtime = time.time()
+
+        self._sinks: List[_ArchiveSink] = []
+        for archive_path in archive_paths:
+            archive_format = get_archive_format(archive_path)
+
+            if archive_format == "zip":
+                sink: _ArchiveSink = _ZipSink(archive_path, self._executor, jobs * 2, mtime)
+            elif archive_format == "gz":
+                sink = _TarSink(archive_path, self._executor, jobs * 2, functools.partial(_gzip, mtime=int(mtime)), mtime)
+            else:
+                sink = _TarSink(archive_path, self._executor, jobs * 2, bz2.compress, mtime)
+
+            self._sinks.append(sink)
+
+    def add_file(self, name: str, data: bytes) -> None:
+        """
+        Add a file to every archive. name is the path of the file inside the archive.
+        """
+        for sink in self._sinks:
+            sink.add(name, data)
+
+    def close(self) -> None:
+        try:
+            for sink in self._sinks:
+                sink.close()
+        finally:
+            self._executor.shutdown()
+
+    def __enter__(self) -> "ArchiveWriter":
+        return self
+
+    def __exit__(self, *exc_info) -> None:
+        self.close()
@@ -0,0 +1,292 @@
+"""
+A persistent store of the tools and arguments of every GATK version the generator has processed.
+
+With --argument_store, the generator records each argument of each tool it converts, with its
+GATK type, the CWL type of its input, its default and its synonym, in an SQLite database. The
+query command then answers questions such as which tools take an argument in a version, or in
+which versions an argument changed, from the indexes of the database rather than by
+regenerating the files.
+"""
+
+import argparse
+import json
+import sqlite3
+from collections import namedtuple
+from typing import *
+
+from .common import GATKVersion
+from .GATK_classes import *
+
+# An argument of a tool in a GATK version. The names are without the leading dashes,
+# and cwl_type is the type of the argument's input (as JSON if it isn't a string), or None if it has none.
+ArgumentRecord = namedtuple("ArgumentRecord", [
+    "version", "tool", "name", "synonym", "gatk_type", "cwl_type", "default_value", "required", "kind", "summary"
+])
+
+# An argument that was added (old is None), removed (new is None) or changed in a version
+ArgumentChange = namedtuple("ArgumentChange", ["version", "old", "new"])
+
+# The fields of ArgumentRecord that are compared to find the changes of an argument
+CHANGE_FIELDS = ["synonym", "gatk_type", "cwl_type", "default_value", "required", "kind"]
+
+
+def get_cwl_types(tool_cwl: Dict) -> Dict[str, str]:
+    """
+    Return the CWL types of the inputs of a tool, by id, including the fields of the engine_arguments input.
+    """
+    cwl_types = {}
+
+    for cwl_input in tool_cwl["inputs"]:
+        if cwl_input["id"] == "engine_arguments":
+            fields = next(item for item in cwl_input["type"] if isinstance(item, dict))["fields"]
+            cwl_types.update((field["name"], _format_cwl_type(field["type"])) for field in fields)
+        else:
+            cwl_types[cwl_input["id"]] = _format_cwl_type(cwl_input["type"])
+
+    return cwl_types
+
+def _without_input_bindings(cwl_type: Any) -> Any:
+    if isinstance(cwl_type, list):
+        return [_without_input_bindings(item) for item in cwl_type]
+    elif isinstance(cwl_type, dict):
+        return {key: _without_input_bindings(value) for key, value in cwl_type.items() if key != "inputBinding"}
+
+    return cwl_type
+
+def _format_cwl_type(cwl_type: Any) -> str:
+    # The inputBindings of array types are how the argument is given, rather than its type
+    if isinstance(cwl_type, str):
+        return cwl_type
+
+    return json.dumps(_without_input_bindings(cwl_type), sort_keys=True, separators=(",", ":"))
+
+def get_argument_records(gatk_tool: GATKTool, tool_cwl: Dict, version: str) -> List[ArgumentRecord]:
+    from .gatk_argument_to_cwl import get_input_argument_name
+
+    gatk_version = GATKVersion(version)
+    cwl_types = get_cwl_types(tool_cwl)
+
+    return [
+        ArgumentRecord(
+            version=version,
+            tool=gatk_tool.name,
+            name=argument.name,
+            synonym=argument.synonym.lstrip("-") if argument.synonym is not None else None,
+            gatk_type=argument.type,
+            cwl_type=cwl_types.get(get_input_argument_name(argument, gatk_version)),
+            default_value=argument.dict.defaultValue if argument.has_default() else None,
+            required=argument.is_required(),
+            kind=getattr(argument.dict, "kind", None),
+            summary=argument.summary
+        )
+        for argument in gatk_tool.arguments
+    ]
+
+
+class ArgumentStore:
+    """
+    The store, in an SQLite database. Several generators can record tools in it at the same time,
+    if the database is on a local filesystem, or one with working locks.
+    """
+    def __init__(self, database_path: str) -> None:
+        # Transactions are started explicitly, so that a tool is replaced in one transaction
+        self._connection = sqlite3.connect(database_path, timeout=60, isolation_level=None)
+        self._connection.executescript("""
+            CREATE TABLE IF NOT EXISTS tools (
+                tool TEXT NOT NULL,
+                version TEXT NOT NULL,
+                PRIMARY KEY (tool, version)
+            ) WITHOUT ROWID;
+            CREATE TABLE IF NOT EXISTS arguments (
+                version TEXT NOT NULL,
+                tool TEXT NOT NULL,
+                name TEXT NOT NULL,
+                synonym TEXT,
+                gatk_type TEXT,
+                cwl_type TEXT,
+                default_value TEXT,
+                required INTEGER NOT NULL,
+                kind TEXT,
+                summary TEXT,
+                PRIMARY KEY (version, tool, name)
+            ) WITHOUT ROWID;
+            CREATE INDEX IF NOT EXISTS arguments_by_name ON arguments (name, version);
+            CREATE INDEX IF NOT EXISTS arguments_by_tool ON arguments (tool, name);
+            CREATE TABLE IF NOT EXISTS synonyms (
+                synonym TEXT NOT NULL,
+                name TEXT NOT NULL,
+                PRIMARY KEY (synonym, name)
+            ) WITHOUT ROWID;
+        """)
+
+    def __enter__(self) -> "ArgumentStore":
+        return self
+
+    def __exit__(self, *exc_info) -> None:
+        self.close()
+
+    def close(self) -> None:
+        self._connection.close()
+
+    def record_tool(self, gatk_tool: GATKTool, tool_cwl: Dict, version: str) -> None:
+        """
+        Record the arguments of a tool (generated as tool_cwl) in a version, replacing any recorded before.
+        """
+        records = get_argument_records(gatk_tool, tool_cwl, version)
+
+        self._connection.execute("BEGIN IMMEDIATE")
+        try:
+            self._connection.execute("INSERT OR IGNORE INTO tools VALUES (?, ?)", (gatk_tool.name, version))
+            self._connection.execute("DELETE FROM arguments WHERE version = ? AND tool = ?", (version, gatk_tool.name))
+            self._connection.executemany(
+                f"INSERT OR REPLACE INTO arguments VALUES ({', '.join('?' * len(ArgumentRecord._fields))})",
+                records
+            )
+            self._connection.executemany(
+                "INSERT OR IGNORE INTO synonyms VALUES (?, ?)",
+                [(record.synonym, record.name) for record in records if record.synonym is not None]
+            )
+            self._connection.execute("COMMIT")
+        except BaseException:
+            self._connection.execute("ROLLBACK")
+            raise
+
+    def get_versions(self) -> List[str]:
+        rows = self._connection.execute("SELECT DISTINCT version FROM tools").fetchall()
+
+        return sorted((row[0] for row in rows), key=GATKVersion)
+
+    def find(self, tool: str = None, argument: str = None, versions: List[str] = None) -> List[ArgumentRecord]:
+        """
+        Return the arguments of the given tool, with the given name or synonym (with or without the dashes),
+        in the given versions, sorted by version, tool and name. Each filter is optional.
+        """
+        conditions = []
+        parameters: List[str] = []
+
+        if tool is not None:
+            conditions.append("tool = ?")
+            parameters.append(tool)
+
+        if versions:
+            conditions.append(f"version IN ({', '.join('?' * len(versions))})")
+            parameters.extend(versions)
+
+        if argument is None:
+            rows = self._connection.execute(
+                "SELECT * FROM arguments" + (" WHERE " + " AND ".join(conditions) if conditions else ""),
+                parameters
+            ).fetchall()
+        else:
+            argument = argument.lstrip("-")
+            names = [argument] + [
+                row[0] for row in self._connection.execute("SELECT name FROM synonyms WHERE synonym = ?", (argument,))
+            ]
+
+            # The arguments are found by name, with the index for a tool if there is one. Without statistics,
+            # SQLite would rather use the index of the versions, which is much slower.
+            rows = self._connection.execute(
+                f"SELECT * FROM arguments INDEXED BY {'arguments_by_tool' if tool is not None else 'arguments_by_name'} " +
+                f"WHERE name IN ({', '.join('?' * len(names))}) AND (name = ? OR synonym = ?)" +
+                "".join(" AND " + condition for condition in conditions),
+                names + [argument, argument] + parameters
+            ).fetchall()
+
+        records = [ArgumentRecord(*row[:7], bool(row[7]), *row[8:]) for row in rows]
+        version_keys = {record.version: GATKVersion(record.version) for record in records}
+
+        return sorted(records, key=lambda record: (version_keys[record.version], record.tool, record.name))
+
+    def get_changes(self, tool: str, argument: str) -> List[ArgumentChange]:
+        """
+        Return the versions in which an argument of a tool was added, removed or changed, in order.
+        """
+        tool_versions = sorted(
+            (row[0] for row in self._connection.execute("SELECT version FROM tools WHERE tool = ?", (tool,))),
+            key=GATKVersion
+        )
+        records = {record.version: record for record in self.find(tool, argument)}
+
+        changes = []
+        previous_record = None
+
+        for version in tool_versions:
+            record = records.get(version)
+
+            if record is None and previous_record is None:
+                continue
+
+            if record is None or previous_record is None or any(
+                getattr(record, field) != getattr(previous_record, field) for field in CHANGE_FIELDS
+            ):
+                changes.append(ArgumentChange(version, previous_record, record))
+
+            previous_record = record
+
+        return changes
+
+
+def format_record(record: ArgumentRecord) -> str:
+    return "\t".join([
+        record.version,
+        record.tool,
+        "--" + record.name,
+        record.gatk_type or "",
+        record.cwl_type or "-",
+        record.default_value or "-"
+    ])
+
+def format_change(change: ArgumentChange) -> str:
+    if change.old is None:
+        return f"{change.version}: added (" + ", ".join(
+            f"{field} {getattr(change.new, field)}"
+            for field in CHANGE_FIELDS
+            if getattr(change.new, field) is not None
+        ) + ")"
+    if change.new is None:
+        return f"{change.version}: removed"
+
+    return f"{change.version}: " + ", ".join(
+        f"{field} {getattr(change.old, field)} -> {getattr(change.new, field)}"
+        for field in CHANGE_FIELDS
+        if getattr(change.old, field) != getattr(change.new, field)
+    )
+
+
+def query_main(args: List[str]) -> None:
+    """
+    Search the tools and arguments recorded with --argument_store.
+    """
+    parser = argparse.ArgumentParser(prog="gatk_cwl_generator query",
+        description="Searches the tools and arguments recorded with --argument_store. Without --tool or --argument, " +
+        "lists the recorded versions.")
+    parser.add_argument("--store", "-s", dest="store", required=True,
+        help="The SQLite database the arguments were recorded in with --argument_store")
+    parser.add_argument("--tool", "-t", dest="tool",
+        help="Only show the arguments of this tool")
+    parser.add_argument("--argument", "-a", dest="argument",
+        help="Only show the arguments with this name or synonym, e.g. --intervals or L")
+    parser.add_argument("--version", "-v", dest="versions", action="append", default=[],
+        help="Only show the arguments in this version of GATK. Can be given multiple times.")
+    parser.add_argument("--changes", dest="changes", action="store_true",
+        help="Show the versions in which the argument of the tool was added, removed or changed " +
+        "(its type, default, synonym, ...), rather than the argument in each version. Needs --tool and --argument.")
+    parser.add_argument("--json", dest="json", action="store_true",
+        help="Print the arguments as JSON, one per line. Default is a tab separated version, tool, argument, " +
+        "GATK type, CWL type and default.")
+    query_options = parser.parse_args(args)
+
+    if query_options.changes and (query_options.tool is None or query_options.argument is None):
+        parser.error("--changes needs --tool and --argument")
+
+    with ArgumentStore(query_options.store) as argument_store:
+        if query_options.changes:
+            for change in argument_store.get_changes(query_options.tool, query_options.argument):
+                print(format_change(change))
+        elif query_options.tool is None and query_options.argument is None:
+            for version in argument_store.get_versions():
+                records = argument_store.find(versions=[version])
+                print(f"{version}: {len({record.tool for record in records})} tools, {len(records)} arguments")
+        else:
+            for record in argument_store.find(query_options.tool, query_options.argument, query_options.versions):
+                print(json.dumps(record._asdict()) if query_options.json else format_record(record))
@@ -0,0 +1,301 @@
+"""
+Benchmarking how heavy the generated CWL files are for the CWL runners that load them.
+
+For each tool, this measures the size of the file, its number of inputs, and how long cwltool
+takes to parse it and to resolve and validate it, in process. The results can be saved as a
+baseline, and later results compared against it, so that changes to the generated files that
+make the tools measurably heavier are caught.
+"""
+
+import argparse
+import gc
+import json
+import logging
+import os
+import sys
+import time
+from collections import OrderedDict, namedtuple
+from typing import *
+
+from .validate import get_cwl_paths, init_cwltool
+
+_logger: logging.Logger = logging.getLogger("gatkcwlgenerator")
+
+# The sizes and times of a tool. The times are CPU times, and the minimum over the repeats, which is the least noisy.
+ToolBenchmark = namedtuple("ToolBenchmark", ["name", "size", "inputs", "parse_seconds", "validate_seconds"])
+
+# A tool that couldn't be benchmarked, as cwltool couldn't load it
+LoadFailure = namedtuple("LoadFailure", ["name", "error"])
+
+# The fields of ToolBenchmark that are compared against the baseline
+SIZE_FIELDS = ["size", "inputs"]
+TIME_FIELDS = ["parse_seconds", "validate_seconds"]
+
+DEFAULT_REPEATS = 5
+
+
+def get_benchmark_name(cwl_path: str) -> str:
+    """
+    Return the name of a CWL file in the results, <VERSION>/<TOOL>, e.g. 4.0.6.0/HaplotypeCaller
+    for gatk_cmdline_tools/4.0.6.0/cwl/HaplotypeCaller.cwl.
+    """
+    directory, file_name = os.path.split(os.path.abspath(cwl_path))
+    if os.path.basename(directory) == "cwl":
+        directory = os.path.dirname(directory)
+
+    return os.path.basename(directory) + "/" + os.path.splitext(file_name)[0]
+
+def load_cwl_file(cwl_path: str) -> Tuple[float, float, int]:
+    """
+    Load a CWL file with cwltool, and return the time taken to parse it, the time taken to
+    resolve and validate it, and its number of inputs.
+    """
+    from cwltool.context import LoadingContext
+    from cwltool.load_tool import fetch_document, make_tool, resolve_and_validate_document
+    from cwltool.workflow import default_make_tool
+
+    # A new loading context each time, so that nothing is cached between the repeats
+    loading_context = LoadingContext({
+        "construct_tool_object": default_make_tool,
+        "disable_js_validation": True
+    })
+
+    # As timeit does, the garbage collector is disabled while timing, so that it doesn't add noise
+    gc.collect()
+    gc.disable()
+    try:
+        start = time.process_time()
+        loading_context, cwl_document, uri = fetch_document(cwl_path, loading_context)
+        parsed = time.process_time()
+        loading_context, uri = resolve_and_validate_document(loading_context, cwl_document, uri)
+        make_tool(uri, loading_context)
+        validated = time.process_time()
+    finally:
+        gc.enable()
+
+    return parsed - start, validated - parsed, len(cwl_document.get("inputs", []))
+
+def benchmark_cwl_file(cwl_path: str, repeats: int = DEFAULT_REPEATS) -> ToolBenchmark:
+    parse_times = []
+    validate_times = []
+
+    for _ in range(repeats):
+        parse_seconds, validate_seconds, inputs = load_cwl_file(cwl_path)
+        parse_times.append(parse_seconds)
+        validate_times.append(validate_seconds)
+
+    return ToolBenchmark(
+        get_benchmark_name(cwl_path),
+        os.path.getsize(cwl_path),
+        inputs,
+        min(parse_times),
+        min(validate_times)
+    )
+
+def benchmark_cwl_files(
+        cwl_paths: List[str],
+        repeats: int = DEFAULT_REPEATS,
+        verbose: bool = False
+    ) -> Iterator[Union[ToolBenchmark, LoadFailure]]:
+    """
+    Benchmark CWL files, one after the other, so that they don't compete for the CPU.
+    The files that cwltool finds invalid are LoadFailures.
+    """
+    # This loads the CWL schema, so that it isn't counted in the time of the first file
+    init_cwltool(verbose)
+
+    from cwltool.errors import WorkflowException
+    from schema_salad.exceptions import ValidationException
+
+    for cwl_path in cwl_paths:
+        try:
+            yield benchmark_cwl_file(cwl_path, repeats)
+        except (ValidationException, WorkflowException) as error:
+            error_lines = str(error).strip().splitlines()
+            yield LoadFailure(get_benchmark_name(cwl_path), error_lines[-1].strip() if error_lines else type(error).__name__)
+
+def load_baseline(baseline_path: str) -> Dict[str, ToolBenchmark]:
+    with open(baseline_path) as baseline_file:
+        baseline = json.load(baseline_file)
+
+    return {
+        name: ToolBenchmark(name=name, **fields)
+        for name, fields in baseline.items()
+    }
+
+def save_baseline(tool_benchmarks: List[ToolBenchmark], baseline_path: str) -> None:
+    baseline = OrderedDict(
+        (tool_benchmark.name, OrderedDict(
+            (field, getattr(tool_benchmark, field)) for field in SIZE_FIELDS + TIME_FIELDS
+        ))
+        for tool_benchmark in tool_benchmarks
+    )
+
+    with open(baseline_path, "w") as baseline_file:
+        json.dump(baseline, baseline_file, indent=4)
+        baseline_file.write("\n")
+
+def get_regressions(
+        tool_benchmark: ToolBenchmark,
+        baseline_benchmark: ToolBenchmark,
+        fields: List[str],
+        tolerance: float
+    ) -> List[str]:
+    """
+    Return a message for each of the fields of a benchmark that is larger than in the baseline, by more
+    than the tolerance (a fraction of the baseline value).
+    """
+    regressions = []
+
+    for field in fields:
+        value = getattr(tool_benchmark, field)
+        baseline_value = getattr(baseline_benchmark, field)
+
+        if value > baseline_value * (1 + tolerance):
+            increase = f"+{(value / baseline_value - 1) * 100:.0f}%" if baseline_value else "new"
+            regressions.append(f"{field} {increase} ({_format_value(field, baseline_value)} -> {_format_value(field, value)})")
+
+    return regressions
+
+def get_missing_names(baseline: Dict[str, ToolBenchmark], names: List[str], benchmarked_names: List[str]) -> List[str]:
+    """
+    Return the names of the tools in the baseline that weren't benchmarked (that are missing, or couldn't be
+    loaded), for the versions that were benchmarked (the <VERSION> of the names, <VERSION>/<TOOL>).
+    """
+    versions = {name.split("/")[0] for name in names}
+    benchmarked_names = set(benchmarked_names)
+
+    return [
+        name for name in baseline
+        if name.split("/")[0] in versions and name not in benchmarked_names
+    ]
+
+def get_total(name: str, tool_benchmarks: Iterable[ToolBenchmark]) -> ToolBenchmark:
+    tool_benchmarks = list(tool_benchmarks)
+
+    return ToolBenchmark(name, *(
+        sum(getattr(tool_benchmark, field) for tool_benchmark in tool_benchmarks)
+        for field in SIZE_FIELDS + TIME_FIELDS
+    ))
+
+def _format_value(field: str, value: Union[int, float]) -> str:
+    if field in TIME_FIELDS:
+        return f"{value * 1000:.1f} ms"
+    if field == "size":
+        return f"{value} bytes"
+
+    return str(value)
+
+def format_tool_benchmark(tool_benchmark: ToolBenchmark) -> str:
+    return (
+        f"{tool_benchmark.name}: {tool_benchmark.size} bytes, {tool_benchmark.inputs} inputs, "
+        f"parse {tool_benchmark.parse_seconds * 1000:.1f} ms, validate {tool_benchmark.validate_seconds * 1000:.1f} ms"
+    )
+
+
+def benchmark_main(args: List[str]) -> None:
+    """
+    Benchmark the CWL files generated for some versions of GATK, and compare them against a baseline.
+    """
+    parser = argparse.ArgumentParser(prog="gatk_cwl_generator benchmark",
+        description="Measures how long generated CWL files take to load, their sizes and their numbers of inputs, " +
+        "and compares them against a baseline")
+    parser.add_argument("paths", nargs="*", metavar="PATH",
+        help="A CWL file or a directory of CWL files to benchmark")
+    parser.add_argument("--version", "-v", dest="versions", action="append", default=[],
+        help="Benchmark the CWL files generated for this version of GATK, in <CWL_ROOT>/<VERSION>/cwl/. " +
+        "Can be given multiple times.")
+    parser.add_argument("--cwl_root", dest="cwl_root", default=os.path.join(os.getcwd(), "gatk_cmdline_tools"),
+        help="The directory containing the files generated for each version. Default is ./gatk_cmdline_tools/")
+    parser.add_argument("--repeats", "-r", dest="repeats", type=int, default=DEFAULT_REPEATS,
+        help=f"The number of times each file is loaded. The fastest time is kept. Default is {DEFAULT_REPEATS}.")
+    parser.add_argument("--baseline", dest="baseline",
+        help="A JSON file of results saved with --save_baseline to compare against. The benchmark fails " +
+        "(with exit status 1) if a tool is heavier than in the baseline, or a tool of the benchmarked versions " +
+        "in the baseline is missing. Default is to not compare.")
+    parser.add_argument("--save_baseline", dest="save_baseline",
+        help="Save the results to this JSON file, to be used with --baseline later.")
+    parser.add_argument("--size_tolerance", dest="size_tolerance", type=float, default=0.0,
+        help="How much larger than in the baseline (as a fraction) the size and number of inputs of a tool " +
+        "can be. Default is 0.0.")
+    parser.add_argument("--time_tolerance", dest="time_tolerance", type=float, default=0.25,
+        help="How much slower than in the baseline (as a fraction) parsing and validating all the tools can be. " +
+        "The baseline should be saved on the same machine. Default is 0.25.")
+    parser.add_argument("--verbose", dest="verbose", action="store_true",
+        help="Set the logging to be verbose. Default is False.")
+    benchmark_options = parser.parse_args(args)
+
+    import coloredlogs
+    coloredlogs.install(level="DEBUG" if benchmark_options.verbose else "WARNING", logger=_logger,
+        fmt="%(asctime)s %(name)s[%(process)d] %(levelname)s %(message)s")
+
+    paths = benchmark_options.paths + [
+        os.path.join(benchmark_options.cwl_root, version, "cwl")
+        for version in benchmark_options.versions
+    ]
+    if not paths:
+        parser.error("no CWL files given; use PATH or --version")
+
+    baseline = load_baseline(benchmark_options.baseline) if benchmark_options.baseline is not None else {}
+    cwl_paths = get_cwl_paths(paths)
+
+    tool_benchmarks = []
+    load_failures = []
+    heavier_tools = 0
+
+    # The sizes are compared for each tool, as they don't vary between runs. The times of one tool are
+    # too noisy to compare, so the total times of the tools that are in the baseline are compared.
+    for tool_benchmark in benchmark_cwl_files(cwl_paths, benchmark_options.repeats, benchmark_options.verbose):
+        if isinstance(tool_benchmark, LoadFailure):
+            load_failures.append(tool_benchmark)
+            print(f"{tool_benchmark.name}: couldn't be loaded: {tool_benchmark.error}")
+            continue
+
+        tool_benchmarks.append(tool_benchmark)
+        print(format_tool_benchmark(tool_benchmark))
+
+        if tool_benchmark.name in baseline:
+            regressions = get_regressions(tool_benchmark, baseline[tool_benchmark.name], SIZE_FIELDS,
+                benchmark_options.size_tolerance)
+            for regression in regressions:
+                print("  " + regression)
+            if regressions:
+                heavier_tools += 1
+        elif benchmark_options.baseline is not None:
+            print("  not in the baseline")
+
+    total = get_total("total", tool_benchmarks)
+    print(
+        f"Benchmarked {len(tool_benchmarks)} tools: {total.size} bytes, {total.inputs} inputs, "
+        f"parse {total.parse_seconds:.2f} s, validate {total.validate_seconds:.2f} s"
+    )
+
+    if load_failures:
+        print(f"{len(load_failures)} tools couldn't be loaded (see gatk_cwl_generator validate)")
+
+    if benchmark_options.save_baseline is not None:
+        save_baseline(tool_benchmarks, benchmark_options.save_baseline)
+
+    if benchmark_options.baseline is not None:
+        missing_names = get_missing_names(baseline, [get_benchmark_name(cwl_path) for cwl_path in cwl_paths],
+            [tool_benchmark.name for tool_benchmark in tool_benchmarks])
+        for name in missing_names:
+            print(f"{name} is in the baseline, but wasn't benchmarked")
+
+        compared_names = [tool_benchmark.name for tool_benchmark in tool_benchmarks if tool_benchmark.name in baseline]
+        slower = get_regressions(
+            get_total("total", (tool_benchmark for tool_benchmark in tool_benchmarks if tool_benchmark.name in baseline)),
+            get_total("total", (baseline[name] for name in compared_names)),
+            TIME_FIELDS,
+            benchmark_options.time_tolerance
+        )
+
+        print(f"{heavier_tools} tools are larger than in the baseline, {len(missing_names)} are missing")
+        for regression in slower:
+            print(f"The tools are slower to load than in the baseline: {regression}")
+
+        if heavier_tools or missing_names or slower:
+            sys.exit(1)
+
+    if load_failures:
+        sys.exit(1)
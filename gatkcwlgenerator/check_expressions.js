@@ -0,0 +1,83 @@
+/**
+ * Checks the JavaScript expressions of CWL files, for gatkcwlgenerator.validate.
+ *
+ * Reads one request per line from stdin, of the form
+ *     {"library": "<expressionLib>", "expressions": ["<javascript>", ...]}
+ * and writes one response per line to stdout, of the form
+ *     {"library_error": "<error>" or null, "errors": [[<index of expression>, "<error>"], ...]}
+ *
+ * Expressions are compiled, then run with every input set to null. Syntax errors and
+ * references to undefined names (e.g. functions missing from the library) are reported;
+ * other errors are expected, since the inputs aren't real values.
+ */
+
+var readline = require("readline");
+var vm = require("vm");
+
+var TIMEOUT_MS = 1000;
+
+// Expression library -> {context, error}, as all the tools share the same library
+var libraryContexts = {};
+
+var nullInputs = new Proxy({}, {
+    get: function() { return null; }
+});
+
+function formatError(error) {
+    return error.name + ": " + error.message;
+}
+
+function getLibraryContext(library) {
+    if (!libraryContexts.hasOwnProperty(library)) {
+        var context = vm.createContext({});
+        var error = null;
+
+        try {
+            vm.runInContext(library, context, {timeout: TIMEOUT_MS});
+        } catch (e) {
+            error = formatError(e);
+        }
+
+        libraryContexts[library] = {context: context, error: error};
+    }
+
+    return libraryContexts[library];
+}
+
+function checkExpression(context, expression) {
+    var script;
+    try {
+        script = new vm.Script(expression);
+    } catch (e) {
+        return formatError(e);
+    }
+
+    context.inputs = nullInputs;
+    context.self = null;
+    context.runtime = {cores: 1, ram: 1024, outdir: "/outdir", tmpdir: "/tmpdir", outdirSize: 1024, tmpdirSize: 1024};
+
+    try {
+        script.runInContext(context, {timeout: TIMEOUT_MS});
+    } catch (e) {
+        if (e.name === "ReferenceError") {
+            return formatError(e);
+        }
+    }
+
+    return null;
+}
+
+readline.createInterface({input: process.stdin, terminal: false}).on("line", function(line) {
+    var request = JSON.parse(line);
+    var library = getLibraryContext(request.library);
+    var errors = [];
+
+    request.expressions.forEach(function(expression, i) {
+        var error = checkExpression(library.context, expression);
+        if (error !== null) {
+            errors.push([i, error]);
+        }
+    });
+
+    process.stdout.write(JSON.stringify({library_error: library.error, errors: errors}) + "\n");
+});
@@ -0,0 +1,1008 @@
+"""
+Rendering the command line of a generated tool for a job in Python, without cwltool or node.
+
+cwltool builds the command line of a job by evaluating the expressions of the tool's bindings
+with node, which is far too slow to check the bindings of many tools against many jobs.
+render_command_line builds the same command line from a tool generated by gatk_tool_to_cwl,
+following the binding rules of cwltool, with Python equivalents of the functions of
+js_library.js and an evaluator for the small subset of JavaScript that the generator writes
+(parameter references, calls, ?:, ==, +, *, Math.floor and Math.ceil). Any other expression is
+an error rather than a guess. check_command_line compares the command line with the one built
+by cwltool, to check that the two stay equivalent.
+"""
+
+import argparse
+import copy
+import functools
+import itertools
+import json
+import math
+import os
+import re
+import shlex
+import sys
+import tempfile
+from decimal import Decimal
+from typing import *
+
+from .common import find_closing_bracket
+from .validate import require_cwltool
+
+# The runtime of a job without a ResourceRequirement, as with cwltool. The directories are the
+# ones of jobs in a container.
+DEFAULT_RUNTIME = {
+    "cores": 1,
+    "ram": 256,
+    "tmpdirSize": 1024,
+    "outdirSize": 1024,
+    "outdir": "/var/spool/cwl",
+    "tmpdir": "/tmp"
+}
+
+_PRIMITIVE_TYPES = {"null", "boolean", "int", "long", "float", "double", "string", "File", "Directory", "Any"}
+
+_INT_RANGES = {"int": (-2 ** 31, 2 ** 31 - 1), "long": (-2 ** 63, 2 ** 63 - 1)}
+
+
+class UnsupportedExpressionError(Exception):
+    def __init__(self, expression: str, reason: str) -> None:
+        super(UnsupportedExpressionError, self).__init__(f"Can't evaluate the expression {expression!r}: {reason}")
+
+        self.expression = expression
+
+
+# JavaScript values are represented by their JSON values: None for null (and undefined), bools, ints and
+# floats for numbers, strs, lists for arrays and dicts for objects
+
+def is_truthy(value: Any) -> bool:
+    """
+    Return whether a value is truthy in JavaScript, where empty arrays and objects are truthy.
+    """
+    if value is None or value is False or value == "":
+        return False
+    elif isinstance(value, (int, float)) and not isinstance(value, bool):
+        return value != 0 and not math.isnan(value)
+
+    return True
+
+def number_to_string(number: Union[int, float]) -> str:
+    """
+    Return a number as JavaScript converts it to a string, e.g. 1.0 as "1" and 1e-7 as "1e-7".
+    """
+    if isinstance(number, int):
+        return str(number)
+    elif math.isnan(number):
+        return "NaN"
+    elif math.isinf(number):
+        return "Infinity" if number > 0 else "-Infinity"
+    elif number == 0:
+        return "0"
+    elif number < 0:
+        return "-" + number_to_string(-number)
+
+    # The shortest digits that are read back as the number, which Python and JavaScript agree on
+    _, digit_tuple, exponent = Decimal(repr(number)).normalize().as_tuple()
+    digits = "".join(map(str, digit_tuple))
+    point = len(digits) + cast(int, exponent)
+
+    if len(digits) <= point <= 21:
+        return digits + "0" * (point - len(digits))
+    elif 0 < point <= 21:
+        return digits[:point] + "." + digits[point:]
+    elif -6 < point <= 0:
+        return "0." + "0" * -point + digits
+
+    power = f"e{'+' if point > 0 else '-'}{abs(point - 1)}"
+    return (digits[0] + "." + digits[1:] if len(digits) > 1 else digits) + power
+
+def to_string(value: Any) -> str:
+    """
+    Return a value as JavaScript converts it to a string.
+    """
+    if value is None:
+        return "null"
+    elif isinstance(value, bool):
+        return "true" if value else "false"
+    elif isinstance(value, (int, float)):
+        return number_to_string(value)
+    elif isinstance(value, list):
+        return ",".join("" if item is None else to_string(item) for item in value)
+    elif isinstance(value, dict):
+        return "[object Object]"
+
+    return value
+
+def _to_number(value: Any) -> Union[int, float]:
+    if value is None:
+        return 0
+    elif isinstance(value, (bool, int, float)):
+        return int(value) if isinstance(value, bool) else value
+    elif isinstance(value, str):
+        try:
+            return float(value.strip()) if value.strip() else 0
+        except ValueError:
+            return math.nan
+
+    return math.nan
+
+def _is_number(value: Any) -> bool:
+    return isinstance(value, (int, float)) and not isinstance(value, bool)
+
+def _loose_equals(first: Any, second: Any) -> bool:
+    """
+    Return whether first == second in JavaScript.
+    """
+    if first is None or second is None:
+        return first is None and second is None
+    elif isinstance(first, (list, dict)) or isinstance(second, (list, dict)):
+        return first is second
+    elif isinstance(first, str) and isinstance(second, str):
+        return first == second
+
+    return _to_number(first) == _to_number(second)
+
+def _strict_equals(first: Any, second: Any) -> bool:
+    """
+    Return whether first === second in JavaScript.
+    """
+    if _is_number(first) and _is_number(second):
+        return first == second
+    elif isinstance(first, (list, dict)) or isinstance(second, (list, dict)):
+        return first is second
+
+    return type(first) is type(second) and first == second
+
+def _add(first: Any, second: Any) -> Any:
+    if isinstance(first, (str, list, dict)) or isinstance(second, (str, list, dict)):
+        return to_string(first) + to_string(second)
+
+    return _to_number(first) + _to_number(second)
+
+def from_javascript(value: Any) -> Any:
+    """
+    Return the value of a JavaScript expression as cwltool reads it, which is through JSON (e.g. 2.0 is read as 2).
+    """
+    if isinstance(value, float):
+        return None if math.isnan(value) or math.isinf(value) else json.loads(number_to_string(value))
+    elif isinstance(value, list):
+        return [from_javascript(item) for item in value]
+    elif isinstance(value, dict):
+        return {key: from_javascript(item) for key, item in value.items()}
+
+    return value
+
+
+# The functions of js_library.js, which take the self of the expression as their first argument
+
+def generate_gatk4_boolean_value(self: Any) -> Any:
+    """
+    Python equivalent of generateGATK4BooleanValue.
+    """
+    if isinstance(self, bool):
+        return to_string(self)
+
+    return self
+
+def apply_tags_to_argument(self: Any, prefix: str, tags: Any) -> Any:
+    """
+    Python equivalent of applyTagsToArgument.
+
+    :raises TypeError: if the tags of an array aren't an array of the same length, as the JavaScript function does
+    """
+    if not is_truthy(self):
+        return None
+    elif not is_truthy(tags):
+        return generate_array_cmd(self, prefix)
+
+    def add_tag_to_argument(tag: Any, argument: Any) -> List:
+        all_tags = ",".join("" if item is None else to_string(item) for item in tag) if isinstance(tag, list) else tag
+
+        return [_add(_add(prefix, ":"), all_tags), argument]
+
+    if isinstance(self, list):
+        if not isinstance(tags, list) or len(self) != len(tags):
+            raise TypeError(f"Argument '{to_string(prefix)}' tag field is invalid")
+
+        if not self:
+            raise TypeError("Reduce of empty array with no initial value")
+
+        return [
+            item
+            for element, tag in zip(self, tags)
+            for item in add_tag_to_argument(tag, element)
+        ]
+
+    return add_tag_to_argument(tags, self)
+
+def generate_array_cmd(self: Any, prefix: str) -> Any:
+    """
+    Python equivalent of generateArrayCmd.
+    """
+    if not is_truthy(self):
+        return None
+
+    return [item for element in (self if isinstance(self, list) else [self]) for item in (prefix, element)]
+
+def input_size_mib(inputs: List) -> float:
+    """
+    Python equivalent of inputSizeMiB, from the sizes of the File objects (which are 0 if they have none).
+    """
+    size = 0
+
+    for cwl_input in inputs:
+        if isinstance(cwl_input, list):
+            size += input_size_mib(cwl_input) * 1024 * 1024
+        elif isinstance(cwl_input, dict) and cwl_input.get("class") == "File" and is_truthy(cwl_input.get("size")):
+            size = _add(size, cwl_input["size"])
+
+    return size / (1024 * 1024)
+
+LIBRARY_FUNCTIONS = {
+    "generateGATK4BooleanValue": generate_gatk4_boolean_value,
+    "applyTagsToArgument": apply_tags_to_argument,
+    "generateArrayCmd": generate_array_cmd,
+    "inputSizeMiB": lambda self, inputs: input_size_mib(inputs)
+}
+
+def _round_with(function: Callable[[float], int]) -> Callable[[Any], Union[int, float]]:
+    def round_number(value: Any) -> Union[int, float]:
+        number = _to_number(value)
+        return number if math.isnan(number) or math.isinf(number) else function(number)
+
+    return round_number
+
+_MATH = {
+    "floor": _round_with(math.floor),
+    "ceil": _round_with(math.ceil)
+}
+
+
+# Parsing the expressions, into functions of the context (inputs, self and runtime) that evaluate them
+
+_TOKEN_REGEX = re.compile(r"""\s*(?:
+    (?P<number>\d+(?:\.\d*)?(?:[eE][+-]?\d+)?|\.\d+(?:[eE][+-]?\d+)?)|
+    (?P<string>'(?:[^'\\]|\\.)*'|"(?:[^"\\]|\\.)*")|
+    (?P<name>[A-Za-z_$][\w$]*)|
+    (?P<operator>===|!==|==|!=|&&|\|\||[-+*/?:.,()\[\]!])
+)""", re.VERBOSE)
+
+_STRING_ESCAPES = {"n": "\n", "t": "\t", "r": "\r", "b": "\b", "f": "\f", "v": "\v", "0": "\0"}
+
+_BINARY_OPERATORS: Dict[str, Callable[[Any, Any], Any]] = {
+    "==": _loose_equals,
+    "!=": lambda first, second: not _loose_equals(first, second),
+    "===": _strict_equals,
+    "!==": lambda first, second: not _strict_equals(first, second),
+    "+": _add,
+    "-": lambda first, second: _to_number(first) - _to_number(second),
+    "*": lambda first, second: _to_number(first) * _to_number(second),
+    "/": lambda first, second: _divide(_to_number(first), _to_number(second))
+}
+
+# The binary operators from the lowest precedence to the highest
+_PRECEDENCE = [["||"], ["&&"], ["==", "!=", "===", "!=="], ["+", "-"], ["*", "/"]]
+
+_Evaluate = Callable[[Dict], Any]
+
+def _divide(first: Union[int, float], second: Union[int, float]) -> float:
+    if second == 0:
+        return math.nan if first == 0 or math.isnan(first) else math.copysign(math.inf, first) * math.copysign(1, second)
+
+    return first / second
+
+def _tokenize(expression: str) -> List[Tuple[str, str]]:
+    tokens = []
+    position = 0
+
+    while expression[position:].strip():
+        match = _TOKEN_REGEX.match(expression, position)
+        if match is None:
+            raise UnsupportedExpressionError(expression, f"unexpected {expression[position:].strip()[0]!r}")
+
+        kind = cast(str, match.lastgroup)
+        tokens.append((kind, match.group(kind)))
+        position = match.end()
+
+    return tokens
+
+class _Parser:
+    """
+    A recursive descent parser of the JavaScript expressions that the generator writes.
+    """
+    def __init__(self, expression: str) -> None:
+        self.expression = expression
+        self.tokens = _tokenize(expression)
+        self.position = 0
+
+    def error(self, reason: str) -> UnsupportedExpressionError:
+        return UnsupportedExpressionError(self.expression, reason)
+
+    def peek(self) -> Optional[str]:
+        if self.position < len(self.tokens):
+            kind, text = self.tokens[self.position]
+            return text if kind == "operator" else None
+
+        return None
+
+    def expect(self, operator: str) -> None:
+        if self.peek() != operator:
+            raise self.error(f"expected {operator!r}")
+
+        self.position += 1
+
+    def parse(self) -> _Evaluate:
+        evaluate = self.parse_conditional()
+
+        if self.position != len(self.tokens):
+            raise self.error(f"unexpected {self.tokens[self.position][1]!r}")
+
+        return evaluate
+
+    def parse_conditional(self) -> _Evaluate:
+        condition = self.parse_binary(0)
+
+        if self.peek() != "?":
+            return condition
+
+        self.position += 1
+        if_true = self.parse_conditional()
+        self.expect(":")
+        if_false = self.parse_conditional()
+
+        return lambda context: if_true(context) if is_truthy(condition(context)) else if_false(context)
+
+    def parse_binary(self, level: int) -> _Evaluate:
+        if level == len(_PRECEDENCE):
+            return self.parse_unary()
+
+        first = self.parse_binary(level + 1)
+
+        while self.peek() in _PRECEDENCE[level]:
+            operator = cast(str, self.peek())
+            self.position += 1
+            first = self.combine(operator, first, self.parse_binary(level + 1))
+
+        return first
+
+    @staticmethod
+    def combine(operator: str, first: _Evaluate, second: _Evaluate) -> _Evaluate:
+        if operator == "&&":
+            return lambda context: (lambda value: second(context) if is_truthy(value) else value)(first(context))
+        elif operator == "||":
+            return lambda context: (lambda value: value if is_truthy(value) else second(context))(first(context))
+
+        function = _BINARY_OPERATORS[operator]
+        return lambda context: function(first(context), second(context))
+
+    def parse_unary(self) -> _Evaluate:
+        operator = self.peek()
+
+        if operator == "!":
+            self.position += 1
+            operand = self.parse_unary()
+            return lambda context: not is_truthy(operand(context))
+        elif operator == "-":
+            self.position += 1
+            operand = self.parse_unary()
+            return lambda context: -_to_number(operand(context))
+
+        return self.parse_postfix()
+
+    def parse_postfix(self) -> _Evaluate:
+        evaluate = self.parse_primary()
+
+        while True:
+            operator = self.peek()
+
+            if operator == ".":
+                self.position += 1
+                kind, name = self.tokens[self.position] if self.position < len(self.tokens) else ("", "")
+                if kind != "name":
+                    raise self.error("expected a property name")
+                self.position += 1
+                evaluate = self.member(evaluate, lambda context, name=name: name)
+            elif operator == "[":
+                self.position += 1
+                key = self.parse_conditional()
+                self.expect("]")
+                evaluate = self.member(evaluate, key)
+            elif operator == "(":
+                self.position += 1
+                arguments = self.parse_arguments(")")
+                evaluate = self.call(evaluate, arguments)
+            else:
+                return evaluate
+
+    def member(self, evaluate: _Evaluate, key: _Evaluate) -> _Evaluate:
+        expression = self.expression
+
+        def get_member(context: Dict) -> Any:
+            value = evaluate(context)
+            name = key(context)
+
+            if value is None:
+                raise TypeError(f"Cannot read property {to_string(name)!r} of null, in {expression!r}")
+            elif isinstance(value, dict):
+                return value.get(to_string(name))
+            elif isinstance(value, (list, str)):
+                if name == "length":
+                    return len(value)
+                elif _is_number(name) and float(name).is_integer() and 0 <= name < len(value):
+                    return value[int(name)]
+
+            return None
+
+        return get_member
+
+    def call(self, evaluate: _Evaluate, arguments: List[_Evaluate]) -> _Evaluate:
+        expression = self.expression
+
+        def call_function(context: Dict) -> Any:
+            function = evaluate(context)
+
+            if not callable(function):
+                raise TypeError(f"{to_string(function)} is not a function, in {expression!r}")
+
+            return function(*(argument(context) for argument in arguments))
+
+        return call_function
+
+    def parse_arguments(self, closing_bracket: str) -> List[_Evaluate]:
+        arguments = []
+
+        while self.peek() != closing_bracket:
+            arguments.append(self.parse_conditional())
+
+            if self.peek() != closing_bracket:
+                self.expect(",")
+
+        self.position += 1
+        return arguments
+
+    def parse_primary(self) -> _Evaluate:
+        if self.position == len(self.tokens):
+            raise self.error("unexpected end")
+
+        kind, text = self.tokens[self.position]
+        self.position += 1
+
+        if kind == "number":
+            number = float(text) if any(char in text for char in ".eE") else int(text)
+            return lambda context: number
+        elif kind == "string":
+            string = re.sub(r"\\(.)", lambda match: _STRING_ESCAPES.get(match.group(1), match.group(1)), text[1:-1])
+            return lambda context: string
+        elif kind == "name":
+            return self.get_name(text)
+        elif text == "(":
+            evaluate = self.parse_conditional()
+            self.expect(")")
+            return evaluate
+        elif text == "[":
+            items = self.parse_arguments("]")
+            return lambda context: [item(context) for item in items]
+
+        raise self.error(f"unexpected {text!r}")
+
+    def get_name(self, name: str) -> _Evaluate:
+        constants = {"null": None, "undefined": None, "true": True, "false": False, "NaN": math.nan, "Infinity": math.inf}
+
+        if name in constants:
+            constant = constants[name]
+            return lambda context: constant
+        elif name in ("inputs", "self", "runtime"):
+            return lambda context: context.get(name)
+        elif name == "Math":
+            return lambda context: _MATH
+        elif name in LIBRARY_FUNCTIONS:
+            function = LIBRARY_FUNCTIONS[name]
+            return lambda context: functools.partial(function, context.get("self"))
+
+        raise self.error(f"unknown name {name!r}")
+
+@functools.lru_cache(maxsize=None)
+def _parse(expression: str) -> _Evaluate:
+    return _Parser(expression).parse()
+
+# Matches a parameter reference (without its "$"), which cwltool evaluates in Python rather than with JavaScript
+_PARAMETER_REFERENCE_REGEX = re.compile(r"""^\((\w+)(\.\w+|\['([^']|\\')+'\]|\["([^"]|\\")+"\]|\[[0-9]+\])*\)$""")
+
+def evaluate_expression(source: str, context: Dict) -> Any:
+    """
+    Return the value of a "$(...)" expression, with the inputs, self and runtime in context.
+    """
+    if source.startswith("${"):
+        raise UnsupportedExpressionError(source, "function bodies aren't supported")
+
+    value = _parse(source[2:-1])(context)
+
+    # The values of parameter references aren't converted to JSON and back
+    match = _PARAMETER_REFERENCE_REGEX.match(source[1:])
+    if match is None or match.group(1) not in ("inputs", "self", "runtime"):
+        value = from_javascript(value)
+
+    return value
+
+def interpolate(text: Any, context: Dict) -> Any:
+    """
+    Return the value of a CWL string with expressions, as cwltool interpolates it: the value of the
+    expression if the string is one expression, otherwise a string with the values of the expressions.
+    """
+    if not isinstance(text, str) or ("$(" not in text and "${" not in text):
+        return text
+
+    text = text.strip()
+    parts = []
+    position = 0
+    start = 0
+
+    while position < len(text):
+        if text[position] == "\\":
+            # Backslashes escape an expression, or another backslash
+            parts.append(text[start:position])
+            escaped = text[position:position + 3]
+            if escaped in ("\\$(", "\\${"):
+                parts.append(escaped[1:])
+                position += 3
+            elif escaped[1:2] == "\\":
+                parts.append("\\")
+                position += 2
+            else:
+                parts.append(escaped[:2])
+                position += 2
+            start = position
+        elif text[position] == "$" and text[position + 1:position + 2] in ("(", "{"):
+            end = find_closing_bracket(text, position + 1)
+            if end is None:
+                raise UnsupportedExpressionError(text, "the expression isn't terminated")
+
+            value = evaluate_expression(text[position:end + 1], context)
+            if position == 0 and end == len(text) - 1:
+                return value
+
+            parts.append(text[start:position])
+            parts.append(value if isinstance(value, str) else json.dumps(value, sort_keys=True))
+            position = start = end + 1
+        else:
+            position += 1
+
+    parts.append(text[start:])
+    return "".join(parts)
+
+
+# Binding the inputs, as cwltool's Builder.bind_input does
+
+def _expand_type(cwl_type: Any) -> Any:
+    """
+    Expand the "type?" and "type[]" shorthands of a type, as when cwltool loads it.
+    """
+    if isinstance(cwl_type, str):
+        if cwl_type.endswith("?"):
+            return ["null", _expand_type(cwl_type[:-1])]
+        elif cwl_type.endswith("[]"):
+            return {"type": "array", "items": _expand_type(cwl_type[:-2])}
+
+    return cwl_type
+
+def _get_schema_defs(tool_cwl: Dict) -> Dict[str, Dict]:
+    return {
+        schema_type["name"]: schema_type
+        for requirement in tool_cwl.get("requirements", [])
+        if requirement.get("class") == "SchemaDefRequirement"
+        for schema_type in requirement.get("types", [])
+    }
+
+def is_valid(cwl_type: Any, datum: Any, schema_defs: Dict[str, Dict]) -> bool:
+    """
+    Return whether datum is a valid value of a CWL type.
+    """
+    cwl_type = _expand_type(cwl_type)
+
+    if isinstance(cwl_type, list):
+        return any(is_valid(item, datum, schema_defs) for item in cwl_type)
+    elif isinstance(cwl_type, str) and cwl_type not in _PRIMITIVE_TYPES:
+        if cwl_type not in schema_defs:
+            raise ValueError(f"Unknown type {cwl_type}")
+
+        return is_valid(schema_defs[cwl_type], datum, schema_defs)
+    elif isinstance(cwl_type, dict):
+        if cwl_type["type"] == "array":
+            return isinstance(datum, list) and all(is_valid(cwl_type["items"], item, schema_defs) for item in datum)
+        elif cwl_type["type"] == "enum":
+            return isinstance(datum, str) and datum in cwl_type["symbols"]
+        elif cwl_type["type"] == "record":
+            return isinstance(datum, dict) and all(
+                is_valid(field["type"], datum.get(field["name"]), schema_defs) for field in cwl_type["fields"]
+            )
+
+        return is_valid(cwl_type["type"], datum, schema_defs)
+
+    if cwl_type == "null":
+        return datum is None
+    elif cwl_type == "Any":
+        return datum is not None
+    elif cwl_type == "boolean":
+        return isinstance(datum, bool)
+    elif cwl_type in _INT_RANGES:
+        return isinstance(datum, int) and not isinstance(datum, bool) and \
+            _INT_RANGES[cwl_type][0] <= datum <= _INT_RANGES[cwl_type][1]
+    elif cwl_type in ("float", "double"):
+        return _is_number(datum)
+    elif cwl_type == "string":
+        return isinstance(datum, str)
+
+    # File and Directory
+    return isinstance(datum, dict) and datum.get("class") == cwl_type
+
+def _bind_input(
+        schema: Dict,
+        datum: Any,
+        schema_defs: Dict[str, Dict],
+        lead_position: List[Union[int, str]],
+        tail_position: List[Union[int, str]]) -> List[Dict]:
+    bindings: List[Dict] = []
+    binding: Dict = {}
+    value_from = False
+
+    if isinstance(schema.get("inputBinding"), dict):
+        binding = dict(schema["inputBinding"])
+        position = binding.get("position", 0)
+        binding["position"] = lead_position + (list(position) if isinstance(position, list) else [position]) + tail_position
+        binding["datum"] = datum
+        value_from = "valueFrom" in binding
+
+    cwl_type = _expand_type(schema["type"])
+
+    if isinstance(cwl_type, list):
+        # The first type of a union that the value is valid for is bound. With a valueFrom, only the input's binding is.
+        valid_type = next((item for item in cwl_type if is_valid(item, datum, schema_defs)), None)
+        if valid_type is None:
+            raise ValueError(f"{datum!r} is not a valid value of {cwl_type}")
+
+        if not value_from:
+            return _bind_input({**schema, "type": valid_type}, datum, schema_defs, lead_position, tail_position)
+    elif isinstance(cwl_type, dict):
+        type_schema = dict(cwl_type)
+        if binding and "inputBinding" not in type_schema and type_schema.get("type") == "array" and \
+                "itemSeparator" not in binding:
+            type_schema["inputBinding"] = {}
+
+        if not value_from:
+            bindings.extend(_bind_input(type_schema, datum, schema_defs, lead_position, tail_position))
+    else:
+        if cwl_type in schema_defs:
+            schema = schema_defs[cwl_type]
+            cwl_type = schema["type"]
+
+        if cwl_type == "record":
+            for field in schema["fields"]:
+                if datum.get(field["name"]) is not None:
+                    bindings.extend(_bind_input(field, datum[field["name"]], schema_defs, lead_position, [field["name"]]))
+        elif cwl_type == "array":
+            for index, item in enumerate(datum):
+                item_schema = {
+                    "type": schema["items"],
+                    "inputBinding": {**copy.deepcopy(binding), "datum": item} if binding else None
+                }
+                bindings.extend(_bind_input(item_schema, item, schema_defs, [index], tail_position))
+
+            binding = {}
+
+    # The positions of the bindings of the items or fields of a value are after the position of the value
+    if binding:
+        for item_binding in bindings:
+            item_binding["position"] = binding["position"] + item_binding["position"]
+        bindings.append(binding)
+
+    return bindings
+
+def _compare_positions(first: Dict, second: Dict) -> int:
+    """
+    Compare the positions of two bindings, as Python 2 compares lists of ints and strs (as cwltool does).
+    """
+    for first_key, second_key in itertools.zip_longest(first["position"], second["position"]):
+        if first_key == second_key:
+            continue
+        elif first_key is None:
+            return -1
+        elif second_key is None:
+            return 1
+        elif isinstance(first_key, str) or isinstance(second_key, str):
+            return 1 if str(first_key) > str(second_key) else -1
+
+        return 1 if first_key > second_key else -1
+
+    return 0
+
+def _to_argument(value: Any) -> str:
+    if isinstance(value, dict) and value.get("class") in ("File", "Directory"):
+        if "path" in value:
+            return str(value["path"])
+        elif "location" in value:
+            return re.sub(r"^file://", "", str(value["location"]))
+
+        raise ValueError(f"{value['class']} object missing \"path\": {value}")
+
+    return str(value)
+
+def _generate_arguments(binding: Dict, context: Dict) -> List[str]:
+    """
+    Return the arguments of a binding, as cwltool's Builder.generate_arg does.
+    """
+    value = binding.get("datum")
+    if "valueFrom" in binding:
+        value = interpolate(binding["valueFrom"], {**context, "self": value})
+
+    prefix = binding.get("prefix")
+    separate = binding.get("separate", True)
+    if prefix is None and not separate:
+        raise ValueError("'separate' option can not be specified without prefix")
+
+    if isinstance(value, list):
+        if binding.get("itemSeparator") and value:
+            values = [binding["itemSeparator"].join(map(_to_argument, value))]
+        elif binding.get("valueFrom"):
+            return ([prefix] if prefix else []) + [_to_argument(item) for item in value]
+        else:
+            return [prefix] if prefix and value else []
+    elif isinstance(value, dict) and value.get("class") in ("File", "Directory"):
+        values = [value]
+    elif isinstance(value, dict):
+        return [prefix] if prefix else []
+    elif value is True and prefix:
+        return [prefix]
+    elif isinstance(value, bool) or value is None:
+        return []
+    else:
+        values = [value]
+
+    arguments = []
+    for item in values:
+        if separate:
+            arguments.extend([prefix, _to_argument(item)])
+        else:
+            arguments.append(_to_argument(item) if prefix is None else prefix + _to_argument(item))
+
+    return [argument for argument in arguments if argument is not None]
+
+
+def fill_in_defaults(tool_cwl: Dict, job: Dict) -> Dict:
+    """
+    Return a job with the defaults of the inputs it doesn't give, and the optional inputs it doesn't give as null.
+
+    :raises ValueError: if a required input isn't given
+    """
+    job = dict(job)
+
+    for cwl_input in tool_cwl["inputs"]:
+        if job.get(cwl_input["id"]) is not None:
+            continue
+        elif "default" in cwl_input:
+            job[cwl_input["id"]] = copy.deepcopy(cwl_input["default"])
+        elif "null" in _expand_type(cwl_input["type"]):
+            job[cwl_input["id"]] = None
+        else:
+            raise ValueError(f"Missing required input parameter '{cwl_input['id']}'")
+
+    return job
+
+def get_runtime(tool_cwl: Dict, job: Dict, runtime: Dict = None) -> Dict:
+    """
+    Return the runtime of a job of a tool from the ResourceRequirement of the tool, as cwltool allocates it
+    (the minimum of each resource), with the values in runtime instead if it's given.
+    """
+    resource_requirement = next(
+        (
+            requirement for requirement in tool_cwl.get("requirements", []) + tool_cwl.get("hints", [])
+            if requirement.get("class") == "ResourceRequirement"
+        ),
+        {}
+    )
+    resources = {**DEFAULT_RUNTIME, "ram": 1024 if tool_cwl.get("cwlVersion") == "v1.0" else 256}
+
+    for resource, runtime_key in (("cores", "cores"), ("ram", "ram"), ("tmpdir", "tmpdirSize"), ("outdir", "outdirSize")):
+        value = resource_requirement.get(resource + "Min") or resource_requirement.get(resource + "Max")
+
+        if value:
+            value = interpolate(value, {"inputs": job, "self": None, "runtime": {}})
+            resources[runtime_key] = value if resource == "cores" else math.ceil(value)
+
+    return {**resources, **(runtime or {})}
+
+def render_arguments(tool_cwl: Dict, job: Dict, runtime: Dict = None) -> List[Tuple[str, bool]]:
+    """
+    Return the arguments of the command line of a job of a tool, in order, with whether they are shell quoted.
+
+    :param tool_cwl: The tool, as generated by gatk_tool_to_cwl or loaded from its CWL file
+    :param job: The values of the inputs of the tool. Files and Directories are given as their path.
+    :param runtime: The runtime of the expressions (e.g. cores), which is from the tool's ResourceRequirement by default
+    """
+    schema_defs = _get_schema_defs(tool_cwl)
+    job = fill_in_defaults(tool_cwl, job)
+
+    inputs_record = {
+        "type": "record",
+        "fields": [{**cwl_input, "name": cwl_input["id"]} for cwl_input in tool_cwl["inputs"]]
+    }
+    if not is_valid(inputs_record, job, schema_defs):
+        invalid_inputs = [
+            field["name"] for field in inputs_record["fields"] if not is_valid(field["type"], job[field["name"]], schema_defs)
+        ]
+        raise ValueError(f"Invalid values of the inputs {', '.join(invalid_inputs)}")
+
+    bindings = _bind_input(inputs_record, job, schema_defs, [], [])
+
+    base_command = tool_cwl.get("baseCommand") or []
+    for index, command in enumerate(base_command if isinstance(base_command, list) else [base_command]):
+        bindings.append({"position": [-1000000, index], "datum": command})
+
+    for index, argument in enumerate(tool_cwl.get("arguments", [])):
+        if isinstance(argument, dict):
+            bindings.append({**argument, "position": [argument.get("position") or 0, index]})
+        elif "$(" in argument or "${" in argument:
+            bindings.append({"position": [0, index], "valueFrom": argument})
+        else:
+            bindings.append({"position": [0, index], "datum": argument})
+
+    bindings.sort(key=functools.cmp_to_key(_compare_positions))
+
+    context = {"inputs": job, "self": None, "runtime": get_runtime(tool_cwl, job, runtime)}
+    context["runtime"]["cores"] = math.ceil(context["runtime"]["cores"])
+
+    return [
+        (argument, binding.get("shellQuote", True))
+        for binding in bindings
+        for argument in _generate_arguments(binding, context)
+    ]
+
+def render_command_line(tool_cwl: Dict, job: Dict, runtime: Dict = None) -> List[str]:
+    """
+    Return the command line cwltool runs for a job of a tool (see render_arguments). With ShellCommandRequirement,
+    it's the shell command ["/bin/sh", "-c", ...] of the arguments.
+    """
+    arguments = render_arguments(tool_cwl, job, runtime)
+
+    if any(requirement.get("class") == "ShellCommandRequirement" for requirement in tool_cwl.get("requirements", [])):
+        return ["/bin/sh", "-c", " ".join(shlex.quote(argument) if quote else argument for argument, quote in arguments)]
+
+    return [argument for argument, _ in arguments]
+
+
+@functools.lru_cache(maxsize=None)
+def _load_cwltool_tool(cwl_path: str) -> Any:
+    """
+    Load a tool with cwltool, with its DockerRequirement as a hint so that its jobs can be built without a container.
+    """
+    from cwltool.context import LoadingContext
+    from cwltool.load_tool import load_tool
+    from cwltool.workflow import default_make_tool
+
+    tool_cwl = _load_yaml_file(cwl_path)
+    tool_cwl["hints"] = tool_cwl.get("hints", []) + [
+        requirement for requirement in tool_cwl.get("requirements", []) if requirement["class"] == "DockerRequirement"
+    ]
+    tool_cwl["requirements"] = [
+        requirement for requirement in tool_cwl.get("requirements", []) if requirement["class"] != "DockerRequirement"
+    ]
+    tool_cwl["id"] = "file://" + os.path.abspath(cwl_path)
+
+    return load_tool(tool_cwl, LoadingContext({"construct_tool_object": default_make_tool}))
+
+def get_cwltool_command_line(cwl_path: str, job: Dict) -> Tuple[List[str], Dict, Dict]:
+    """
+    Return the command line that cwltool builds for a job of a tool (evaluating the expressions with node),
+    the job with the paths that cwltool stages its files at, and the runtime of its expressions. Nothing is run.
+    """
+    require_cwltool()
+
+    from cwltool.context import RuntimeContext
+    from cwltool.utils import path_to_loc, visit_class
+
+    cwltool_job = copy.deepcopy(job)
+    visit_class(cwltool_job, ("File", "Directory"), path_to_loc)
+
+    with tempfile.TemporaryDirectory() as directory:
+        runtime_context = RuntimeContext({
+            "use_container": False,
+            "toplevel": True,
+            "outdir": directory,
+            "tmpdir_prefix": directory + "/",
+            "tmp_outdir_prefix": directory + "/",
+            "basedir": directory
+        })
+        cwl_job = next(_load_cwltool_tool(cwl_path).job(cwltool_job, lambda *args: None, runtime_context))
+        builder = cwl_job.builder
+
+        return (
+            list(cwl_job.command_line),
+            _with_staged_paths(job, builder.job),
+            {**builder.resources, "outdir": builder.outdir, "tmpdir": builder.tmpdir}
+        )
+
+def _with_staged_paths(value: Any, cwltool_value: Any) -> Any:
+    """
+    Return a value of a job with the paths of the files of the same value in the job built by cwltool.
+    """
+    if isinstance(value, dict) and value.get("class") in ("File", "Directory"):
+        # The values of the job that aren't inputs of the tool aren't staged
+        return {**value, "path": cwltool_value["path"]} if "path" in cwltool_value else value
+    elif isinstance(value, dict):
+        return {key: _with_staged_paths(item, cwltool_value.get(key)) for key, item in value.items()}
+    elif isinstance(value, list):
+        return [_with_staged_paths(item, cwltool_item) for item, cwltool_item in zip(value, cwltool_value)]
+
+    return value
+
+def check_command_line(cwl_path: str, job: Dict, tool_cwl: Dict = None) -> Tuple[List[str], List[str]]:
+    """
+    Return the command line of a job of a tool rendered by render_command_line, and the one built by cwltool,
+    with the same runtime and the paths cwltool stages the files at. They are the same unless one of them is wrong.
+
+    :param tool_cwl: The tool in the file at cwl_path, if it's already loaded
+    """
+    if tool_cwl is None:
+        tool_cwl = _load_yaml_file(cwl_path)
+
+    cwltool_command_line, staged_job, runtime = get_cwltool_command_line(cwl_path, job)
+
+    return render_command_line(tool_cwl, staged_job, runtime), cwltool_command_line
+
+def _load_yaml_file(path: str) -> Dict:
+    from ruamel import yaml
+
+    with open(path) as file:
+        return yaml.safe_load(file)
+
+
+def render_main(args: List[str]) -> None:
+    """
+    Print the command lines of jobs of a generated tool.
+    """
+    parser = argparse.ArgumentParser(prog="gatk_cwl_generator render",
+        description="Prints the command line of each job of a generated tool, without running cwltool or node.")
+    parser.add_argument("tool",
+        help="The CWL file of the tool")
+    parser.add_argument("jobs", nargs="+",
+        help="The YAML or JSON job files")
+    parser.add_argument("--cores", dest="cores", type=int,
+        help="The number of cores of the jobs. Default is the tool's coresMin")
+    parser.add_argument("--ram", dest="ram", type=int,
+        help="The RAM of the jobs in MiB. Default is the tool's ramMin")
+    parser.add_argument("--check", dest="check", action="store_true",
+        help="Also build the command lines with cwltool (which runs node), and report the jobs whose command " +
+        "lines differ. The runtime is cwltool's. Files in the jobs should have absolute paths, as cwltool makes them absolute.")
+    render_options = parser.parse_args(args)
+
+    tool_cwl = _load_yaml_file(render_options.tool)
+    runtime = {key: getattr(render_options, key) for key in ("cores", "ram") if getattr(render_options, key) is not None}
+    failures = 0
+
+    # The errors of a job, rather than of the renderer
+    job_errors: Tuple[Type[Exception], ...] = (ValueError, TypeError, UnsupportedExpressionError)
+    if render_options.check:
+        require_cwltool()
+        from cwltool.errors import WorkflowException
+        job_errors += (WorkflowException,)
+
+    for job_path in render_options.jobs:
+        job = _load_yaml_file(job_path)
+
+        try:
+            if not render_options.check:
+                print(" ".join(map(shlex.quote, render_command_line(tool_cwl, job, runtime))))
+                continue
+
+            command_line, cwltool_command_line = check_command_line(render_options.tool, job, tool_cwl)
+        except job_errors as error:
+            failures += 1
+            print(f"{job_path}: {error}")
+            continue
+
+        if command_line == cwltool_command_line:
+            print(f"{job_path}: same as cwltool")
+        else:
+            failures += 1
+            print(f"{job_path}: differs from cwltool\n  rendered: {command_line}\n  cwltool:  {cwltool_command_line}")
+
+    if failures:
+        sys.exit(1)
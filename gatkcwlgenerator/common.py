@@ -3,15 +3,225 @@ A collection of helper functions
 """
 
 
+import copy
 import functools
-import pkg_resources
+import json
+import re
+from collections import namedtuple
+from typing import *
+
+try:
+    # orjson is optional, but decodes the GATK documentation several times faster
+    import orjson
+except ImportError:
+    orjson = None
+
+
+# Matches GATK version numbers, e.g. "3.5-0", "4.0.6.0" or "4.beta.6"
+_VERSION_REGEX = re.compile(r"""
+    ^(?P<release>\d+(?:\.\d+)*)
+    (?:[.-]?(?P<pre>alpha|beta|rc|a|b)[.-]?(?P<pre_number>\d+)?)?
+    (?:-(?P<post>\d+))?$
+""", re.VERBOSE | re.IGNORECASE)
+
+_PRE_RELEASE_ORDER = {
+    "a": 0,
+    "alpha": 0,
+    "b": 1,
+    "beta": 1,
+    "rc": 2
+}
+
+# Splits a version that isn't in the format above (e.g. "3.8-1-0-gf15c1c3ef" or "nightly-2018-06-01")
+# into its numbers and words, like the legacy versions of pkg_resources
+_LEGACY_VERSION_PART_REGEX = re.compile(r"(\d+|[a-z]+|\.|-)")
+
+
+# Fields that can contain "$(" without it being an expression
+_NON_EXPRESSION_FIELDS = {"doc", "label", "expressionLib"}
+
+_BRACKETS = {"(": ")", "{": "}", "[": "]"}
+
+# Matches a CWL parameter reference, e.g. "$(inputs['output-filename'])", which is evaluated without JavaScript
+_PARAMETER_REFERENCE_REGEX = re.compile(r"""^\$\(\w+(\.\w+|\['([^'\\]|\\.)*'\]|\["([^"\\]|\\.)*"\]|\[\d+\])*\)$""")
+
+# An expression and where it appears in a CWL file, e.g. "inputs/annotation/inputBinding/valueFrom"
+Expression = namedtuple("Expression", ["location", "source"])
+
+
+def parse_version(version_str: str) -> Tuple:
+    """
+    Parse a GATK version number into a tuple that sorts in release order.
+
+    Trailing zeros in the release number are ignored (so "4" == "4.0.0"),
+    pre-releases sort before their release ("4.beta.6" < "4.0.0.0") and a
+    "-N" suffix sorts after it ("3.8" < "3.8-0"). Other versions (e.g. "3.8-1-0-gf15c1c3ef"
+    or nightly builds) sort before all of these, in the order of their numbers and words.
+    """
+    match = _VERSION_REGEX.match(version_str.strip())
+    if match is None:
+        return ((), (0, _get_legacy_parts(version_str)), -1)
+
+    release = [int(part) for part in match.group("release").split(".")]
+    while len(release) > 1 and release[-1] == 0:
+        release.pop()
+
+    if match.group("pre") is None:
+        pre_release: Tuple = (1,)
+    else:
+        pre_release = (0, _PRE_RELEASE_ORDER[match.group("pre").lower()], int(match.group("pre_number") or 0))
+
+    post_release = -1 if match.group("post") is None else int(match.group("post"))
+
+    return (tuple(release), pre_release, post_release)
+
+
+def _get_legacy_parts(version_str: str) -> Tuple[str, ...]:
+    parts = []
+
+    for part in _LEGACY_VERSION_PART_REGEX.split(version_str.strip().lower()):
+        if part and part != ".":
+            # Numbers are padded so that they sort as numbers, and before words
+            parts.append(part.zfill(8) if part.isdigit() else "*" + part)
+
+    return tuple(parts)
+
+
+def loads_json(data: Union[bytes, str]) -> Any:
+    """
+    Decode JSON, using orjson if it is installed. Raises a ValueError if the JSON is invalid.
+    """
+    if orjson is not None:
+        return orjson.loads(data)
+    else:
+        return json.loads(data)
+
+
+def find_closing_bracket(text: str, start: int) -> Optional[int]:
+    """
+    Return the index of the bracket closing the one at text[start], skipping over JavaScript strings.
+    """
+    closing_brackets = []
+    i = start
+
+    while i < len(text):
+        char = text[i]
+
+        if char in "'\"":
+            i += 1
+            while i < len(text) and text[i] != char:
+                i += 2 if text[i] == "\\" else 1
+        elif char in _BRACKETS:
+            closing_brackets.append(_BRACKETS[char])
+        elif char in _BRACKETS.values():
+            if char != closing_brackets.pop():
+                return None
+            if not closing_brackets:
+                return i
+
+        i += 1
+
+    return None
+
+def scan_expressions(text: str) -> List[str]:
+    """
+    Return the parameter references and expressions ("$(...)" and "${...}") in a CWL string.
+    An unterminated expression is returned as the rest of the string.
+    """
+    expressions = []
+    i = 0
+
+    while i < len(text) - 1:
+        if text[i] == "\\":
+            i += 2
+        elif text[i] == "$" and text[i + 1] in "({":
+            end = find_closing_bracket(text, i + 1)
+            if end is None:
+                expressions.append(text[i:])
+                break
+
+            expressions.append(text[i:end + 1])
+            i = end + 1
+        else:
+            i += 1
+
+    return expressions
+
+def get_expressions(cwl_object: Any, location: str = "") -> List[Expression]:
+    """
+    Return the expressions in a CWL document.
+    """
+    expressions = []
+
+    if isinstance(cwl_object, str):
+        expressions.extend(Expression(location, source) for source in scan_expressions(cwl_object))
+    elif isinstance(cwl_object, dict):
+        for key, value in cwl_object.items():
+            if key not in _NON_EXPRESSION_FIELDS:
+                expressions.extend(get_expressions(value, f"{location}/{key}" if location else key))
+    elif isinstance(cwl_object, list):
+        for i, value in enumerate(cwl_object):
+            # Use the ids of inputs and outputs as their locations
+            name = value.get("id", i) if isinstance(value, dict) else i
+            expressions.extend(get_expressions(value, f"{location}/{name}"))
+
+    return expressions
+
+def is_parameter_reference(source: str) -> bool:
+    """
+    Return whether an expression (from scan_expressions) is a parameter reference, rather than JavaScript.
+    """
+    return _PARAMETER_REFERENCE_REGEX.match(source) is not None
+
+
+def _immutable(self, *args, **kwargs):
+    raise TypeError(f"'{type(self).__name__}' object can't be modified")
+
+class FrozenDict(dict):
+    """
+    A dictionary that can't be modified, for the parts of the CWL that are shared between arguments and tools.
+    Copies of it (e.g. {**frozen_dict} or copy.deepcopy(frozen_dict)) are ordinary dictionaries.
+    """
+    __setitem__ = __delitem__ = __ior__ = clear = pop = popitem = setdefault = update = _immutable
+
+    def __copy__(self) -> Dict:
+        return dict(self)
+
+    def __deepcopy__(self, memo: Dict) -> Dict:
+        return {key: copy.deepcopy(value, memo) for key, value in self.items()}
+
+class FrozenList(list):
+    """
+    A list that can't be modified, like FrozenDict. Copies of it (e.g. frozen_list + []) are ordinary lists.
+    """
+    __setitem__ = __delitem__ = __iadd__ = __imul__ = append = clear = extend = insert = pop = remove = reverse = sort = \
+        _immutable
+
+    def __copy__(self) -> List:
+        return list(self)
+
+    def __deepcopy__(self, memo: Dict) -> List:
+        return [copy.deepcopy(item, memo) for item in self]
+
+def freeze(value: Any) -> Any:
+    """
+    Return a JSON value with its dictionaries and lists (recursively) replaced by a FrozenDict and FrozenList.
+    """
+    if isinstance(value, (FrozenDict, FrozenList)):
+        return value
+    elif isinstance(value, dict):
+        return FrozenDict((key, freeze(item)) for key, item in value.items())
+    elif isinstance(value, list):
+        return FrozenList(freeze(item) for item in value)
+
+    return value
 
 
 @functools.total_ordering
 class GATKVersion:
     def __init__(self, version_str: str) -> None:
         self._version_str = version_str
-        self._version = pkg_resources.parse_version(version_str)
+        self._version = parse_version(version_str)
 
     def is_4(self) -> bool:
         return self._version_str.startswith("4")
@@ -21,7 +231,7 @@ class GATKVersion:
 
     @property
     def as_version(self):
-        """The GATK version number as a pkg_resources Version."""
+        """The GATK version number as a comparable tuple (see parse_version)."""
         return self._version
 
     def __lt__(self, other):
@@ -34,5 +244,8 @@ class GATKVersion:
             return NotImplemented
         return self.as_version == other.as_version
 
+    def __hash__(self):
+        return hash(self.as_version)
+
     def __str__(self) -> str:
         return self._version_str
@@ -0,0 +1,183 @@
+"""
+A store for the documentation of many GATK versions at once, which shares what they have in common.
+
+The documentation of a tool is mostly the same from one version to the next, and the arguments added
+to every tool (the read filters and CommandLineGATK) are the same for every tool. A GATKCorpus
+interns the strings of the documentation, and keeps one read-only record for each distinct argument,
+option list or other object, however many tools and versions it appears in. The large texts (e.g. the
+description of a tool, or the fulltext of an argument) are kept compressed, and only decompressed
+when they are read.
+
+The records are mappings rather than dictionaries, so the documentation of a tool added to a corpus
+must not be modified, like the shared values of the overrides.
+"""
+
+import hashlib
+import zlib
+from collections.abc import Mapping
+from typing import *
+
+from .GATK_classes import *
+
+# Strings at least this long are kept compressed, and decompressed when they are read
+LARGE_TEXT_LENGTH = 512
+
+
+class _LazyText:
+    __slots__ = ("compressed",)
+
+    def __init__(self, compressed: bytes) -> None:
+        self.compressed = compressed
+
+    def load(self) -> str:
+        return zlib.decompress(self.compressed).decode()
+
+
+class CorpusRecord(Mapping):
+    """
+    A read-only JSON object of a corpus. Records with the same keys share their shape (the index of each key).
+    """
+    __slots__ = ("_shape", "_values")
+
+    def __init__(self, shape: Dict[str, int], values: Tuple) -> None:
+        self._shape = shape
+        self._values = values
+
+    def __getitem__(self, key: str) -> Any:
+        value = self._values[self._shape[key]]
+
+        if isinstance(value, _LazyText):
+            return value.load()
+
+        return value
+
+    def __iter__(self) -> Iterator[str]:
+        return iter(self._shape)
+
+    def __len__(self) -> int:
+        return len(self._shape)
+
+    def __contains__(self, key: object) -> bool:
+        return key in self._shape
+
+    def __eq__(self, other: object) -> bool:
+        # Equal records of the same corpus are the same object
+        if self is other:
+            return True
+
+        return super().__eq__(other)
+
+    __hash__ = None  # type: ignore
+
+    def __repr__(self) -> str:
+        return f"CorpusRecord({dict(self)!r})"
+
+
+class _CorpusGATKTool(GATKTool):
+    """
+    A tool whose documentation is in a corpus. Its JSON documentation is kept compressed.
+    """
+    def __init__(
+            self,
+            original_dict: CorpusRecord,
+            additional_arguments: List[CorpusRecord],
+            raw_json: _LazyText,
+            url: Optional[str]
+        ) -> None:
+        super().__init__(original_dict, additional_arguments, url=url)
+        self._compressed_raw_json = raw_json
+
+    @property
+    def raw_json(self) -> bytes:
+        return zlib.decompress(self._compressed_raw_json.compressed)
+
+
+class GATKCorpus:
+    """
+    The shared documentation of any number of tools and GATK versions.
+    """
+    def __init__(self) -> None:
+        self._strings: Dict[str, str] = {}
+        # The large texts by digest, so that they are only compressed the first time
+        self._texts: Dict[bytes, _LazyText] = {}
+        self._shapes: Dict[Tuple[str, ...], Dict[str, int]] = {}
+        self._objects: Dict[Tuple, Any] = {}
+        self._tool_records: Dict[_LazyText, CorpusRecord] = {}
+
+    def intern(self, string: str) -> str:
+        return self._strings.setdefault(string, string)
+
+    def _add_text(self, text: bytes) -> _LazyText:
+        digest = hashlib.blake2b(text, digest_size=16).digest()
+        lazy_text = self._texts.get(digest)
+
+        if lazy_text is None:
+            lazy_text = self._texts[digest] = _LazyText(zlib.compress(text))
+
+        return lazy_text
+
+    def add(self, value: Any) -> Any:
+        """
+        Return a decoded JSON value with its strings interned, and its objects and lists replaced by
+        the shared ones of the corpus. Objects become CorpusRecords, and lists must not be modified.
+        """
+        value_type = type(value)
+
+        if value_type is str:
+            if len(value) >= LARGE_TEXT_LENGTH:
+                return self._add_text(value.encode())
+
+            return self._strings.setdefault(value, value)
+        elif value_type is CorpusRecord or value_type is _LazyText:
+            return value
+        elif value_type is list:
+            items = [self.add(item) for item in value]
+
+            return self._objects.setdefault((list, *map(_get_identity, items)), items)
+        elif isinstance(value, Mapping):
+            keys = tuple(self._strings.setdefault(key, key) for key in value)
+            values = tuple(self.add(item) for item in value.values())
+
+            shape = self._shapes.get(keys)
+            if shape is None:
+                shape = self._shapes[keys] = {key: index for index, key in enumerate(keys)}
+
+            key = (id(shape), *map(_get_identity, values))
+            record = self._objects.get(key)
+            if record is None:
+                record = self._objects[key] = CorpusRecord(shape, values)
+
+            return record
+
+        # Numbers, booleans and null
+        return value
+
+    def add_arguments(self, arguments: List[Dict]) -> List[CorpusRecord]:
+        """
+        Return the shared list of the shared records of a list of arguments (e.g. the arguments added to every tool).
+        """
+        return self.add(arguments)
+
+    def add_tool(self, gatk_tool: GATKTool) -> GATKTool:
+        """
+        Return a tool with the same documentation and additional arguments as gatk_tool, in the corpus.
+        """
+        raw_json = self._add_text(gatk_tool.raw_json)
+
+        # Most tools are documented the same way in the next version, so their JSON isn't decoded again
+        original_dict = self._tool_records.get(raw_json)
+        if original_dict is None:
+            original_dict = self._tool_records[raw_json] = self.add(gatk_tool.original_dict)
+
+        return _CorpusGATKTool(original_dict, self.add_arguments(gatk_tool.additional_arguments), raw_json, gatk_tool.url)
+
+
+# The values that are shared by a corpus, so are the same if they are the same object
+_SHARED_TYPES = {str, list, CorpusRecord, _LazyText}
+
+def _get_identity(value: Any) -> Any:
+    if type(value) in _SHARED_TYPES:
+        return id(value)
+
+    # Numbers, booleans and null are compared with their type, so that e.g. True and 1 are different
+    return (type(value), value)
@@ -3,7 +3,6 @@ Classes to make an AST for CWL types
 """
 import abc
 from abc import abstractmethod
-import copy
 from typing import *
 
 
@@ -11,7 +10,7 @@ __all__ = [
     "CWLType", "CWLArrayType", "CWLUnionType", "CWLEnumType", "CWLOptionalType",
     "CWLBasicType", "CWLFileType", "CWLDirectoryType", "CWLStringType",
     "CWLIntType", "CWLLongType", "CWLFloatType", "CWLDoubleType",
-    "CWLBooleanType", "get_cwl_basic_type"
+    "CWLBooleanType", "get_cwl_basic_type", "parse_cwl_type"
 ]
 
 
@@ -130,9 +129,10 @@ class CWLEnumType(CWLType):
         self.symbols = symbols
 
     def get_cwl_object(self, expand_types=False):
+        # NOTE: the symbols are shared with this object rather than copied, so must not be modified
         return {
             "type": "enum",
-            "symbols": copy.deepcopy(self.symbols)
+            "symbols": self.symbols
         }
 
     def __repr__(self) -> str:
@@ -225,3 +225,35 @@ class CWLDoubleType(CWLBasicType):
 
 class CWLBooleanType(CWLBasicType):
     name = "boolean"
+
+
+def parse_cwl_type(type_str: str) -> CWLType:
+    """
+    Parse a CWL type written in CWL's shorthand, with unions separated by "|",
+    e.g. "File | File[] | Directory" or "string[]?".
+    """
+    items: List[CWLType] = []
+
+    for item_str in type_str.split("|"):
+        item_str = item_str.strip()
+
+        is_optional = item_str.endswith("?")
+        if is_optional:
+            item_str = item_str[:-1]
+
+        array_depth = 0
+        while item_str.endswith("[]"):
+            item_str = item_str[:-2]
+            array_depth += 1
+
+        cwl_type: CWLType = get_cwl_basic_type(item_str)
+
+        for _ in range(array_depth):
+            cwl_type = CWLArrayType(cwl_type)
+
+        items.append(CWLOptionalType(cwl_type) if is_optional else cwl_type)
+
+    if len(items) == 1:
+        return items[0]
+    else:
+        return CWLUnionType(*items)
@@ -0,0 +1,39 @@
+"""
+Dumping CWL dictionaries as YAML.
+
+The generated CWL shares objects between tools and arguments (e.g. the types of the
+tags inputs), so by default they are written out in full every time rather than as
+YAML anchors and aliases, which not all CWL tools handle.
+"""
+
+from typing import *
+
+from ruamel import yaml
+
+from .common import FrozenDict, FrozenList
+
+
+class _Dumper(yaml.RoundTripDumper):
+    pass
+
+# The shared parts of the CWL are frozen (see common.freeze), and written out like any other dictionary or list
+_Dumper.add_representer(FrozenDict, yaml.RoundTripDumper.yaml_representers[dict])
+_Dumper.add_representer(FrozenList, yaml.RoundTripDumper.yaml_representers[list])
+
+
+class _NoAliasesDumper(_Dumper):
+    def ignore_aliases(self, data) -> bool:
+        return True
+
+
+def dump_cwl(cwl_dict: Dict, stream: IO = None, yaml_anchors: bool = False) -> Optional[str]:
+    """
+    Dump a CWL dictionary as YAML to stream, or return it as a string if stream is None.
+
+    :param yaml_anchors: write objects that appear more than once as YAML anchors and aliases.
+    """
+    return yaml.round_trip_dump(
+        cwl_dict,
+        stream,
+        Dumper=_Dumper if yaml_anchors else _NoAliasesDumper
+    )
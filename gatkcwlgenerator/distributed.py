@@ -0,0 +1,518 @@
+"""
+Generating the files on several machines, through a shared queue of work units.
+
+The publish command splits the work into a unit per (variant of the options, GATK version, tool),
+and publishes the units to a queue. Any number of workers, on any number of machines that share
+the queue and the output directory, then claim units, convert the tools, and commit the files
+of each unit. Each file is replaced atomically, so that the output directory never contains partially
+written files, but the files of a unit are replaced one after the other: they are all in place once
+the unit is done in the queue. If a worker dies while committing a unit, the unit's lease expires
+and another worker generates it again, replacing all of its files.
+
+The queue is a directory (file://<DIR>, or just <DIR>) or an SQLite database (sqlite://<FILE>).
+Other backends can be added to WORK_QUEUE_BACKENDS.
+"""
+
+import abc
+import argparse
+import contextlib
+import json
+import logging
+import os
+import shlex
+import shutil
+import socket
+import sqlite3
+import tempfile
+import time
+import traceback
+import urllib.parse
+from abc import abstractmethod
+from collections import OrderedDict, namedtuple
+from typing import *
+
+from .common import GATKVersion
+from .corpus import GATKCorpus
+from .main import (DEFAULT_CACHE_LOCATION, GENERATION_FILE, CmdLineArguments, dump_generation_record, generate_tool,
+                   get_generation_record, get_version_context, parse_cmdline_arguments, setup_logging_and_cache,
+                   should_generate_file)
+
+_logger: logging.Logger = logging.getLogger("gatkcwlgenerator")
+
+# A tool to generate: the URL of its documentation, and the arguments of the generator (including --version and --out)
+WorkUnit = namedtuple("WorkUnit", ["unit_id", "tool_url", "args"])
+
+PENDING = "pending"
+CLAIMED = "claimed"
+DONE = "done"
+FAILED = "failed"
+
+STATES = [PENDING, CLAIMED, DONE, FAILED]
+
+# How long a worker can take over a unit before it's assumed to have died, and the unit is given to another worker
+DEFAULT_LEASE_SECONDS = 3600
+
+# How long an idle worker waits before looking for units again, with --wait
+POLL_SECONDS = 5
+
+
+def _unit_to_json(unit: WorkUnit) -> str:
+    return json.dumps(OrderedDict(unit._asdict()))
+
+def _unit_from_json(unit_json: str) -> WorkUnit:
+    return WorkUnit(**json.loads(unit_json))
+
+
+class WorkQueue(metaclass=abc.ABCMeta):
+    """
+    A queue of work units, shared by the workers. Each unit is claimed by one worker at a time.
+    Claimed units that aren't completed or failed within the lease are given to another worker.
+    """
+    @abstractmethod
+    def publish(self, units: List[WorkUnit]) -> int:
+        """
+        Add units to the queue, and return the number added. Units already in the queue are ignored,
+        except failed ones, which are retried.
+        """
+        pass
+
+    @abstractmethod
+    def claim(self, worker_id: str, lease_seconds: float = DEFAULT_LEASE_SECONDS) -> Optional[WorkUnit]:
+        """
+        Claim a pending unit, or return None if there are none.
+        """
+        pass
+
+    @abstractmethod
+    def complete(self, unit: WorkUnit) -> None:
+        pass
+
+    @abstractmethod
+    def fail(self, unit: WorkUnit, error: str) -> None:
+        pass
+
+    @abstractmethod
+    def counts(self) -> Dict[str, int]:
+        """
+        Return the number of units in each state.
+        """
+        pass
+
+
+class FilesystemWorkQueue(WorkQueue):
+    """
+    A queue in a directory, with a subdirectory per state containing a JSON file per unit.
+    Units move between the states by renaming their files, which is atomic, so only one
+    worker can claim a unit. The directory can be on a filesystem shared by several machines.
+    """
+    def __init__(self, queue_dir: str) -> None:
+        self._queue_dir = queue_dir
+
+        for state in STATES:
+            os.makedirs(os.path.join(queue_dir, state), exist_ok=True)
+
+    def _get_path(self, state: str, unit_id: str) -> str:
+        return os.path.join(self._queue_dir, state, urllib.parse.quote(unit_id, safe="") + ".json")
+
+    def _get_error_path(self, unit: WorkUnit) -> str:
+        return os.path.join(self._queue_dir, FAILED, urllib.parse.quote(unit.unit_id, safe="") + ".error")
+
+    def _move(self, unit: WorkUnit, from_state: str, to_state: str) -> bool:
+        try:
+            os.rename(self._get_path(from_state, unit.unit_id), self._get_path(to_state, unit.unit_id))
+        except FileNotFoundError:
+            # Another worker has moved it
+            return False
+
+        return True
+
+    def publish(self, units: List[WorkUnit]) -> int:
+        published = 0
+
+        for unit in units:
+            if self._move(unit, FAILED, PENDING):
+                with contextlib.suppress(FileNotFoundError):
+                    os.remove(self._get_error_path(unit))
+                published += 1
+                continue
+
+            if any(os.path.exists(self._get_path(state, unit.unit_id)) for state in STATES):
+                continue
+
+            # Written to a temporary file first, so workers never see a partial unit
+            file_descriptor, temp_path = tempfile.mkstemp(dir=self._queue_dir, suffix=".tmp")
+            with os.fdopen(file_descriptor, "w") as unit_file:
+                unit_file.write(_unit_to_json(unit))
+            os.rename(temp_path, self._get_path(PENDING, unit.unit_id))
+
+            published += 1
+
+        return published
+
+    def _reclaim_expired(self, lease_seconds: float) -> None:
+        claimed_dir = os.path.join(self._queue_dir, CLAIMED)
+        expiry = time.time() - lease_seconds
+
+        for file_name in sorted(os.listdir(claimed_dir)):
+            try:
+                if os.path.getmtime(os.path.join(claimed_dir, file_name)) < expiry:
+                    os.rename(os.path.join(claimed_dir, file_name), os.path.join(self._queue_dir, PENDING, file_name))
+            except FileNotFoundError:
+                pass
+
+    def claim(self, worker_id: str, lease_seconds: float = DEFAULT_LEASE_SECONDS) -> Optional[WorkUnit]:
+        pending_dir = os.path.join(self._queue_dir, PENDING)
+
+        for attempt in range(2):
+            for file_name in sorted(os.listdir(pending_dir)):
+                pending_path = os.path.join(pending_dir, file_name)
+                claimed_path = os.path.join(self._queue_dir, CLAIMED, file_name)
+
+                try:
+                    # The modification time of a claimed unit is when it was claimed, for the lease
+                    os.utime(pending_path)
+                    os.rename(pending_path, claimed_path)
+                except FileNotFoundError:
+                    # Another worker has claimed it
+                    continue
+
+                with open(claimed_path) as unit_file:
+                    return _unit_from_json(unit_file.read())
+
+            if attempt == 0:
+                self._reclaim_expired(lease_seconds)
+
+        return None
+
+    def complete(self, unit: WorkUnit) -> None:
+        self._move(unit, CLAIMED, DONE)
+
+    def fail(self, unit: WorkUnit, error: str) -> None:
+        if self._move(unit, CLAIMED, FAILED):
+            with open(self._get_error_path(unit), "w") as error_file:
+                error_file.write(error)
+
+    def counts(self) -> Dict[str, int]:
+        return {
+            state: sum(1 for file_name in os.listdir(os.path.join(self._queue_dir, state)) if file_name.endswith(".json"))
+            for state in STATES
+        }
+
+
+class SQLiteWorkQueue(WorkQueue):
+    """
+    A queue in an SQLite database. The database must be on a local filesystem, or one
+    with working locks, so this is for workers on one machine.
+    """
+    def __init__(self, database_path: str) -> None:
+        self._database_path = database_path
+
+        with self._connect() as connection:
+            connection.execute("""
+                CREATE TABLE IF NOT EXISTS work_units (
+                    unit_id TEXT PRIMARY KEY,
+                    unit TEXT NOT NULL,
+                    state TEXT NOT NULL,
+                    worker TEXT,
+                    claimed_at REAL,
+                    error TEXT
+                )
+            """)
+
+    @contextlib.contextmanager
+    def _connect(self) -> Iterator[sqlite3.Connection]:
+        # Transactions are started explicitly, so that claims can take the write lock before reading
+        connection = sqlite3.connect(self._database_path, timeout=60, isolation_level=None)
+        try:
+            yield connection
+        except BaseException:
+            if connection.in_transaction:
+                connection.execute("ROLLBACK")
+            raise
+        finally:
+            connection.close()
+
+    def publish(self, units: List[WorkUnit]) -> int:
+        # Not an upsert (INSERT ... ON CONFLICT), which needs SQLite 3.24
+        with self._connect() as connection:
+            connection.execute("BEGIN IMMEDIATE")
+            retried = connection.executemany(
+                "UPDATE work_units SET state = ?, error = NULL WHERE unit_id = ? AND state = ?",
+                [(PENDING, unit.unit_id, FAILED) for unit in units]
+            ).rowcount
+            added = connection.executemany(
+                "INSERT OR IGNORE INTO work_units (unit_id, unit, state) VALUES (?, ?, ?)",
+                [(unit.unit_id, _unit_to_json(unit), PENDING) for unit in units]
+            ).rowcount
+            connection.execute("COMMIT")
+
+        return retried + added
+
+    def claim(self, worker_id: str, lease_seconds: float = DEFAULT_LEASE_SECONDS) -> Optional[WorkUnit]:
+        now = time.time()
+
+        with self._connect() as connection:
+            connection.execute("BEGIN IMMEDIATE")
+            row = connection.execute(
+                "SELECT unit_id, unit FROM work_units WHERE state = ? OR (state = ? AND claimed_at < ?) ORDER BY rowid LIMIT 1",
+                (PENDING, CLAIMED, now - lease_seconds)
+            ).fetchone()
+
+            if row is not None:
+                connection.execute(
+                    "UPDATE work_units SET state = ?, worker = ?, claimed_at = ? WHERE unit_id = ?",
+                    (CLAIMED, worker_id, now, row[0])
+                )
+            connection.execute("COMMIT")
+
+        return _unit_from_json(row[1]) if row is not None else None
+
+    def _set_state(self, unit: WorkUnit, state: str, error: str = None) -> None:
+        with self._connect() as connection:
+            connection.execute("UPDATE work_units SET state = ?, error = ? WHERE unit_id = ? AND state = ?",
+                (state, error, unit.unit_id, CLAIMED))
+
+    def complete(self, unit: WorkUnit) -> None:
+        self._set_state(unit, DONE)
+
+    def fail(self, unit: WorkUnit, error: str) -> None:
+        self._set_state(unit, FAILED, error)
+
+    def counts(self) -> Dict[str, int]:
+        with self._connect() as connection:
+            rows = connection.execute("SELECT state, COUNT(*) FROM work_units GROUP BY state").fetchall()
+
+        return {state: dict(rows).get(state, 0) for state in STATES}
+
+
+# The queue backends, by the scheme of the queue location
+WORK_QUEUE_BACKENDS: Dict[str, Callable[[str], WorkQueue]] = {
+    "file": FilesystemWorkQueue,
+    "sqlite": SQLiteWorkQueue
+}
+
+def open_work_queue(location: str) -> WorkQueue:
+    """
+    Open the queue at a location of the form <SCHEME>://<PATH>, or a directory.
+    """
+    scheme, separator, path = location.partition("://")
+    if not separator:
+        scheme, path = "file", location
+
+    try:
+        backend = WORK_QUEUE_BACKENDS[scheme]
+    except KeyError:
+        raise ValueError(f"Unknown work queue '{location}', the schemes are {', '.join(WORK_QUEUE_BACKENDS)}") from None
+
+    return backend(path)
+
+
+class StagedOutputWriter:
+    """
+    Writes the files of a work unit to a staging directory in the output directory, and moves them
+    into place when they are committed. Each file is replaced atomically, so that readers of the output
+    directory (and other workers) never see a partially written file. The files are replaced one after
+    the other, so a unit is only fully committed once commit returns.
+    """
+    def __init__(self, output_dir: str, yaml_anchors: bool = False) -> None:
+        self._output_dir = output_dir
+        self._yaml_anchors = yaml_anchors
+
+        # In the output directory, so that the files are moved on the same filesystem
+        os.makedirs(output_dir, exist_ok=True)
+        self._staging_dir = tempfile.mkdtemp(dir=output_dir, prefix=".staging-")
+
+        self._staged_paths: List[str] = []
+
+    def _stage(self, relative_path: str, content: bytes) -> None:
+        staged_path = os.path.join(self._staging_dir, relative_path.replace("/", "_"))
+
+        with open(staged_path, "wb") as staged_file:
+            staged_file.write(content)
+
+        self._staged_paths.append(relative_path)
+
+    def write_cwl_file(self, cwl_dict: Dict, tool_name: str) -> None:
+        from .cwl_yaml import dump_cwl
+
+        self._stage(f"cwl/{tool_name}.cwl", dump_cwl(cwl_dict, yaml_anchors=self._yaml_anchors).encode())
+
+    def write_job_template(self, job: Dict, name: str) -> None:
+        from .cwl_yaml import dump_cwl
+
+        self._stage(f"cwl/{name}.yml", dump_cwl(job).encode())
+
+    def write_gatk_json_file(self, gatk_json: bytes, tool_name: str) -> None:
+        self._stage(f"json/{tool_name}.json", gatk_json)
+
+    def write_generation_file(self, generation_record: Dict) -> None:
+        self._stage(GENERATION_FILE, dump_generation_record(generation_record).encode())
+
+    def commit(self) -> None:
+        for relative_path in self._staged_paths:
+            output_path = os.path.join(self._output_dir, relative_path)
+            _logger.info(f"Committing {output_path}")
+
+            os.makedirs(os.path.dirname(output_path), exist_ok=True)
+            os.replace(os.path.join(self._staging_dir, relative_path.replace("/", "_")), output_path)
+
+        self.discard()
+
+    def discard(self) -> None:
+        shutil.rmtree(self._staging_dir, ignore_errors=True)
+
+
+def get_work_units(variants: Dict[str, List[str]], versions: List[str], out_root: str, generator_args: List[str]) -> List[WorkUnit]:
+    """
+    Return a unit per tool, for each variant of the generator arguments and each GATK version.
+    The files for a variant and version are written to <OUT_ROOT>/<VARIANT>/<VERSION>/.
+    """
+    from .web_to_gatk_tool import get_gatk_links, get_tool_name
+
+    units = []
+
+    for version in versions:
+        gatk_version = GATKVersion(version)
+        gatk_links = get_gatk_links(gatk_version)
+
+        for variant_name, variant_args in variants.items():
+            args = generator_args + variant_args + [
+                "--version", version,
+                "--out", os.path.join(out_root, variant_name, version)
+            ]
+            cmd_line_options = parse_cmdline_arguments(args)
+
+            units.extend(
+                WorkUnit(f"{variant_name}/{version}/{get_tool_name(tool_url)}", tool_url, args)
+                for tool_url in gatk_links.tool_urls
+                if should_generate_file(tool_url, gatk_version, cmd_line_options.include)
+            )
+
+    return units
+
+def run_unit(unit: WorkUnit, version_contexts: Dict[Tuple, Any], corpus=None) -> None:
+    """
+    Generate the files of a unit, and commit them to the output directory.
+
+    :param corpus: a GATKCorpus to keep the documentation of the versions in
+    """
+    cmd_line_options = parse_cmdline_arguments(unit.args)
+
+    # The documentation of a version is only fetched once per worker, for each set of options
+    context_key = tuple(unit.args)
+    if context_key not in version_contexts:
+        version_contexts[context_key] = get_version_context(cmd_line_options, corpus)
+
+    output_writer = StagedOutputWriter(cmd_line_options.output_dir, cmd_line_options.yaml_anchors)
+    try:
+        # Every unit of a version writes the same record, so it's there whichever units are done
+        output_writer.write_generation_file(get_generation_record(cmd_line_options, version_contexts[context_key]))
+        generate_tool(unit.tool_url, version_contexts[context_key], cmd_line_options, output_writer)
+        output_writer.commit()
+    finally:
+        output_writer.discard()
+
+def run_worker(work_queue: WorkQueue, lease_seconds: float = DEFAULT_LEASE_SECONDS, wait: bool = False) -> Tuple[int, int]:
+    """
+    Claim and run units until the queue has no pending units (or, with wait, no claimed units either),
+    and return the number of units this worker completed and failed.
+    """
+    worker_id = f"{socket.gethostname()}:{os.getpid()}"
+    version_contexts: Dict[Tuple, Any] = {}
+    # The contexts of every version and variant are kept, so share the documentation they have in common
+    corpus = GATKCorpus()
+    completed = failed = 0
+
+    while True:
+        unit = work_queue.claim(worker_id, lease_seconds)
+
+        if unit is None:
+            if wait and work_queue.counts()[CLAIMED]:
+                # Units claimed by other workers are given back to the queue if they die
+                time.sleep(POLL_SECONDS)
+                continue
+            break
+
+        _logger.info(f"{worker_id} is generating {unit.unit_id}")
+
+        try:
+            run_unit(unit, version_contexts, corpus)
+        except Exception:
+            _logger.exception(f"Failed to generate {unit.unit_id}")
+            work_queue.fail(unit, traceback.format_exc())
+            failed += 1
+        else:
+            work_queue.complete(unit)
+            completed += 1
+
+    return completed, failed
+
+def _parse_variant(variant: str) -> Tuple[str, List[str]]:
+    name, separator, args = variant.partition("=")
+    if not separator or not name:
+        raise argparse.ArgumentTypeError(f"'{variant}' isn't of the form NAME=ARGS")
+
+    return name, shlex.split(args)
+
+def publish_main(args: List[str]) -> None:
+    """
+    Publish the work units for several GATK versions and variants of the options to a queue.
+
+    Any arguments not recognised here are passed on to the generator for each unit.
+    """
+    parser = argparse.ArgumentParser(prog="gatk_cwl_generator publish",
+        description="Splits the generation of the CWL files into a unit per tool, and publishes them to a queue for workers")
+    parser.add_argument("--queue", "-q", dest="queue", required=True,
+        help="The queue: a directory, file://<DIR> or sqlite://<FILE>")
+    parser.add_argument("--version", "-v", dest="versions", action="append", required=True,
+        help="A version of GATK to generate files for. Can be given multiple times.")
+    parser.add_argument("--variant", dest="variants", action="append", default=[], type=_parse_variant, metavar="NAME=ARGS",
+        help="A variant of the generator arguments, e.g. 'no_docker=--no_docker', whose files are written to " +
+        "<OUT_ROOT>/<NAME>/<VERSION>/. Can be given multiple times. Default is one variant, 'default', with no extra arguments.")
+    parser.add_argument("--out_root", dest="out_root", default=os.path.join(os.getcwd(), "gatk_cmdline_tools"),
+        help="The directory the workers write the files to, which they must all be able to reach at the same path. " +
+        "Default is ./gatk_cmdline_tools/")
+    parser.add_argument("--verbose", dest="verbose", action="store_true",
+        help="Set the logging to be verbose. Default is False.")
+    publish_options, generator_args = parser.parse_known_args(args)
+
+    setup_logging_and_cache(parse_cmdline_arguments(generator_args + (["--verbose"] if publish_options.verbose else [])))
+
+    variants = OrderedDict(publish_options.variants or [("default", [])])
+    units = get_work_units(variants, publish_options.versions, os.path.abspath(publish_options.out_root), generator_args)
+
+    work_queue = open_work_queue(publish_options.queue)
+    published = work_queue.publish(units)
+
+    print(f"Published {published} work units ({len(units) - published} were already in the queue)")
+
+def worker_main(args: List[str]) -> None:
+    """
+    Run a worker, which generates the files of the units in a queue.
+    """
+    parser = argparse.ArgumentParser(prog="gatk_cwl_generator worker",
+        description="Claims work units from a queue published with gatk_cwl_generator publish, and generates their files")
+    parser.add_argument("--queue", "-q", dest="queue", required=True,
+        help="The queue: a directory, file://<DIR> or sqlite://<FILE>")
+    parser.add_argument("--lease", dest="lease_seconds", type=float, default=DEFAULT_LEASE_SECONDS,
+        help="The number of seconds after which a unit claimed by a worker that hasn't finished it is given " +
+        f"to another worker. Default is {DEFAULT_LEASE_SECONDS}.")
+    parser.add_argument("--wait", dest="wait", action="store_true",
+        help="Don't stop until the units claimed by the other workers are done, in case they die. Default is False.")
+    parser.add_argument("--use_cache", dest="use_cache", nargs="?", const=DEFAULT_CACHE_LOCATION, metavar="CACHE_LOCATION",
+        help="Use requests_cache, using the cache at CACHE_LOCATION, or 'cache' if not specified. Default is False.")
+    parser.add_argument("--verbose", dest="verbose", action="store_true",
+        help="Set the logging to be verbose. Default is False.")
+    worker_options = parser.parse_args(args)
+
+    logging_options = CmdLineArguments(verbose=worker_options.verbose, use_cache=worker_options.use_cache)
+    setup_logging_and_cache(logging_options)
+
+    work_queue = open_work_queue(worker_options.queue)
+    completed, failed = run_worker(work_queue, worker_options.lease_seconds, worker_options.wait)
+
+    counts = work_queue.counts()
+    print(
+        f"Generated {completed} work units ({failed} failed). The queue has " +
+        ", ".join(f"{counts[state]} {state}" for state in STATES)
+    )
@@ -3,13 +3,14 @@ Functions to generate the CWL descriptions for GATK arguments.
 The main exported functions are get_output_json and get_input_objects
 """
 
-import copy
 import logging
+from collections import namedtuple
 from typing import *
 
 from .cwl_type_ast import *
-from .common import GATKVersion
+from .common import GATKVersion, freeze
 from .GATK_classes import *
+from .overrides import OverrideRegistry, get_overrides
 
 _logger = logging.getLogger("gatkcwlgenerator")
 
@@ -22,29 +23,29 @@ class UnknownGATKTypeError(Exception):
 def is_file_type(cwl_type: CWLType) -> bool:
     return cwl_type == CWLFileType()
 
+# You cannot get the enumeration information for an enumeration in a nested type, so they are hard coded here
+GATK_ENUM_TYPES = {
+    # Example: https://software.broadinstitute.org/gatk/gatkdocs/3.6-0/org_broadinstitute_gatk_tools_walkers_variantutils_ValidateVariants.php
+    "validationtype": ["ALL", "REF", "IDS", "ALLELES", "CHR_COUNTS"],
+    # Example: https://software.broadinstitute.org/gatk/gatkdocs/3.7-0/org_broadinstitute_gatk_tools_walkers_cancer_contamination_ContEst.php#--lane_level_contamination
+    "contaminationruntype": ['META', 'SAMPLE', 'READGROUP'],  # default is META
+    # Example: https://software.broadinstitute.org/gatk/documentation/tooldocs/current/org_broadinstitute_gatk_tools_walkers_coverage_DepthOfCoverage.php#--partitionType
+    "partition": ["readgroup", "sample", "library", "platform", "center",
+                  "sample_by_platform", "sample_by_center", "sample_by_platform_by_center"],
+    # NOTE: this actually refers to VariantContext.Type in the gatk 3 source code
+    "type": ['INDEL', 'SNP', 'MIXED', 'MNP', 'SYMBOLIC', 'NO_VARIATION'],
+    # from https://git.io/vNmFy
+    "sparkcollectors": ["CollectInsertSizeMetrics", "CollectQualityYieldMetrics"],
+    # from https://git.io/vNmAe
+    "metricaccumulationlevel": ["ALL_READS", "SAMPLE", "LIBRARY", "READ_GROUP"]
+}
+
 def GATK_type_to_CWL_type(gatk_type: str) -> CWLType:
     """
     Convert a GATK type to a CWL type.
     NOTE: No "hacks" or patching GATK types should be done in this function,
     do that in get_CWL_type_for_argument.
     """
-    # You cannot get the enumeration information for an enumeration in a nested type, so they are hard coded here
-    gatk_enum_types = {
-        # Example: https://software.broadinstitute.org/gatk/gatkdocs/3.6-0/org_broadinstitute_gatk_tools_walkers_variantutils_ValidateVariants.php
-        "validationtype": ["ALL", "REF", "IDS", "ALLELES", "CHR_COUNTS"],
-        # Example: https://software.broadinstitute.org/gatk/gatkdocs/3.7-0/org_broadinstitute_gatk_tools_walkers_cancer_contamination_ContEst.php#--lane_level_contamination
-        "contaminationruntype": ['META', 'SAMPLE', 'READGROUP'],  # default is META
-        # Example: https://software.broadinstitute.org/gatk/documentation/tooldocs/current/org_broadinstitute_gatk_tools_walkers_coverage_DepthOfCoverage.php#--partitionType
-        "partition": ["readgroup", "sample", "library", "platform", "center",
-                      "sample_by_platform", "sample_by_center", "sample_by_platform_by_center"],
-        # NOTE: this actually refers to VariantContext.Type in the gatk 3 source code
-        "type": ['INDEL', 'SNP', 'MIXED', 'MNP', 'SYMBOLIC', 'NO_VARIATION'],
-        # from https://git.io/vNmFy
-        "sparkcollectors": ["CollectInsertSizeMetrics", "CollectQualityYieldMetrics"],
-        # from https://git.io/vNmAe
-        "metricaccumulationlevel": ["ALL_READS", "SAMPLE", "LIBRARY", "READ_GROUP"]
-    }
-
     gatk_type = gatk_type.lower()
 
     if 'list[' in gatk_type or 'set[' in gatk_type:
@@ -63,8 +64,8 @@ def GATK_type_to_CWL_type(gatk_type: str) -> CWLType:
         return CWLIntType()
     elif gatk_type == "set":
         return CWLArrayType(CWLStringType())
-    elif gatk_type in gatk_enum_types.keys():
-        return CWLEnumType(gatk_enum_types[gatk_type])
+    elif gatk_type in GATK_ENUM_TYPES:
+        return CWLEnumType(GATK_ENUM_TYPES[gatk_type])
     elif gatk_type == "map[docoutputtype,printstream]":
         # This is used in DepthOfCoverage.out, gatk 3
         return CWLStringType()
@@ -84,24 +85,23 @@ def GATK_type_to_CWL_type(gatk_type: str) -> CWLType:
     else:
         raise UnknownGATKTypeError("Unknown GATK type: '" + gatk_type + "'")
 
-def get_CWL_type_for_argument(argument: GATKArgument, toolname: str, gatk_version: GATKVersion) -> CWLType:
-    cwl_type: CWLType
-    gatk_type = argument.type
+def get_CWL_type_for_argument(
+        argument: GATKArgument,
+        toolname: str,
+        gatk_version: GATKVersion,
+        overrides: OverrideRegistry = None,
+        javascript: bool = True
+    ) -> CWLType:
+    if overrides is None:
+        overrides = get_overrides()
 
-    if argument.name in ("input_file", "input"):
-        gatk_type = "List[File]"
+    override = overrides.lookup(toolname, argument.name, gatk_version, javascript)
 
-    if argument.name == "intervals":
-        # Enforce the GATK 3 type and fix https://github.com/broadinstitute/gatk/issues/4196
-        if toolname == "GenomicsDBImport" and gatk_version < GATKVersion("4.0.6.0"):
-            gatk_type = "IntervalBinding[Feature]"
-        else:
-            gatk_type = "List[IntervalBinding[Feature]]"
+    cwl_type: CWLType
+    gatk_type = override.get("gatk_type", argument.type)
 
-    if argument.name == "genomicsdb-workspace-path":
-        cwl_type = CWLDirectoryType()
-    elif toolname == "GenotypeGVCFs" and argument.name == "variant":
-        cwl_type = CWLUnionType(CWLFileType(), CWLArrayType(CWLFileType()), CWLDirectoryType())
+    if "cwl_type" in override:
+        cwl_type = parse_cwl_type(override["cwl_type"])
     elif argument.options:
         cwl_type = CWLEnumType([x['name'] for x in argument.options])
     else:
@@ -173,49 +173,57 @@ def get_depth_of_coverage_outputs():
                 "doc": f"The {output_suffix} generated file",
                 "type": "File?",
                 "outputBinding": {
-                    "glob": f"$(inputs.out + '{output_suffix}')"
+                    "glob": f"$(inputs.out){output_suffix}"
                 }
             })
 
     return outputs
 
 
-def gatk_argument_to_cwl(argument: GATKArgument, toolname: str, gatk_version: GATKVersion) -> Tuple[List[Dict], List[Dict]]:
+# Functions generating outputs that are too long to write out in the overrides
+OUTPUT_GENERATORS = {
+    "depth_of_coverage": get_depth_of_coverage_outputs
+}
+
+
+def gatk_argument_to_cwl(
+        argument: GATKArgument,
+        toolname: str,
+        gatk_version: GATKVersion,
+        overrides: OverrideRegistry = None,
+        javascript: bool = True
+    ) -> Tuple[List[Dict], List[Dict]]:
     """
     Return inputs and outputs for a given GATK argument, in the form (inputs, outputs).
+
+    :param javascript: whether the CWL can use JavaScript expressions (see --no_javascript)
     """
-    inputs = get_input_objects(argument, toolname, gatk_version)
+    if overrides is None:
+        overrides = get_overrides()
+
+    override = overrides.lookup(toolname, argument.name, gatk_version, javascript)
+
+    inputs = get_input_objects(argument, toolname, gatk_version, overrides, javascript)
 
-    # Special-case annotations, since they can only take certain values (see #14).
-    # NB: annotation-group is different, and the possible values are not documented anywhere.
-    if argument.name in ("annotation", "annotations-to-exclude"):
+    if "input_type" in override:
         assert len(inputs) == 1
-        inputs[0]["type"] = ["null", "annotation_type", "annotation_type[]"]
-        # In GATK 3, CombineGVCFs and GenotypeGVCFs allow the value "none" to remove the default annotations.
-        # This isn't allowed in any other tools or in GATK 4.
-        if gatk_version.is_3() and toolname in ("CombineGVCFs", "GenotypeGVCFs"):
-            inputs[0]["type"].append({"type": "enum", "symbols": ["none"]})
-
-    if toolname == "DepthOfCoverage" and argument.name == "out":
-        outputs = get_depth_of_coverage_outputs()
-    elif toolname == "RandomlySplitVariants" and argument.name == "prefixForAllOutputFileNames":
-        outputs = [{
-            "id": "splitToManyOutput",
-            "doc": "Output if --splitToManyFiles is true",
-            "type": "File[]?",
-            "outputBinding": {
-                "glob": "$(inputs.prefixForAllOutputFileNames + '.split.*.vcf')"
-            }
-        }]
-    elif toolname == "GenomicsDBImport" and argument.name == "genomicsdb-workspace-path":
-        outputs = [{
-            "id": "genomicsdb-workspace-path-out",
-            "doc": "Resulting GenomicsDB workspace (corresponding to the input genomicsdb-workspace-path).",
-            "type": "Directory",
-            "outputBinding": {
-                "glob": "$(inputs['genomicsdb-workspace-path'])"
-            }
-        }]
+        inputs[0]["type"] = override["input_type"] if javascript else \
+            get_prefixed_array_type(override["input_type"], argument.long_prefix)
+
+    if "runtime_default" in override:
+        # The argument is given by the tool's arguments instead, see get_runtime_default_argument
+        if javascript:
+            del inputs[0]["inputBinding"]
+            inputs[0]["doc"] = inputs[0]["doc"].rstrip(".") + ". " + RUNTIME_DEFAULTS[override["runtime_default"]].doc
+        else:
+            # The argument is always set from runtime, as choosing between it and an input needs JavaScript
+            inputs = []
+
+    if "outputs" in override:
+        if isinstance(override["outputs"], str):
+            outputs = OUTPUT_GENERATORS[override["outputs"]]()
+        else:
+            outputs = list(override["outputs"])
     elif argument.is_output_argument():
         outputs = [get_output_json(argument, gatk_version)]
     else:
@@ -223,12 +231,104 @@ def gatk_argument_to_cwl(argument: GATKArgument, toolname: str, gatk_version: GA
 
     return inputs, outputs
 
-def get_input_binding(argument, gatk_version: GATKVersion, cwl_type: CWLType) -> Dict:
+# A default from runtime that arguments can have: as a JavaScript expression, as the
+# value of a valueFrom without JavaScript, and its doc
+RuntimeDefault = namedtuple("RuntimeDefault", ["expression", "value", "doc"])
+
+# The defaults from runtime that arguments can have (see the "runtime_default" override property)
+RUNTIME_DEFAULTS = {
+    "cores": RuntimeDefault("runtime.cores", "$(runtime.cores)", "Default is the number of cores allocated to the job"),
+    "tmpdir": RuntimeDefault("runtime.tmpdir", "$(runtime.tmpdir)", "Default is the temporary directory allocated to the job"),
+    "local_cores": RuntimeDefault(
+        "'local[' + runtime.cores + ']'",
+        "local[$(runtime.cores)]",
+        "Default is local[<the number of cores allocated to the job>]"
+    )
+}
+
+def get_runtime_default_argument(
+        argument: GATKArgument,
+        gatk_version: GATKVersion,
+        runtime_default: str,
+        javascript: bool = True
+    ) -> Dict:
+    """
+    Return an entry of the tool's arguments that sets the argument to its input, or to a default
+    from runtime (one of RUNTIME_DEFAULTS, e.g. runtime.cores) if the input isn't given.
+    Without JavaScript, the argument is always set to the default.
+    """
+    input_argument_name = get_input_argument_name(argument, gatk_version)
+    default = RUNTIME_DEFAULTS[runtime_default]
+
+    if not javascript:
+        return {
+            "prefix": argument.long_prefix,
+            "valueFrom": default.value
+        }
+
+    return {
+        "prefix": argument.long_prefix,
+        "valueFrom": f"$(inputs['{input_argument_name}'] == null ? {default.expression} : inputs['{input_argument_name}'])"
+    }
+
+def get_prefixed_array_type(cwl_type: Union[str, List, Dict], prefix: str) -> Union[str, List, Dict]:
+    """
+    Return a CWL type object that only accepts arrays (and null), with the prefix given before each element.
+    Without JavaScript, this is the only way to give the prefix to every element of an array, so single
+    values are given as arrays of one element: the elements can be of any of the types in cwl_type.
+    """
+    cwl_types = cwl_type if isinstance(cwl_type, list) else [cwl_type]
+    item_types: List[Union[str, Dict]] = []
+    other_types: List[Union[str, Dict]] = []
+
+    for item in cwl_types:
+        if isinstance(item, str) and item.endswith("[]"):
+            item_types.append(item[:-2])
+        elif isinstance(item, dict) and item.get("type") == "array":
+            item_types.append(item["items"])
+        elif item != "null":
+            other_types.append(item)
+
+    if not item_types:
+        # Not an array type, so the prefix is given by the input's binding
+        return cwl_type
+
+    item_types.extend(item for item in other_types if item not in item_types)
+    prefixed_type = {
+        "type": "array",
+        "items": item_types if len(item_types) > 1 else item_types[0],
+        "inputBinding": {"prefix": prefix}
+    }
+
+    return ["null", prefixed_type] if "null" in cwl_types else prefixed_type
+
+def _get_union_members(cwl_type: CWLType) -> List[CWLType]:
+    if isinstance(cwl_type, CWLOptionalType):
+        return _get_union_members(cwl_type.inner_type)
+    elif isinstance(cwl_type, CWLUnionType):
+        return [member for item in cwl_type.items for member in _get_union_members(item)]
+
+    return [cwl_type]
+
+def get_input_binding(argument, gatk_version: GATKVersion, cwl_type: CWLType, javascript: bool = True) -> Dict:
     has_file_type = cwl_type.find_node(is_file_type) is not None
     has_array_type = cwl_type.find_node(lambda node: isinstance(node, CWLArrayType)) is not None
     has_boolean_type = cwl_type.find_node(lambda node: node == CWLBooleanType())
 
-    if gatk_version.is_4() and has_boolean_type:
+    if not javascript:
+        if gatk_version.is_4() and has_boolean_type:
+            # GATK 4 booleans are given as --<PREFIX>=true/false rather than as flags
+            return {
+                "valueFrom": f"{argument.long_prefix}=$(self)"
+            }
+        elif has_array_type:
+            # The prefix is given to each element of the array, see get_input_objects
+            return {}
+        else:
+            return {
+                "prefix": argument.long_prefix
+            }
+    elif gatk_version.is_4() and has_boolean_type:
         return {
             "prefix": argument.long_prefix,
             "valueFrom": f"$(generateGATK4BooleanValue())"
@@ -268,26 +368,60 @@ NON_ARRAY_TAGS_TAGS = CWLOptionalType(
     )
 )
 
-def get_input_objects(argument: GATKArgument, toolname: str, gatk_version: GATKVersion) -> List[Dict]:
+# The parts of the CWL below are the same for many arguments, so they are created once and shared
+# between the arguments (and tools) that use them, frozen so that they can't be modified.
+ARRAY_TAGS_CWL_TYPE = freeze(ARRAY_TAGS_TYPE.get_cwl_object())
+NON_ARRAY_TAGS_CWL_TYPE = freeze(NON_ARRAY_TAGS_TAGS.get_cwl_object())
+
+# NOTE: this is fixing the issue at https://github.com/common-workflow-language/cwltool/issues/593
+NULL_ARRAY_INPUT_BINDING = freeze({
+    "valueFrom": "$(null)"
+})
+
+def get_input_objects(
+        argument: GATKArgument,
+        toolname: str,
+        gatk_version: GATKVersion,
+        overrides: OverrideRegistry = None,
+        javascript: bool = True
+    ) -> List[Dict]:
     """
     Return a list of CWL input arguments for expressing the given GATK argument.
 
     :param argument: The CWL argument, as specified in the JSON file
+    :param javascript: Whether the CWL can use JavaScript expressions. If not, there is no
+        input for the tags, and array arguments only accept arrays.
 
     :returns: CWL objects to describe the given argument
     """
+    if overrides is None:
+        overrides = get_overrides()
 
-    cwl_type = get_CWL_type_for_argument(argument, toolname, gatk_version)
+    cwl_type = get_CWL_type_for_argument(argument, toolname, gatk_version, overrides, javascript)
 
     has_array_type = False
     has_file_type = cwl_type.find_node(is_file_type) is not None
 
     array_node: Optional[CWLArrayType] = cwl_type.find_node(lambda node: isinstance(node, CWLArrayType))
     if array_node is not None:
-        # NOTE: this is fixing the issue at https://github.com/common-workflow-language/cwltool/issues/593
-        array_node.add_input_binding({
-            "valueFrom": "$(null)"
-        })
+        if javascript:
+            array_node.add_input_binding(NULL_ARRAY_INPUT_BINDING)
+        else:
+            # Only an array can have the prefix before each element, so a single value is given as an array
+            # of one element, and the other members of the union (e.g. a GenomicsDB workspace's Directory)
+            # are types of the elements
+            item_types = _get_union_members(array_node.inner_type)
+            for member in _get_union_members(cwl_type):
+                if not isinstance(member, CWLArrayType) and all(
+                    member.get_cwl_object(True) != item_type.get_cwl_object(True) for item_type in item_types
+                ):
+                    item_types.append(member)
+
+            if len(item_types) > 1:
+                array_node.inner_type = CWLUnionType(*item_types)
+
+            array_node.add_input_binding({"prefix": argument.long_prefix})
+            cwl_type = CWLOptionalType(array_node) if isinstance(cwl_type, CWLOptionalType) else array_node
 
         has_array_type = True
 
@@ -295,28 +429,22 @@ def get_input_objects(argument: GATKArgument, toolname: str, gatk_version: GATKV
         "doc": argument.summary,
         "id": get_input_argument_name(argument, gatk_version),
         "type": cwl_type.get_cwl_object(),
-        "inputBinding": get_input_binding(argument, gatk_version, cwl_type)
+        "inputBinding": get_input_binding(argument, gatk_version, cwl_type, javascript)
     }
 
     # Provide a default output location for required output arguments
     if argument.has_default() and argument.is_output_argument() and argument.is_required():
         base_cwl_arg["default"] = argument.get_output_default_arg()
 
-    if argument.name == "reference_sequence" or argument.name == "reference":
-        base_cwl_arg["secondaryFiles"] = [".fai", "^.dict"]
-    elif argument.name == "input_file" or argument.name == "input":
-        base_cwl_arg["secondaryFiles"] = "$(self.basename + self.nameext.replace('m','i'))"
-
-    if has_file_type:
-        if has_array_type:
-            tags_type = ARRAY_TAGS_TYPE.get_cwl_object()
-        else:
-            tags_type = NON_ARRAY_TAGS_TAGS.get_cwl_object()
+    secondary_files = overrides.lookup(toolname, argument.name, gatk_version, javascript).get("secondary_files")
+    if secondary_files:
+        base_cwl_arg["secondaryFiles"] = secondary_files
 
+    if has_file_type and javascript:
         tag_argument = {
             "doc": "A argument to set the tags of '{}'".format(argument.name),
             "id": argument.name + "_tags",
-            "type": copy.deepcopy(tags_type)
+            "type": ARRAY_TAGS_CWL_TYPE if has_array_type else NON_ARRAY_TAGS_CWL_TYPE
         }
 
         return [base_cwl_arg, tag_argument]
@@ -2,32 +2,23 @@
 GATKTool -> CWL Dict
 """
 
+import functools
 import os
 import logging
+import re
 from typing import *
 
 from ruamel.yaml.scalarstring import PreservedScalarString
 
-from .gatk_argument_to_cwl import gatk_argument_to_cwl
-from .common import GATKVersion
+from .gatk_argument_to_cwl import gatk_argument_to_cwl, get_input_argument_name, get_runtime_default_argument
+from .common import GATKVersion, freeze, get_expressions, is_parameter_reference
 from .GATK_classes import *
+from .overrides import get_overrides
 
 _logger = logging.getLogger("gatkcwlgenerator")
 
-INVALID_ARGS = [
-    "help",
-    "defaultBaseQualities",
-    "analysis_type"  # this is hard coded into the baseCommand for each tool
-]
-
-# This indicates GATK modules that require extra undocumented output arguments in GATK 3.
-# These haven't been ported to GATK 4, but when they are, the patched arguments need to be updated.
-SPECIAL_GATK3_MODULES = [
-    "DepthOfCoverage",
-    "RandomlySplitVariants"
-]
-
 
+@functools.lru_cache(maxsize=None)
 def get_js_library() -> str:
     js_library_path = os.path.join(
         os.path.dirname(__file__),
@@ -38,18 +29,368 @@ def get_js_library() -> str:
         return file.read()
 
 
-JS_LIBRARY = get_js_library()
+# Inputs to tune the JVM, when GATK is run with java. These are shared between tools, so are frozen.
+JVM_INPUTS = freeze([
+    {
+        "doc": "The maximum size of the Java heap in MiB (-Xmx). Default is 80% of the memory allocated to the job",
+        "id": "java_heap_size",
+        "type": "int?"
+    },
+    {
+        "doc": "The number of threads of the parallel garbage collector (-XX:ParallelGCThreads). " +
+            "Default is the number of cores allocated to the job",
+        "id": "java_gc_threads",
+        "type": "int?"
+    },
+    {
+        "doc": "Other options for the JVM, e.g. -XX:+UseSerialGC",
+        "id": "java_options",
+        "type": "string[]?",
+        "inputBinding": {
+            "position": -2
+        }
+    }
+])
+
+# The JVM options come before the rest of the GATK command, which comes before the GATK arguments (at position 0)
+JVM_ARGUMENTS = freeze([
+    {
+        "position": -3,
+        "valueFrom": "$('-Xmx' + (inputs.java_heap_size == null ? Math.floor(runtime.ram * 0.8) : inputs.java_heap_size) + 'm')"
+    },
+    {
+        "position": -3,
+        "valueFrom": "$('-XX:ParallelGCThreads=' + (inputs.java_gc_threads == null ? runtime.cores : inputs.java_gc_threads))"
+    },
+    {
+        "position": -3,
+        "valueFrom": "-Djava.io.tmpdir=$(runtime.tmpdir)"
+    }
+])
+
+# Without JavaScript, the JVM options default to the runtime values in the tool's arguments, and are
+# overridden by the inputs, which come after them (the JVM uses the last value of an option).
+# The heap size defaults to all the memory allocated to the job, as 80% of it would need JavaScript.
+JVM_INPUTS_WITHOUT_JAVASCRIPT = freeze([
+    {
+        "doc": "The maximum size of the Java heap in MiB (-Xmx). Default is the memory allocated to the job",
+        "id": "java_heap_size",
+        "type": "int?",
+        "inputBinding": {
+            "position": -3,
+            "valueFrom": "-Xmx$(self)m"
+        }
+    },
+    {
+        "doc": "The number of threads of the parallel garbage collector (-XX:ParallelGCThreads). " +
+            "Default is the number of cores allocated to the job",
+        "id": "java_gc_threads",
+        "type": "int?",
+        "inputBinding": {
+            "position": -3,
+            "valueFrom": "-XX:ParallelGCThreads=$(self)"
+        }
+    },
+    JVM_INPUTS[2]
+])
+
+JVM_ARGUMENTS_WITHOUT_JAVASCRIPT = freeze([
+    {
+        "position": -3,
+        "valueFrom": "-Xmx$(runtime.ram)m"
+    },
+    {
+        "position": -3,
+        "valueFrom": "-XX:ParallelGCThreads=$(runtime.cores)"
+    },
+    JVM_ARGUMENTS[2]
+])
+
+def _get_spark_conf_input(input_id: str, input_type: str, spark_property: str, doc: str) -> Dict:
+    return {
+        "doc": f"{doc} ({spark_property})",
+        "id": input_id,
+        "type": input_type,
+        "inputBinding": {
+            "prefix": "--conf",
+            "valueFrom": f"{spark_property}=$(self)"
+        }
+    }
+
+# Typed inputs for the Spark properties of Spark tools, which are given to GATK with --conf.
+# These are shared between tools, so are frozen.
+SPARK_INPUTS = freeze([
+    _get_spark_conf_input("spark_executor_memory", "string?", "spark.executor.memory", "The memory of each Spark executor, e.g. 4g"),
+    _get_spark_conf_input("spark_executor_cores", "int?", "spark.executor.cores", "The number of cores of each Spark executor"),
+    _get_spark_conf_input("spark_default_parallelism", "int?", "spark.default.parallelism", "The default number of Spark partitions"),
+    {
+        "doc": "The directory for Spark's scratch files (spark.local.dir). Default is the temporary directory allocated to the job",
+        "id": "spark_local_dir",
+        "type": "string?"
+    }
+])
+
+SPARK_ARGUMENTS = freeze([
+    {
+        "prefix": "--conf",
+        "valueFrom": "$('spark.local.dir=' + (inputs.spark_local_dir == null ? runtime.tmpdir : inputs.spark_local_dir))"
+    }
+])
+
+# As for the JVM options, the spark_local_dir input comes after the default in the tool's arguments (GATK uses the last value)
+SPARK_INPUTS_WITHOUT_JAVASCRIPT = freeze(SPARK_INPUTS[:3] + [
+    {
+        **SPARK_INPUTS[3],
+        "inputBinding": {
+            "prefix": "--conf",
+            "valueFrom": "spark.local.dir=$(self)"
+        }
+    }
+])
+
+SPARK_ARGUMENTS_WITHOUT_JAVASCRIPT = freeze([
+    {
+        "prefix": "--conf",
+        "valueFrom": "spark.local.dir=$(runtime.tmpdir)"
+    }
+])
+
+def is_spark_tool(gatk_tool: GATKTool) -> bool:
+    return any(argument.name == "spark-master" for argument in gatk_tool.arguments)
+
+def get_jvm_arguments(command_arguments: List[str], javascript: bool = True) -> List[Dict]:
+    """
+    Return the tool's arguments for running GATK with java, with the JVM tuned by JVM_INPUTS.
+
+    :param command_arguments: The rest of the GATK command after "java", e.g. ["-jar", "/gatk/gatk.jar", "HaplotypeCaller"]
+    """
+    return (JVM_ARGUMENTS if javascript else JVM_ARGUMENTS_WITHOUT_JAVASCRIPT) + [
+        {
+            "position": -1,
+            "valueFrom": command_argument
+        }
+        for command_argument in command_arguments
+    ]
+
+# The secondary files of the outputs of tools that can create an index or MD5 of their outputs.
+# Without JavaScript, they can't depend on the create-output-* inputs, but the ones that aren't created are left out.
+BAM_OUTPUT_SECONDARY_FILES = freeze([".bai", ".crai", ".md5"])
+VCF_OUTPUT_SECONDARY_FILES = freeze([".idx", ".tbi", ".md5"])
 
+# The index files of each kind of input file, which are staged with the input (when they exist) with CWL v1.1 or later,
+# so that GATK doesn't index the input in every job, or fail without its index
+INDEX_SECONDARY_FILES = freeze({
+    "reference": [".fai", "^.dict"],
+    "reads": [".bai", "^.bai", ".crai", "^.crai"],
+    "variants": [".tbi", ".idx"],
+    "features": [".tbi", ".idx"]
+})
 
-def gatk_tool_to_cwl(gatk_tool: GATKTool, cmd_line_options, annotation_names: List[str]) -> Dict:
+def get_indexed_input_kind(argument: GATKArgument, argument_override: Dict) -> Optional[str]:
+    """
+    Return the kind of indexed file (a key of INDEX_SECONDARY_FILES) that an input argument is, from its
+    "input_kind" override property, or else from its GATK type and summary, or None if it isn't one.
+    """
+    if argument_override.get("input_kind") in INDEX_SECONDARY_FILES:
+        return argument_override["input_kind"]
+
+    if argument.is_output_argument():
+        return None
+
+    if "VariantContext" in argument.type:
+        return "variants"
+    elif "FeatureInput" in argument.type or "RodBinding" in argument.type:
+        # e.g. BED files, which are indexed like VCFs
+        return "features"
+    elif re.search(r"\b(BAM|CRAM)\b", argument.summary):
+        return "reads"
+    elif re.search(r"\bVCF\b", argument.summary):
+        return "variants"
+
+    return None
+
+def get_index_secondary_files_cwl(argument_inputs: List[Dict], kind: str) -> List[Dict]:
+    """
+    Return the inputs of an argument, with the index files of its File input as optional secondaryFiles (CWL v1.1 or later).
+    """
+    if not argument_inputs or not _has_type(argument_inputs[0]["type"], "File"):
+        return argument_inputs
+
+    # The input objects can be shared with other arguments, so are copied rather than modified
+    return [
+        {
+            **argument_inputs[0],
+            "secondaryFiles": [{"pattern": pattern, "required": False} for pattern in INDEX_SECONDARY_FILES[kind]]
+        }
+    ] + argument_inputs[1:]
+
+def get_sizing_expression(formula: Dict[str, float], input_names_by_kind: Dict[str, List[str]]) -> Union[int, str]:
+    """
+    Return the value of a ResourceRequirement field computed from the sizes of the inputs
+    (see the "sizing" override property), as an expression if it depends on any inputs.
+    """
+    terms = []
+
+    for kind, coefficient in formula.items():
+        if kind != "base" and coefficient and kind in input_names_by_kind:
+            kind_inputs = ", ".join(f"inputs['{input_name}']" for input_name in input_names_by_kind[kind])
+            terms.append(f"{coefficient} * inputSizeMiB([{kind_inputs}])")
+
+    if not terms:
+        return formula.get("base", 0)
+
+    return f"$(Math.ceil({' + '.join([str(formula.get('base', 0))] + terms)}))"
+
+
+def _has_type(cwl_type: Any, type_name: str) -> bool:
+    if isinstance(cwl_type, str):
+        return cwl_type.rstrip("?[]") == type_name
+    elif isinstance(cwl_type, list):
+        return any(_has_type(item, type_name) for item in cwl_type)
+    elif isinstance(cwl_type, dict):
+        return _has_type(cwl_type.get("items"), type_name) or \
+            any(_has_type(field["type"], type_name) for field in cwl_type.get("fields", []))
+
+    return False
+
+def has_directory_type(cwl_type: Any) -> bool:
+    """
+    Return whether a CWL type object (e.g. "Directory[]?" or ["null", {"type": "array", ...}]) can hold a Directory.
+    """
+    return _has_type(cwl_type, "Directory")
+
+def get_streamable_cwl(argument_inputs: List[Dict], argument_outputs: List[Dict]) -> Tuple[List[Dict], List[Dict]]:
+    """
+    Return the inputs and outputs of an argument, with its File input or output marked as streamable,
+    for an argument the tool reads or writes sequentially (see the "streamable" override property).
+    """
+    # The input and output objects can be shared with other arguments, so are copied rather than modified
+    if argument_inputs and _has_type(argument_inputs[0]["type"], "File"):
+        argument_inputs = [{**argument_inputs[0], "streamable": True}] + argument_inputs[1:]
+
+    if argument_outputs and _has_type(argument_outputs[0]["type"], "File"):
+        argument_outputs = [{**argument_outputs[0], "streamable": True}] + argument_outputs[1:]
+
+    return argument_inputs, argument_outputs
+
+def _is_optional_type(cwl_type: Any) -> bool:
+    return isinstance(cwl_type, list) and "null" in cwl_type or \
+        isinstance(cwl_type, str) and cwl_type.endswith("?")
+
+def get_inplace_update_cwl(input_id: str, cwl_input: Dict) -> Tuple[Dict, Dict, Dict]:
+    """
+    Return the input, the InitialWorkDirRequirement listing entry and the output for an argument
+    that is a Directory updated in place by the tool (with CWL v1.1 or later), e.g. an existing GenomicsDB workspace.
+    """
+    is_optional = _is_optional_type(cwl_input["type"])
+
+    return (
+        {**cwl_input, "type": "Directory?" if is_optional else "Directory"},
+        {
+            "entry": f"$(inputs['{input_id}'])",
+            "writable": True
+        },
+        {
+            "id": input_id + "-out",
+            "doc": f"The updated directory (corresponding to the input {input_id})",
+            "type": "Directory?" if is_optional else "Directory",
+            "outputBinding": {
+                "glob": f"$(inputs['{input_id}'] ? inputs['{input_id}'].basename : [])"
+            }
+        }
+    )
+
+def get_created_directory_cwl(cwl_input: Dict, cwl_outputs: List[Dict]) -> Tuple[Dict, List[Dict]]:
+    """
+    Return the input and outputs of an argument that names a Directory created by the tool (with CWL v1.1 or later),
+    e.g. a new GenomicsDB workspace. The input is the name of the directory, and its output is optional,
+    as the tool doesn't always create it (e.g. in an incremental import).
+    """
+    return (
+        {**cwl_input, "type": "string?" if _is_optional_type(cwl_input["type"]) else "string"},
+        [
+            {**cwl_output, "type": "Directory?"} if cwl_output["type"] == "Directory" else cwl_output
+            for cwl_output in cwl_outputs
+        ]
+    )
+
+def is_engine_argument(
+        argument: GATKArgument,
+        argument_override: Dict,
+        argument_inputs: List[Dict],
+        own_argument_names: Set[str]
+    ) -> bool:
+    """
+    Return whether an argument is one of the rarely used engine arguments, which are grouped into
+    the engine_arguments input with --group_engine_arguments. These are the arguments added to every
+    tool and the GATK 4 "common" arguments, unless the "engine_argument" override property says otherwise.
+    """
+    if "engine_argument" in argument_override:
+        is_engine = argument_override["engine_argument"]
+    else:
+        is_engine = argument.long_prefix not in own_argument_names or getattr(argument.dict, "kind", None) == "common"
+
+    # Only arguments with one optional input bound to the command line are grouped (not files, which have tags, or outputs)
+    return (
+        is_engine
+        and not argument.is_required()
+        and not argument.is_output_argument()
+        and len(argument_inputs) == 1
+        and "inputBinding" in argument_inputs[0]
+    )
+
+def get_engine_arguments_input(engine_inputs: List[Dict]) -> Dict:
+    """
+    Return an optional record input, whose fields are the given inputs.
+    """
+    return {
+        "doc": "Rarely used arguments of the GATK engine and the read filters",
+        "id": "engine_arguments",
+        "type": [
+            "null",
+            {
+                "type": "record",
+                "fields": [
+                    {"name": engine_input["id"], **{key: value for key, value in engine_input.items() if key != "id"}}
+                    for engine_input in engine_inputs
+                ]
+            }
+        ],
+        "inputBinding": {}
+    }
+
+
+def gatk_tool_to_cwl(
+        gatk_tool: GATKTool,
+        cmd_line_options,
+        annotation_names: List[str],
+        reused_arguments: Dict[str, Tuple[List[Dict], List[Dict]]] = None
+    ) -> Dict:
     """
     Return a dictionary representing a CWL file from a given GATKTool.
+
+    :param reused_arguments: CWL inputs and outputs to use for some arguments instead of converting
+        them, as a dictionary of argument name to (inputs, outputs). These are usually taken from
+        the CWL generated for a previous version of GATK (see version_diff.get_reusable_arguments).
     """
+    if reused_arguments is None:
+        reused_arguments = {}
 
     version = GATKVersion(cmd_line_options.version)
 
-    if gatk_tool.name in SPECIAL_GATK3_MODULES and not version.is_3():
-        _logger.warning(f"Tool {gatk_tool.name}'s cwl may be incorrect. The GATK documentation needs to be looked at by a human and hasn't been yet.")
+    # The options added since the first version of the generator default to the CWL it generated,
+    # for callers that make their own cmd_line_options
+    javascript = not getattr(cmd_line_options, "no_javascript", False)
+    overrides = get_overrides(getattr(cmd_line_options, "overrides", None))
+    cwl_version = getattr(cmd_line_options, "cwl_version", "v1.0")
+    group_engine_arguments = getattr(cmd_line_options, "group_engine_arguments", False)
+    streaming = getattr(cmd_line_options, "streaming", False)
+    size_resources = getattr(cmd_line_options, "size_resources", False)
+
+    tool_override = overrides.lookup_tool(gatk_tool.name, version, javascript)
+
+    if "warning" in tool_override:
+        _logger.warning(f"Tool {gatk_tool.name}'s cwl may be incorrect. {tool_override['warning']}")
 
     base_command = cmd_line_options.gatk_command.split(" ")
 
@@ -58,22 +399,38 @@ def gatk_tool_to_cwl(gatk_tool: GATKTool, cmd_line_options, annotation_names: Li
 
     base_command.append(gatk_tool.name)
 
+    if base_command[0] == "java":
+        # Only java is the base command, so that the JVM options can be given before the rest of the command
+        cwl_arguments = get_jvm_arguments(base_command[1:], javascript)
+        tool_inputs = JVM_INPUTS if javascript else JVM_INPUTS_WITHOUT_JAVASCRIPT
+        base_command = ["java"]
+    else:
+        cwl_arguments = []
+        tool_inputs = []
+
+    if is_spark_tool(gatk_tool):
+        cwl_arguments = cwl_arguments + (SPARK_ARGUMENTS if javascript else SPARK_ARGUMENTS_WITHOUT_JAVASCRIPT)
+        tool_inputs = tool_inputs + (SPARK_INPUTS if javascript else SPARK_INPUTS_WITHOUT_JAVASCRIPT)
+
+    javascript_requirement = {
+        "class": "InlineJavascriptRequirement",
+        "expressionLib": [
+            PreservedScalarString(get_js_library())
+        ]
+    }
+
     cwl = {
         'id': gatk_tool.name,
-        'cwlVersion': 'v1.0',
+        'cwlVersion': cwl_version,
         'baseCommand': base_command,
         'class': 'CommandLineTool',
         "doc": PreservedScalarString(gatk_tool.dict.description),
-        'requirements': [
+        'requirements': ([
             {
                 "class": "ShellCommandRequirement"
             },
-            {
-                "class": "InlineJavascriptRequirement",
-                "expressionLib": [
-                    PreservedScalarString(JS_LIBRARY)
-                ]
-            },
+            javascript_requirement
+        ] if javascript else []) + [
             {
                 "class": "SchemaDefRequirement",
                 "types": [{
@@ -88,70 +445,204 @@ def gatk_tool_to_cwl(gatk_tool: GATKTool, cmd_line_options, annotation_names: Li
         }])
     }
 
+    resource_requirement = {
+        "class": "ResourceRequirement",
+        **tool_override.get("resources", {})
+    }
+    cwl["hints"] = [resource_requirement]
+
+    # The requirements added in CWL v1.1, which v1.0 tools can't have
+    cwl_v1_1 = cwl_version != "v1.0"
+
+    if cwl_v1_1 and "time_limit" in tool_override:
+        cwl["hints"].append({
+            "class": "ToolTimeLimit",
+            "timelimit": tool_override["time_limit"]
+        })
+
     # Create and write the cwl file
 
     outputs = []
     inputs = []
 
+    # The ids of the inputs of each kind in the "sizing" formulas (reference, reads, variants)
+    input_names_by_kind: Dict[str, List[str]] = {}
+
+    # The inputs grouped into the engine_arguments input, with --group_engine_arguments
+    engine_inputs: List[Dict] = []
+    own_argument_names = gatk_tool.own_argument_names
+
+    # The directories the tool updates in place, with CWL v1.1 or later
+    inplace_update_entries: List[Dict] = []
+
     for argument in gatk_tool.arguments:
-        if argument.name not in INVALID_ARGS:
+        argument_override = overrides.lookup(gatk_tool.name, argument.name, version, javascript)
+
+        if "runtime_default" in argument_override:
+            cwl_arguments.append(
+                get_runtime_default_argument(argument, version, argument_override["runtime_default"], javascript)
+            )
+
+        if argument_override.get("input_kind") and not argument_override.get("skip"):
+            input_names_by_kind.setdefault(argument_override["input_kind"], []).append(
+                get_input_argument_name(argument, version)
+            )
+
+        # With CWL v1.1, the index files of the inputs that have no secondaryFiles rule can be optional.
+        # So can the index of the reads, whose CWL v1.0 rule requires a .bai or .crai that GATK doesn't.
+        indexed_input_kind = get_indexed_input_kind(argument, argument_override) if cwl_v1_1 else None
+        if argument_override.get("secondary_files") and indexed_input_kind != "reads":
+            indexed_input_kind = None
+
+        if argument.name in reused_arguments:
+            argument_inputs, argument_outputs = reused_arguments[argument.name]
+
+            if indexed_input_kind is not None:
+                argument_inputs = get_index_secondary_files_cwl(argument_inputs, indexed_input_kind)
+
+            if group_engine_arguments and \
+                    is_engine_argument(argument, argument_override, argument_inputs, own_argument_names):
+                engine_inputs.extend(argument_inputs)
+            else:
+                inputs.extend(argument_inputs)
+
+            outputs.extend(argument_outputs)
+        elif not argument_override.get("skip"):
             argument_inputs, argument_outputs = gatk_argument_to_cwl(
                 argument,
                 gatk_tool.name,
-                version
+                version,
+                overrides,
+                javascript
             )
 
             synonym = argument.synonym
             if synonym is not None and len(argument_inputs) >= 1 and synonym.lstrip("-") != argument.name.lstrip("-"):
-                argument_inputs[0]["doc"] += f" [synonymous with {synonym}]"
+                # The input objects can be shared with other arguments, so are copied rather than modified
+                argument_inputs = [
+                    {**argument_inputs[0], "doc": argument_inputs[0]["doc"] + f" [synonymous with {synonym}]"}
+                ] + argument_inputs[1:]
+
+            if cwl_v1_1 and argument_override.get("inplace_update") and argument_inputs:
+                input_id = get_input_argument_name(argument, version)
+                updated_input, listing_entry, updated_output = get_inplace_update_cwl(input_id, argument_inputs[0])
+
+                argument_inputs = [updated_input] + argument_inputs[1:]
+                argument_outputs = argument_outputs + [updated_output]
+                inplace_update_entries.append(listing_entry)
 
-            inputs.extend(argument_inputs)
+            if cwl_v1_1 and argument_override.get("created_directory") and argument_inputs:
+                created_input, argument_outputs = get_created_directory_cwl(argument_inputs[0], argument_outputs)
+                argument_inputs = [created_input] + argument_inputs[1:]
+
+            if indexed_input_kind is not None:
+                argument_inputs = get_index_secondary_files_cwl(argument_inputs, indexed_input_kind)
+
+            if streaming and argument_override.get("streamable"):
+                argument_inputs, argument_outputs = get_streamable_cwl(argument_inputs, argument_outputs)
+
+            if group_engine_arguments and \
+                    is_engine_argument(argument, argument_override, argument_inputs, own_argument_names):
+                engine_inputs.extend(argument_inputs)
+            else:
+                inputs.extend(argument_inputs)
 
             if argument_outputs and any(arg.name.startswith("create-output-") for arg in gatk_tool.arguments):
                 # This depends on the first output always being the main one (not a tag).
                 assert "tag" not in argument_outputs[0]["doc"]
-                argument_outputs[0].setdefault("secondaryFiles", [])
+                secondary_files: List[str] = []
                 doc = argument.summary + argument.dict.fulltext
+                output_kinds = {
+                    tool_override.get("output_kind"),
+                    argument_override.get("output_kind")
+                }
                 if (
                     ("BAM" in doc or "bam" in argument.name) and ("VCF" not in doc and "variant" not in doc)
-                    or gatk_tool.name in (
-                        "UnmarkDuplicates", "FixMisencodedBaseQualityReads", "RevertBaseQualityScores", "ApplyBQSR",
-                        "PrintReads"
-                )):
+                    or "bam" in output_kinds
+                ):
                     # This is probably the BAM/CRAM output.
-                    argument_outputs[0]["secondaryFiles"].extend([
+                    secondary_files.extend([
                         "$(inputs['create-output-bam-index']? self.basename + self.nameext.replace('m', 'i') : [])",
                         "$(inputs['create-output-bam-md5']? self.basename + '.md5' : [])"
-                    ])
+                    ] if javascript else BAM_OUTPUT_SECONDARY_FILES)
                 elif (("VCF" in doc or "variant" in doc) and "BAM" not in doc
-                    or gatk_tool.name == "CNNScoreVariants"
+                    or "vcf" in output_kinds
                 ):
                     # This is probably the VCF output.
-                    argument_outputs[0]["secondaryFiles"].extend([
+                    secondary_files.extend([
                         # If the extension is .vcf, the index's extension is .vcf.idx;
                         # if the extension is .vcf.gz, the index's extension is .vcf.gz.tbi.
                         "$(inputs['create-output-variant-index']? self.basename + (inputs['output-filename'].endsWith('.gz')? '.tbi':'.idx') : [])",
                         "$(inputs['create-output-variant-md5']? self.basename + '.md5' : [])"
-                    ])
-                elif "IGV formatted file" in doc or "table" in doc or argument.name in (
-                    "graph-output", "activity-profile-out"
-                ) or gatk_tool.name in (
-                    "Pileup", "AnnotateIntervals", "VariantsToTable", "GetSampleName", "PreprocessIntervals",
-                    "BaseRecalibrator", "CountFalsePositives", "CollectAllelicCounts", "CalculateMixingFractions",
-                    "SplitIntervals", "GenomicsDBImport", "GetPileupSummaries", "VariantRecalibrator",
-                    "CollectReadCounts", "CheckPileup", "ASEReadCounter"
-                ):
+                    ] if javascript else VCF_OUTPUT_SECONDARY_FILES)
+                elif "IGV formatted file" in doc or "table" in doc or "other" in output_kinds:
                     # This is not a BAM or VCF output, no need to add secondary files.
                     pass
                 else:
                     _logger.warning(f"Ambiguous output argument {argument.name} for {gatk_tool.name}")
 
-                if not argument_outputs[0]["secondaryFiles"]:
-                    del argument_outputs[0]["secondaryFiles"]
+                if secondary_files:
+                    argument_outputs = [
+                        {**argument_outputs[0], "secondaryFiles": argument_outputs[0].get("secondaryFiles", []) + secondary_files}
+                    ] + argument_outputs[1:]
 
             outputs.extend(argument_outputs)
 
-    cwl["inputs"] = inputs
+    if size_resources:
+        for field, formula in tool_override.get("sizing", {}).items():
+            resource_requirement[field] = get_sizing_expression(formula, input_names_by_kind)
+
+    if len(resource_requirement) == 1:
+        cwl["hints"].remove(resource_requirement)
+
+    if not cwl["hints"]:
+        del cwl["hints"]
+
+    if cwl_arguments:
+        cwl["arguments"] = cwl_arguments
+
+    if engine_inputs:
+        inputs.append(get_engine_arguments_input(engine_inputs))
+
+    cwl["inputs"] = inputs + tool_inputs
     cwl["outputs"] = outputs
 
+    if cwl_v1_1:
+        if any(has_directory_type(cwl_input["type"]) for cwl_input in cwl["inputs"]):
+            # Directories such as GenomicsDB workspaces hold thousands of files, which don't need to be listed
+            cwl["requirements"].append({
+                "class": "LoadListingRequirement",
+                "loadListing": "no_listing"
+            })
+
+        if inplace_update_entries:
+            cwl["requirements"].extend([
+                {
+                    "class": "InitialWorkDirRequirement",
+                    "listing": inplace_update_entries
+                },
+                {
+                    "class": "InplaceUpdateRequirement",
+                    "inplaceUpdate": True
+                }
+            ])
+
+        # A tool that updates its inputs in place must run again, even if it has been run on the same inputs
+        work_reuse = False if inplace_update_entries else tool_override.get("work_reuse")
+        if work_reuse is not None:
+            cwl["requirements"].append({
+                "class": "WorkReuse",
+                "enableReuse": work_reuse
+            })
+
+    if not javascript:
+        javascript_expressions = [
+            expression.location for expression in get_expressions(cwl)
+            if not is_parameter_reference(expression.source)
+        ]
+        if javascript_expressions:
+            # e.g. the expressions of --size_resources, which can't be written without JavaScript
+            _logger.info(f"Tool {gatk_tool.name} needs JavaScript for {', '.join(javascript_expressions)}")
+            cwl["requirements"].insert(0, javascript_requirement)
+
     return cwl
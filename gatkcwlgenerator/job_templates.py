@@ -0,0 +1,194 @@
+"""
+Generating job templates for the tools, with the GATK arguments that make them faster or use less memory.
+
+A template is a CWL job file for a tool, with the values of the example command in the tool's
+documentation (see parse_gatk_commands), the required inputs that the example doesn't give
+left as null, and the values of the "job_presets" override property for one of JOB_PROFILES.
+"""
+
+import logging
+from typing import *
+
+from bs4 import BeautifulSoup
+from ruamel.yaml.comments import CommentedMap
+
+from .common import GATKVersion
+from .GATK_classes import *
+from .overrides import get_overrides
+from .parse_gatk_commands import infer_cwl_type_for_value, parse_gatk_pre_box
+
+_logger = logging.getLogger("gatkcwlgenerator")
+
+# The profiles of the "job_presets" override property, for which a template is written for each tool:
+# "throughput" for the fastest jobs, and "low-memory" for jobs on machines with little memory
+JOB_PROFILES = ["throughput", "low-memory"]
+
+# The input containing the arguments grouped with --group_engine_arguments
+ENGINE_ARGUMENTS_INPUT = "engine_arguments"
+
+
+def get_example_arguments(gatk_tool: GATKTool) -> Dict[str, Union[str, List[str], bool]]:
+    """
+    Return the arguments of the first example command of a tool in its documentation,
+    or an empty dictionary if it has none that can be parsed.
+    """
+    soup = BeautifulSoup(gatk_tool.description, "html.parser")
+
+    for pre_element in soup.select("pre"):
+        if pre_element.string is None:
+            continue
+
+        try:
+            commands = parse_gatk_pre_box(pre_element.string)
+        except Exception:
+            # The examples are written by hand, and some can't be parsed
+            _logger.debug(f"Can't parse an example command of {gatk_tool.name}", exc_info=True)
+            continue
+
+        for command in commands:
+            if command.tool_name == gatk_tool.name:
+                return command.arguments
+
+    return {}
+
+def _get_type_names(cwl_type: Any, in_array: bool = False) -> Set[Tuple[str, bool]]:
+    """
+    Return the names of the types a CWL type object can hold, e.g. "File" or "int",
+    with whether they are the items of an array.
+    """
+    if isinstance(cwl_type, list):
+        return set().union(*(_get_type_names(item, in_array) for item in cwl_type))
+    elif isinstance(cwl_type, dict):
+        if cwl_type["type"] == "array":
+            return _get_type_names(cwl_type["items"], True)
+        elif cwl_type["type"] == "enum":
+            return {("string", in_array)}
+
+        return set()
+    elif cwl_type.rstrip("?").endswith("[]"):
+        return _get_type_names(cwl_type.rstrip("?")[:-2], True)
+
+    # The named types are the enums of the tool's SchemaDefRequirement, e.g. annotation_type
+    name = cwl_type.rstrip("?")
+    return {(name if name in ("File", "Directory", "boolean", "int", "long", "float", "double", "null") else "string", in_array)}
+
+def _get_scalar_value(value: Union[str, bool], type_names: Set[str]) -> Any:
+    if isinstance(value, bool):
+        return value
+
+    if "boolean" in type_names and value.lower() in ("true", "false"):
+        return value.lower() == "true"
+
+    for number_type, type_names_of_number in ((int, {"int", "long"}), (float, {"float", "double"})):
+        if type_names & type_names_of_number:
+            try:
+                return number_type(value)
+            except ValueError:
+                pass
+
+    # Unions of files and strings, e.g. the intervals, hold a file if the value looks like a path
+    for file_class in ("File", "Directory"):
+        if file_class in type_names and (
+            "string" not in type_names or infer_cwl_type_for_value(value)[0].get_cwl_object() == "File"
+        ):
+            return {"class": file_class, "path": value}
+
+    return value
+
+def get_job_value(value: Union[str, List[str], bool], cwl_type: Any) -> Any:
+    """
+    Return the value of an input in a CWL job, for a value of its argument in a GATK command.
+    """
+    type_names = _get_type_names(cwl_type)
+    scalar_type_names = {name for name, in_array in type_names if not in_array} - {"null"}
+    item_type_names = {name for name, in_array in type_names if in_array}
+
+    if isinstance(value, list):
+        return [_get_scalar_value(item, item_type_names or scalar_type_names) for item in value]
+    elif scalar_type_names or not item_type_names:
+        return _get_scalar_value(value, scalar_type_names)
+
+    # The input only takes arrays
+    return [_get_scalar_value(value, item_type_names)]
+
+def _get_inputs_by_id(tool_cwl: Dict) -> Dict[str, Tuple[Dict, bool]]:
+    """
+    Return the inputs of a tool by id, with whether they are fields of the engine_arguments input.
+    """
+    inputs_by_id = {}
+
+    for cwl_input in tool_cwl["inputs"]:
+        if cwl_input["id"] == ENGINE_ARGUMENTS_INPUT:
+            record_type = next(item for item in cwl_input["type"] if isinstance(item, dict))
+            for field in record_type["fields"]:
+                inputs_by_id[field["name"]] = ({**field, "id": field["name"]}, True)
+        else:
+            inputs_by_id[cwl_input["id"]] = (cwl_input, False)
+
+    return inputs_by_id
+
+def _is_optional(cwl_input: Dict) -> bool:
+    return isinstance(cwl_input["type"], list) and "null" in cwl_input["type"] or \
+        isinstance(cwl_input["type"], str) and cwl_input["type"].endswith("?")
+
+def get_job_template(gatk_tool: GATKTool, tool_cwl: Dict, profile: str, cmd_line_options) -> CommentedMap:
+    """
+    Return a job template for a tool (generated as tool_cwl), with the presets of a profile in JOB_PROFILES.
+    """
+    from .gatk_argument_to_cwl import get_input_argument_name
+
+    version = GATKVersion(cmd_line_options.version)
+    javascript = not cmd_line_options.no_javascript
+    overrides = get_overrides(cmd_line_options.overrides)
+    inputs_by_id = _get_inputs_by_id(tool_cwl)
+
+    job = CommentedMap()
+    engine_arguments = CommentedMap()
+
+    def set_value(input_id: str, value: Any) -> None:
+        if inputs_by_id[input_id][1]:
+            engine_arguments[input_id] = value
+        else:
+            job[input_id] = value
+
+    example_arguments = get_example_arguments(gatk_tool)
+    for argument_name, value in example_arguments.items():
+        try:
+            input_id = get_input_argument_name(gatk_tool.get_argument(argument_name), version)
+        except KeyError:
+            _logger.debug(f"The example command of {gatk_tool.name} has an unknown argument {argument_name}")
+            continue
+
+        if input_id in inputs_by_id:
+            set_value(input_id, get_job_value(value, inputs_by_id[input_id][0]["type"]))
+
+    missing_inputs = [
+        input_id for input_id, (cwl_input, is_engine_argument) in inputs_by_id.items()
+        if not is_engine_argument and input_id not in job and not _is_optional(cwl_input) and "default" not in cwl_input
+    ]
+    for input_id in missing_inputs:
+        job[input_id] = None
+
+    preset_inputs = []
+    for argument in gatk_tool.arguments:
+        presets = overrides.lookup(gatk_tool.name, argument.name, version, javascript).get("job_presets", {})
+        input_id = get_input_argument_name(argument, version)
+
+        if profile in presets and input_id in inputs_by_id:
+            set_value(input_id, presets[profile])
+            preset_inputs.append(input_id)
+
+    if engine_arguments:
+        job[ENGINE_ARGUMENTS_INPUT] = engine_arguments
+
+    comment_lines = [f"A job for {tool_cwl['id']}.cwl, with the GATK arguments of the \"{profile}\" profile."]
+    if example_arguments:
+        comment_lines.append("The values are from the example in the GATK documentation, so replace them with your own.")
+    if missing_inputs:
+        comment_lines.append(f"The required inputs {', '.join(missing_inputs)} have to be filled in.")
+    if preset_inputs:
+        comment_lines.append(f"The {profile} preset sets {', '.join(preset_inputs)}.")
+
+    job.yaml_set_start_comment("\n".join(comment_lines))
+
+    return job
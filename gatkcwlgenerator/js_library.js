@@ -74,6 +74,25 @@ function generateArrayCmd(prefix){
     return output;
 }
 
+function inputSizeMiB(inputs){
+    /**
+     * Function to be used in ResourceRequirement fields, returning the total size in MiB of
+     * the files in a list of inputs (which can be null, Files or arrays of Files).
+     */
+    var size = 0;
+
+    inputs.forEach(function(input) {
+        if(Array.isArray(input)){
+            size += inputSizeMiB(input) * 1024 * 1024;
+        }
+        else if(input && input.class === "File" && input.size){
+            size += input.size;
+        }
+    })
+
+    return size / (1024 * 1024);
+}
+
 /* Polyfill String.endsWith (it was introduced in ES6, but CWL 1.0 only supports ES5) */
 String.prototype.endsWith = String.prototype.endsWith || function(suffix) {
     return this.indexOf(suffix, this.length - suffix.length) >= 0;
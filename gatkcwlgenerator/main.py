@@ -7,18 +7,28 @@ import os
 import shutil
 import sys
 import time
+from collections import namedtuple
 from typing import *
 
-import coloredlogs
-from ruamel import yaml
-
-from .gatk_tool_to_cwl import gatk_tool_to_cwl
+from .archive_writer import ArchiveWriter
 from .common import GATKVersion
-from .web_to_gatk_tool import get_tool_name, get_gatk_links, get_gatk_tool, get_extra_arguments
+
+# NOTE: coloredlogs, ruamel.yaml and the modules that convert the documentation
+# are imported where they are used, so that the command line starts up quickly.
 
 _logger: logging.Logger = logging.getLogger("gatkcwlgenerator")
 _logger.addHandler(logging.StreamHandler())
 
+DEFAULT_CACHE_LOCATION = "cache"
+
+CWL_VERSIONS = ["v1.0", "v1.1", "v1.2"]
+
+# The file in the output directory of a version recording what its files were generated with (see get_generation_record)
+GENERATION_FILE = "generation.json"
+
+# The options that change the CWL of the arguments, so --delta_from only reuses CWL generated with the same ones
+ARGUMENT_OPTIONS = ["no_javascript", "group_engine_arguments", "cwl_version", "streaming", "overrides"]
+
 
 class CmdLineArguments(argparse.Namespace):
     version: str
@@ -28,8 +38,21 @@ class CmdLineArguments(argparse.Namespace):
     dev: bool
     use_cache: Optional[str]
     no_docker: bool
+    no_javascript: bool
+    slim: bool
+    group_engine_arguments: bool
     docker_image_name: str
     gatk_command: str
+    overrides: List[str]
+    delta_from: Optional[str]
+    delta_cwl_dir: Optional[str]
+    yaml_anchors: bool
+    size_resources: bool
+    scatter_workflows: bool
+    cwl_version: str
+    streaming: bool
+    argument_store: Optional[str]
+    job_templates: bool
 
 
 class OutputWriter:
@@ -51,57 +74,248 @@ class OutputWriter:
             else:
                 raise
 
+        self._output_dir = cmd_line_options.output_dir
         self._json_dir = json_dir
         self._cwl_dir = cwl_dir
+        self._yaml_anchors = cmd_line_options.yaml_anchors
 
     def write_cwl_file(self, cwl_dict: Dict, tool_name: str) -> None:
+        from .cwl_yaml import dump_cwl
+
         cwl_path = os.path.join(self._cwl_dir, tool_name + ".cwl")
 
         _logger.info(f"Writing CWL file to {cwl_path}")
 
         with open(cwl_path, "w") as file:
-            yaml.round_trip_dump(cwl_dict, file)
+            dump_cwl(cwl_dict, file, self._yaml_anchors)
+
+    def write_job_template(self, job: Dict, name: str) -> None:
+        from .cwl_yaml import dump_cwl
 
-    def write_gatk_json_file(self, gatk_json_dict: Dict, tool_name: str) -> None:
+        job_path = os.path.join(self._cwl_dir, name + ".yml")
+
+        _logger.info(f"Writing job template to {job_path}")
+
+        with open(job_path, "w") as file:
+            dump_cwl(job, file)
+
+    def write_gatk_json_file(self, gatk_json: bytes, tool_name: str) -> None:
         gatk_json_path = os.path.join(self._json_dir, tool_name + ".json")
 
         _logger.info(f"Writing GATK JSON file to {gatk_json_path}")
 
-        with open(gatk_json_path, "w") as file:
-            json.dump(gatk_json_dict, file)
+        with open(gatk_json_path, "wb") as file:
+            file.write(gatk_json)
+
+    def write_generation_file(self, generation_record: Dict) -> None:
+        with open(os.path.join(self._output_dir, GENERATION_FILE), "w") as file:
+            file.write(dump_generation_record(generation_record))
+
+
+class ArchiveOutputWriter:
+    """
+    Writes the generated files straight into release archives, under the directory prefix.
+    The files have the same layout as the ones written by OutputWriter.
+    """
+    def __init__(self, archive_writer: ArchiveWriter, prefix: str, yaml_anchors: bool = False) -> None:
+        self._archive_writer = archive_writer
+        self._prefix = prefix
+        self._yaml_anchors = yaml_anchors
+
+    def write_cwl_file(self, cwl_dict: Dict, tool_name: str) -> None:
+        from .cwl_yaml import dump_cwl
+
+        cwl_path = f"{self._prefix}/cwl/{tool_name}.cwl"
+
+        _logger.info(f"Adding CWL file {cwl_path} to the archives")
+
+        self._archive_writer.add_file(cwl_path, dump_cwl(cwl_dict, yaml_anchors=self._yaml_anchors).encode())
+
+    def write_job_template(self, job: Dict, name: str) -> None:
+        from .cwl_yaml import dump_cwl
+
+        job_path = f"{self._prefix}/cwl/{name}.yml"
+
+        _logger.info(f"Adding job template {job_path} to the archives")
+
+        self._archive_writer.add_file(job_path, dump_cwl(job).encode())
+
+    def write_gatk_json_file(self, gatk_json: bytes, tool_name: str) -> None:
+        gatk_json_path = f"{self._prefix}/json/{tool_name}.json"
+
+        _logger.info(f"Adding GATK JSON file {gatk_json_path} to the archives")
+
+        self._archive_writer.add_file(gatk_json_path, gatk_json)
+
+    def write_generation_file(self, generation_record: Dict) -> None:
+        self._archive_writer.add_file(f"{self._prefix}/{GENERATION_FILE}", dump_generation_record(generation_record).encode())
+
 
 def should_generate_file(tool_url, gatk_version: GATKVersion, include_pattern: str = None) -> bool:
     no_ext_url = tool_url[:-len(".php.json" if gatk_version.is_3() else ".json")]
 
     return include_pattern is None or no_ext_url.endswith(include_pattern)
 
-def main(cmd_line_options: CmdLineArguments) -> None:
-    start = time.time()
+# What is needed to convert any tool of a GATK version, which is fetched once per version
+VersionContext = namedtuple("VersionContext", [
+    "gatk_links",
+    "extra_arguments",
+    "read_filter_arguments",
+    "annotation_names",
+    "previous_version"
+])
 
-    gatk_version = GATKVersion(cmd_line_options.version)
+def get_version_context(cmd_line_options: CmdLineArguments, corpus=None) -> VersionContext:
+    """
+    Fetch what is needed to convert the tools of a version. With a GATKCorpus, the documentation
+    is kept in it, shared with the other versions in it.
+    """
+    from .web_to_gatk_tool import get_tool_name, get_gatk_links, get_extra_arguments, get_read_filter_arguments
 
-    output_writer = OutputWriter(cmd_line_options)
+    gatk_version = GATKVersion(cmd_line_options.version)
     gatk_links = get_gatk_links(gatk_version)
 
     extra_arguments = get_extra_arguments(
         gatk_version,
-        gatk_links
+        gatk_links,
+        read_filters=not cmd_line_options.slim
     )
 
-    have_generated_file = False
+    # With --slim, the arguments of the read filters are only added to the tools that take read filters
+    read_filter_arguments = get_read_filter_arguments(gatk_links) if cmd_line_options.slim else None
+
+    if corpus is not None:
+        extra_arguments = corpus.add_arguments(extra_arguments)
+        if read_filter_arguments is not None:
+            read_filter_arguments = corpus.add_arguments(read_filter_arguments)
+
+    previous_version = None
+    if cmd_line_options.delta_from:
+        from .overrides import get_overrides
+        from .version_diff import PreviousVersion
+
+        previous_version = PreviousVersion(
+            GATKVersion(cmd_line_options.delta_from),
+            cmd_line_options.delta_cwl_dir,
+            get_argument_options(cmd_line_options),
+            get_overrides(cmd_line_options.overrides),
+            corpus
+        )
 
     annotation_names = [get_tool_name(url) for url in gatk_links.annotator_urls]
 
-    for tool_url in gatk_links.tool_urls:
-        if should_generate_file(tool_url, gatk_version, cmd_line_options.include):
-            have_generated_file = True
+    return VersionContext(gatk_links, extra_arguments, read_filter_arguments, annotation_names, previous_version)
+
+def get_argument_options(cmd_line_options: CmdLineArguments) -> Dict:
+    """
+    Return the options that change the CWL of the arguments (see ARGUMENT_OPTIONS), as JSON.
+    The override files are given by the digests of their contents, including the built in rules,
+    and the version of the generator is included, as it changes the CWL too.
+    """
+    from . import __version__
+    from .overrides import get_override_digests
+
+    argument_options = {option: getattr(cmd_line_options, option) for option in ARGUMENT_OPTIONS}
+    argument_options["overrides"] = get_override_digests(argument_options["overrides"])
+    argument_options["generator_version"] = __version__.strip()
+
+    return argument_options
+
+def get_generation_record(cmd_line_options: CmdLineArguments, version_context: VersionContext) -> Dict:
+    """
+    Return what the files of a version are generated with, to be written to GENERATION_FILE, so that
+    --delta_from can convert the next version from the files alone: the options that change the CWL
+    of the arguments, and the arguments added to the tools (the JSON of the tools is in json/).
+    """
+    return {
+        "argument_options": get_argument_options(cmd_line_options),
+        "extra_arguments": version_context.extra_arguments,
+        "read_filter_arguments": version_context.read_filter_arguments
+    }
+
+def dump_generation_record(generation_record: Dict) -> str:
+    # The arguments are CorpusRecords if they are in a GATKCorpus
+    return json.dumps(generation_record, indent=2, default=dict)
+
+def generate_tool(tool_url: str, version_context: VersionContext, cmd_line_options: CmdLineArguments, output_writer) -> None:
+    """
+    Generate the files for one tool, and write them with the output writer.
+    """
+    from .gatk_tool_to_cwl import gatk_tool_to_cwl
+    from .web_to_gatk_tool import get_gatk_tool
+
+    gatk_version = GATKVersion(cmd_line_options.version)
+
+    gatk_tool = get_gatk_tool(
+        tool_url,
+        extra_arguments=version_context.extra_arguments,
+        read_filter_arguments=version_context.read_filter_arguments
+    )
 
-            gatk_tool = get_gatk_tool(tool_url, extra_arguments=extra_arguments)
+    output_writer.write_gatk_json_file(gatk_tool.raw_json, gatk_tool.name)
 
-            output_writer.write_gatk_json_file(gatk_tool.original_dict, gatk_tool.name)
+    reused_arguments = None
+    previous_version = version_context.previous_version
+    if previous_version is not None:
+        reused_arguments = previous_version.get_reusable_arguments(gatk_tool, gatk_version)
+        _logger.info(f"Reusing the CWL of {len(reused_arguments)} arguments of {gatk_tool.name} from {previous_version.gatk_version}")
 
-            cwl = gatk_tool_to_cwl(gatk_tool, cmd_line_options, annotation_names)
-            output_writer.write_cwl_file(cwl, gatk_tool.name)
+    cwl = gatk_tool_to_cwl(gatk_tool, cmd_line_options, version_context.annotation_names, reused_arguments)
+    output_writer.write_cwl_file(cwl, gatk_tool.name)
+
+    if cmd_line_options.argument_store:
+        from .argument_store import ArgumentStore
+
+        with ArgumentStore(cmd_line_options.argument_store) as argument_store:
+            argument_store.record_tool(gatk_tool, cwl, cmd_line_options.version)
+
+    if cmd_line_options.scatter_workflows:
+        from .scatter_workflow import get_scatter_workflow
+
+        scatter_workflow = get_scatter_workflow(gatk_tool, cwl, cmd_line_options)
+        if scatter_workflow is not None:
+            output_writer.write_cwl_file(scatter_workflow, scatter_workflow["id"])
+
+    if cmd_line_options.streaming:
+        from .streaming import get_stdout_tool
+
+        stdout_tool = get_stdout_tool(gatk_tool, cwl, cmd_line_options)
+        if stdout_tool is not None:
+            output_writer.write_cwl_file(stdout_tool, stdout_tool["id"])
+
+    if cmd_line_options.job_templates:
+        from .job_templates import JOB_PROFILES, get_job_template
+
+        for profile in JOB_PROFILES:
+            output_writer.write_job_template(
+                get_job_template(gatk_tool, cwl, profile, cmd_line_options),
+                f"{gatk_tool.name}_{profile}"
+            )
+
+def main(cmd_line_options: CmdLineArguments, output_writer=None) -> None:
+    """
+    Generate the files for one GATK version. By default, they are written
+    to the output directory with an OutputWriter.
+    """
+    start = time.time()
+
+    gatk_version = GATKVersion(cmd_line_options.version)
+
+    if cmd_line_options.scatter_workflows and gatk_version.is_3():
+        _logger.warning("Scatter workflows are only generated for GATK 4, as GATK 3 has no SplitIntervals tool")
+
+    if output_writer is None:
+        output_writer = OutputWriter(cmd_line_options)
+
+    version_context = get_version_context(cmd_line_options)
+    output_writer.write_generation_file(get_generation_record(cmd_line_options, version_context))
+
+    have_generated_file = False
+
+    for tool_url in version_context.gatk_links.tool_urls:
+        if should_generate_file(tool_url, gatk_version, cmd_line_options.include):
+            have_generated_file = True
+            generate_tool(tool_url, version_context, cmd_line_options, output_writer)
 
     if not have_generated_file:
         _logger.warning("No files have been generated. Check the include pattern is correct")
@@ -128,15 +342,10 @@ def gatk_cwl_generator(**cmd_line_options) -> None:
 
     cmdline_main(args)
 
-def cmdline_main(args=None) -> None:
+def parse_cmdline_arguments(args: List[str]) -> CmdLineArguments:
     """
-    Function to be called when this is invoked on the command line.
+    Parse the command line arguments for generating one GATK version, and apply the defaults.
     """
-    if args is None:
-        args = sys.argv[1:]
-
-    default_cache_location = "cache"
-
     parser = argparse.ArgumentParser(description='Generates CWL files from the GATK documentation')
     parser.add_argument("--version", "-v", dest='version', default="3.5-0",
         help="Sets the version of GATK to parse documentation for. Default is 3.5-0")
@@ -149,26 +358,65 @@ def cmdline_main(args=None) -> None:
     parser.add_argument("--dev", dest="dev", action="store_true",
         help="Enable --use_cache and overwriting of the generated files (for development purposes). " +
         "Requires requests_cache to be installed")
-    parser.add_argument("--use_cache", dest="use_cache", nargs="?", const=default_cache_location, metavar="CACHE_LOCATION",
+    parser.add_argument("--use_cache", dest="use_cache", nargs="?", const=DEFAULT_CACHE_LOCATION, metavar="CACHE_LOCATION",
         help="Use requests_cache, using the cache at CACHE_LOCATION, or 'cache' if not specified. Default is False.")
     parser.add_argument("--no_docker", dest="no_docker", action="store_true",
         help="Make the generated CWL files not use Docker containers. Default is False.")
+    parser.add_argument("--no_javascript", dest="no_javascript", action="store_true",
+        help="Make the generated CWL files use JavaScript expressions only where they can't be avoided (e.g. with " +
+        "--size_resources), so that no node.js process is started to run most tools. There are no tags inputs, " +
+        "and array arguments only accept arrays. Default is False.")
     parser.add_argument("--docker_image_name", "-c", dest="docker_image_name",
         help="Docker image name for generated CWL files. Default is 'broadinstitute/gatk3:<VERSION>' " +
         "for version 3.x and 'broadinstitute/gatk:<VERSION>' for 4.x")
     parser.add_argument("--gatk_command", "-l", dest="gatk_command",
-        help="Command to launch GATK. Default is 'java -jar /usr/GenomeAnalysisTK.jar' for GATK 3.x and 'java -jar /gatk/gatk.jar' for GATK 4.x")
+        help="Command to launch GATK. Default is 'java -jar /usr/GenomeAnalysisTK.jar' for GATK 3.x and 'java -jar /gatk/gatk.jar' for GATK 4.x. " +
+        "If the command starts with java, the generated tools have inputs for the heap size and other JVM options")
+    parser.add_argument("--overrides", dest="overrides", action="append", default=[], metavar="OVERRIDES_FILE",
+        help="A JSON file of rules for special cases of tools and arguments, applied after the built in ones " +
+        "(see overrides.py for the format). Can be given multiple times.")
+    parser.add_argument("--delta_from", dest="delta_from", metavar="PREVIOUS_VERSION",
+        help="Reuse the CWL generated for PREVIOUS_VERSION for the arguments that haven't changed since then, " +
+        "and only convert the rest. The previous files must have been generated with the same options " +
+        f"(as recorded in their {GENERATION_FILE}), and the documentation of PREVIOUS_VERSION is read from them.")
+    parser.add_argument("--delta_cwl_dir", dest="delta_cwl_dir",
+        help="The directory of CWL files generated for --delta_from, next to its json/ directory and " +
+        f"{GENERATION_FILE}. Default is ./gatk_cmdline_tools/<PREVIOUS_VERSION>/cwl/")
+    parser.add_argument("--size_resources", dest="size_resources", action="store_true",
+        help="Compute the memory and disk space in the ResourceRequirement hints from the sizes of the input files, " +
+        "using the \"sizing\" formulas in the overrides. Default is False.")
+    parser.add_argument("--slim", dest="slim", action="store_true",
+        help="Only add the arguments of the read filters to the tools that process reads, rather than to every tool. " +
+        "Default is False.")
+    parser.add_argument("--group_engine_arguments", dest="group_engine_arguments", action="store_true",
+        help="Group the rarely used optional arguments added to every tool (the arguments of CommandLineGATK and " +
+        "the read filters) and the GATK 4 engine arguments into one optional record input, engine_arguments. Default is False.")
+    parser.add_argument("--scatter_workflows", dest="scatter_workflows", action="store_true",
+        help="Also generate a workflow <TOOL>_scatter.cwl for the tools that take intervals, which runs the tool " +
+        "on shards of the intervals in parallel and merges the outputs. Only for GATK 4. Default is False.")
+    parser.add_argument("--cwl_version", dest="cwl_version", choices=CWL_VERSIONS, default=CWL_VERSIONS[0],
+        help="The version of CWL of the generated files. From v1.1, the tools have the requirements that make them " +
+        "faster to run where they apply: directories aren't listed (LoadListingRequirement), and GenomicsDB workspaces " +
+        "are updated in place (InplaceUpdateRequirement). Default is v1.0.")
+    parser.add_argument("--streaming", dest="streaming", action="store_true",
+        help="Mark the files that the tools read and write sequentially as streamable, so that a CWL runner can pipe " +
+        "them between steps, and also generate a tool <TOOL>_stdout.cwl that writes its output to stdout for the tools " +
+        "that can. Default is False.")
+    parser.add_argument("--argument_store", dest="argument_store", metavar="DATABASE",
+        help="Record the tools and arguments of this version, with their GATK and CWL types, defaults and synonyms, " +
+        "in this SQLite database, alongside the versions recorded before, to be searched with gatk_cwl_generator query. " +
+        "Default is to not record them.")
+    parser.add_argument("--job_templates", dest="job_templates", action="store_true",
+        help="Also generate job templates <TOOL>_throughput.yml and <TOOL>_low-memory.yml for each tool, with the " +
+        "values of the example in the tool's documentation and the GATK arguments that make it faster, or use less " +
+        "memory. Default is False.")
+    parser.add_argument("--yaml_anchors", dest="yaml_anchors", action="store_true",
+        help="Write the parts of a CWL file that are repeated (e.g. the types of the tags inputs) once, " +
+        "as YAML anchors and aliases. Default is False.")
     cmd_line_options = parser.parse_args(args, namespace=CmdLineArguments())
 
-    log_format = "%(asctime)s %(name)s[%(process)d] %(levelname)s %(message)s"
-
     version = GATKVersion(cmd_line_options.version)
 
-    if cmd_line_options.verbose:
-        coloredlogs.install(level='DEBUG', logger=_logger, fmt=log_format)
-    else:
-        coloredlogs.install(level='WARNING', logger=_logger, fmt=log_format)
-
     if not cmd_line_options.output_dir:
         cmd_line_options.output_dir = os.getcwd() + '/gatk_cmdline_tools/' + cmd_line_options.version
 
@@ -184,13 +432,104 @@ def cmdline_main(args=None) -> None:
         else:
             cmd_line_options.gatk_command = "java -jar /gatk/gatk.jar"
 
+    if cmd_line_options.delta_from and not cmd_line_options.delta_cwl_dir:
+        cmd_line_options.delta_cwl_dir = os.getcwd() + '/gatk_cmdline_tools/' + cmd_line_options.delta_from + '/cwl'
+
     if cmd_line_options.dev:
-        cmd_line_options.use_cache = default_cache_location
+        cmd_line_options.use_cache = DEFAULT_CACHE_LOCATION
+
+    return cmd_line_options
+
+def setup_logging_and_cache(cmd_line_options: CmdLineArguments) -> None:
+    import coloredlogs
+
+    log_format = "%(asctime)s %(name)s[%(process)d] %(levelname)s %(message)s"
+
+    if cmd_line_options.verbose:
+        coloredlogs.install(level='DEBUG', logger=_logger, fmt=log_format)
+    else:
+        coloredlogs.install(level='WARNING', logger=_logger, fmt=log_format)
 
     if cmd_line_options.use_cache:
         import requests_cache
         requests_cache.install_cache(cmd_line_options.use_cache)  # Decreases the time to run dramatically
 
+def release_main(args: List[str]) -> None:
+    """
+    Generate the files for several GATK versions straight into release archives,
+    in one pass and without writing the files to disk.
+
+    Any arguments not recognised here are passed on to the generator for each version.
+    """
+    parser = argparse.ArgumentParser(prog="gatk_cwl_generator release",
+        description="Generates CWL files for several GATK versions straight into release archives")
+    parser.add_argument("--version", "-v", dest="versions", action="append", required=True,
+        help="A version of GATK to generate files for. Can be given multiple times.")
+    parser.add_argument("--archive", "-a", dest="archives", action="append", required=True,
+        help="An archive to write the files to (.zip, .tgz, .tar.gz or .tar.bz2). Can be given multiple times.")
+    parser.add_argument("--archive_root", dest="archive_root", default="gatk_cmdline_tools",
+        help="The directory in the archives containing a directory per version. Default is gatk_cmdline_tools")
+    parser.add_argument("--jobs", "-j", dest="jobs", type=int,
+        help="Number of threads used for compression. Default is the number of CPUs.")
+    release_options, generator_args = parser.parse_known_args(args)
+
+    all_cmd_line_options = [
+        parse_cmdline_arguments(["--version", version] + generator_args)
+        for version in release_options.versions
+    ]
+
+    setup_logging_and_cache(all_cmd_line_options[0])
+
+    with ArchiveWriter(release_options.archives, release_options.jobs) as archive_writer:
+        for cmd_line_options in all_cmd_line_options:
+            main(cmd_line_options, ArchiveOutputWriter(
+                archive_writer,
+                f"{release_options.archive_root}/{cmd_line_options.version}",
+                cmd_line_options.yaml_anchors
+            ))
+
+def cmdline_main(args=None) -> None:
+    """
+    Function to be called when this is invoked on the command line.
+    """
+    if args is None:
+        args = sys.argv[1:]
+
+    if args and args[0] == "release":
+        release_main(args[1:])
+        return
+    elif args and args[0] == "diff":
+        from .version_diff import diff_main
+        diff_main(args[1:])
+        return
+    elif args and args[0] == "validate":
+        from .validate import validate_main
+        validate_main(args[1:])
+        return
+    elif args and args[0] == "publish":
+        from .distributed import publish_main
+        publish_main(args[1:])
+        return
+    elif args and args[0] == "worker":
+        from .distributed import worker_main
+        worker_main(args[1:])
+        return
+    elif args and args[0] == "query":
+        from .argument_store import query_main
+        query_main(args[1:])
+        return
+    elif args and args[0] == "render":
+        from .command_line import render_main
+        render_main(args[1:])
+        return
+    elif args and args[0] == "benchmark":
+        from .benchmark import benchmark_main
+        benchmark_main(args[1:])
+        return
+
+    cmd_line_options = parse_cmdline_arguments(args)
+    setup_logging_and_cache(cmd_line_options)
+
     main(cmd_line_options)
 
 
@@ -0,0 +1,233 @@
+"""
+A registry of special cases for tools and arguments, that can't be inferred from the GATK documentation.
+
+The special cases are rules, loaded from JSON files (the built in rules are in overrides.json).
+Each rule is an object with the properties:
+- "tool", "argument": the name of the tool and argument the rule applies to, or a list of names.
+  If a rule has no "tool", it applies to every tool. If it has no "argument", it applies to the tool itself.
+- "min_version", "max_version": the range of GATK versions the rule applies to (the maximum is exclusive).
+- "gatk": 3 or 4, if the rule only applies to one major version of GATK.
+- "comment": ignored.
+- any of OVERRIDE_PROPERTIES, which are the special cases themselves, or of FEATURE_OVERRIDE_PROPERTIES,
+  which are used by the features of the generator built on the registry (e.g. --size_resources).
+
+When several rules apply to an argument, their properties are merged. Rules for a specific
+tool take precedence over rules for every tool, and later rules (and files) over earlier ones.
+Properties that are objects (e.g. "resources") are merged key by key, recursively.
+"""
+
+import functools
+import hashlib
+import json
+import os
+from typing import *
+
+from .common import GATKVersion, freeze
+
+
+__all__ = ["OVERRIDE_PROPERTIES", "FEATURE_OVERRIDE_PROPERTIES", "OverrideRegistry", "get_overrides", "get_override_digests"]
+
+
+ANY = "*"
+
+OVERRIDE_PROPERTIES = {
+    # Arguments
+    "skip",             # Don't generate any CWL for the argument
+    "gatk_type",        # The GATK type to use instead of the documented one
+    "cwl_type",         # The CWL type of the argument, e.g. "File | File[] | Directory"
+    "input_type",       # A CWL type object to use as-is for the input
+    "secondary_files",  # The secondaryFiles of the input
+    "outputs",          # The CWL outputs for the argument, or the name of a function in OUTPUT_GENERATORS
+    "output_kind",      # "bam", "vcf" or "other": what kind of file the output arguments write (also for tools)
+    # Tools
+    "warning"           # A warning to log when generating the tool
+}
+
+# The properties of the rules used by the features built on the registry, by feature
+FEATURE_OVERRIDE_PROPERTIES = {
+    "resources": {
+        "resources",        # The fields of the tool's ResourceRequirement hint, e.g. {"coresMin": 4}
+        "runtime_default"   # "cores", "tmpdir" or "local_cores": what the argument defaults to when not given
+                            # (see RUNTIME_DEFAULTS)
+    },
+    "--size_resources": {
+        "sizing",           # Formulas for the tool's ResourceRequirement fields from the size of the inputs,
+                            # e.g. {"ramMin": {"base": 4096, "reference": 0.5}} is 4096 MiB plus half the size of the reference
+        "input_kind"        # "reference", "reads" or "variants": what kind of file the input is, for "sizing"
+                            # and its index files (see gatk_tool_to_cwl.get_indexed_input_kind)
+    },
+    "--scatter_workflows": {
+        "gather"            # "vcf", "bam" or "bqsr_report": how to merge the output of the tool run on shards of its
+                            # intervals (see scatter_workflow.GATHER_TOOLS)
+    },
+    "--no_javascript": {
+        "no_javascript"     # Properties of the tool or argument to use instead, e.g. {"secondary_files": [".bai"]}
+    },
+    "--group_engine_arguments": {
+        "engine_argument"   # Whether the argument is grouped into the engine_arguments input
+                            # (see gatk_tool_to_cwl.is_engine_argument)
+    },
+    "--cwl_version": {
+        "inplace_update",   # Whether the argument is a Directory that the tool updates in place, from v1.1
+        "created_directory",  # Whether the argument names a Directory that the tool creates, and may not (an optional
+                              # output), from v1.1
+        "time_limit",       # The ToolTimeLimit hint of the tool in seconds, from v1.1
+        "work_reuse"        # Whether the CWL runner can reuse the outputs of a previous run of the tool on the same inputs
+                            # (the WorkReuse requirement), from v1.1
+    },
+    "--streaming": {
+        "streamable",       # Whether the tool reads or writes the argument's file sequentially, so it can be streamed
+        "stdout_output"     # The output argument that the tool can write to stdout, for the <TOOL>_stdout.cwl tool
+                            # (see streaming.get_stdout_tool)
+    },
+    "--job_templates": {
+        "job_presets"       # The value of the argument in the job templates of each profile,
+                            # e.g. {"low-memory": 1} (see job_templates.JOB_PROFILES)
+    }
+}
+
+_ALL_OVERRIDE_PROPERTIES = OVERRIDE_PROPERTIES.union(*FEATURE_OVERRIDE_PROPERTIES.values())
+
+_RULE_SCOPE_PROPERTIES = {"tool", "argument", "min_version", "max_version", "gatk", "comment"}
+
+DEFAULT_OVERRIDES_PATH = os.path.join(os.path.dirname(__file__), "overrides.json")
+
+
+class _CompiledRule:
+    def __init__(self, rule: Dict) -> None:
+        unknown_properties = rule.keys() - _ALL_OVERRIDE_PROPERTIES - _RULE_SCOPE_PROPERTIES
+        if unknown_properties:
+            raise ValueError(f"Unknown override properties {sorted(unknown_properties)} in rule {rule}")
+
+        self.min_version = GATKVersion(rule["min_version"]) if "min_version" in rule else None
+        self.max_version = GATKVersion(rule["max_version"]) if "max_version" in rule else None
+        self.gatk_major_version = rule.get("gatk")
+        # The values are shared by every argument the rule applies to
+        self.properties = {key: freeze(value) for key, value in rule.items() if key in _ALL_OVERRIDE_PROPERTIES}
+
+    def is_version_dependent(self) -> bool:
+        return self.min_version is not None or self.max_version is not None
+
+    def applies_to(self, gatk_version: GATKVersion) -> bool:
+        return (
+            (self.gatk_major_version is None or (self.gatk_major_version == 3) == gatk_version.is_3())
+            and (self.min_version is None or gatk_version >= self.min_version)
+            and (self.max_version is None or gatk_version < self.max_version)
+        )
+
+
+def _merge_property(value: Any, new_value: Any) -> Any:
+    """
+    Merge the value of a property into the value of the property from earlier rules.
+    Objects are merged key by key, recursively (e.g. a tool's "sizing" of "ramMin" keeps the rest of the
+    default formulas), anything else is replaced.
+    """
+    if not isinstance(value, dict) or not isinstance(new_value, dict):
+        return new_value
+
+    return freeze({
+        **value,
+        **{key: _merge_property(value.get(key), field_value) for key, field_value in new_value.items()}
+    })
+
+
+def _as_list(names: Union[str, List[str]]) -> List[str]:
+    return [names] if isinstance(names, str) else names
+
+
+class OverrideRegistry:
+    """
+    The override rules, compiled to a dispatch table keyed by (tool name, argument name).
+    """
+    def __init__(self, rules: Iterable[Dict]) -> None:
+        self._dispatch_table: Dict[Tuple[str, str], List[_CompiledRule]] = {}
+        self._cache: Dict[Tuple[str, str, GATKVersion, bool], Dict] = {}
+
+        for rule in rules:
+            compiled_rule = _CompiledRule(rule)
+
+            for tool_name in _as_list(rule.get("tool", ANY)):
+                for argument_name in _as_list(rule.get("argument", ANY)):
+                    self._dispatch_table.setdefault((tool_name, argument_name), []).append(compiled_rule)
+
+    @classmethod
+    def from_files(cls, paths: Iterable[str]) -> "OverrideRegistry":
+        rules: List[Dict] = []
+
+        for path in paths:
+            with open(path) as file:
+                file_rules = json.load(file)
+
+            if not isinstance(file_rules, list):
+                raise ValueError(f"Override file {path} should contain a list of rules")
+
+            rules.extend(file_rules)
+
+        return cls(rules)
+
+    def lookup(self, tool_name: str, argument_name: str, gatk_version: GATKVersion, javascript: bool = True) -> Dict:
+        """
+        Return the merged properties of the rules for an argument of a tool.
+        The returned values are shared, and frozen.
+
+        :param javascript: if False, the "no_javascript" properties are used instead of the others
+        """
+        key = (tool_name, argument_name, gatk_version, javascript)
+
+        try:
+            return self._cache[key]
+        except KeyError:
+            pass
+
+        properties: Dict = {}
+        for rule_key in ((ANY, argument_name), (tool_name, argument_name)):
+            for rule in self._dispatch_table.get(rule_key, ()):
+                if rule.applies_to(gatk_version):
+                    for property_name, value in rule.properties.items():
+                        properties[property_name] = _merge_property(properties.get(property_name), value)
+
+        if not javascript:
+            properties.update(properties.pop("no_javascript", {}))
+
+        self._cache[key] = freeze(properties)
+        return self._cache[key]
+
+    def lookup_tool(self, tool_name: str, gatk_version: GATKVersion, javascript: bool = True) -> Dict:
+        """
+        Return the merged properties of the rules for a tool.
+        """
+        return self.lookup(tool_name, ANY, gatk_version, javascript)
+
+    def is_version_dependent(self, tool_name: str, argument_name: str) -> bool:
+        """
+        Return whether the rules for an argument depend on the exact GATK version, rather than just its major version.
+        """
+        return any(
+            rule.is_version_dependent()
+            for rule_key in ((ANY, argument_name), (tool_name, argument_name))
+            for rule in self._dispatch_table.get(rule_key, ())
+        )
+
+
+@functools.lru_cache(maxsize=None)
+def _get_overrides(paths: Tuple[str, ...]) -> OverrideRegistry:
+    return OverrideRegistry.from_files((DEFAULT_OVERRIDES_PATH,) + paths)
+
+def get_overrides(paths: Iterable[str] = None) -> OverrideRegistry:
+    """
+    Return the registry of the built in rules, followed by the rules in the given files.
+    """
+    return _get_overrides(tuple(paths or ()))
+
+def get_override_digests(paths: Iterable[str] = None) -> List[str]:
+    """
+    Return digests of the contents of the built in rules file, followed by the given files,
+    which change when the rules do (e.g. when a file is edited, or the generator upgraded).
+    """
+    digests = []
+
+    for path in (DEFAULT_OVERRIDES_PATH,) + tuple(paths or ()):
+        with open(path, "rb") as file:
+            digests.append(hashlib.blake2b(file.read(), digest_size=16).hexdigest())
+
+    return digests
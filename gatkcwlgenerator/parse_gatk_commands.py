@@ -8,27 +8,18 @@ from gatkcwlgenerator.cwl_type_ast import *
 
 COMMAND_STARTS = ("java -jar ", "gatk ")
 
-ParsedCommand = namedtuple("ParsedCommand", ["program_name", "positional_arguments", "arguments"])
-
-def parse_program_command(command: str) -> ParsedCommand:
-    # below is not parsed in shlex, so do it for it
-    command = command.replace("\\\n", "")
-    # Remove technically-invalid but frequently-used comments after a line continuation.
-    command = re.sub(r"\\\s+#.*$", "", command, flags=re.MULTILINE)
-    # Split up arguments like "--foo=bar".
-    command = re.sub(r"(--\S+)=(\S+)", r"\1 \2", command)
-    lexed_command = shlex.split(command, comments=True, posix=False)
-    program_name = lexed_command[0]
+ParsedCommand = namedtuple("ParsedCommand", ["program_name", "positional_arguments", "arguments", "spark_arguments"])
 
+def parse_arguments(elements: List[str]) -> Tuple[List[str], Dict[str, Union[str, List[str], bool]]]:
+    """
+    Parse lexed command line arguments into (positional arguments, arguments).
+    """
     arguments: Dict[str, Union[str, List[str], bool]] = {}
     positional_arguments: List[str] = []
 
     cmdline_key: Optional[str] = None
 
-    for element in lexed_command[1:]:
-        if element == "--":
-            # It seems that, usually, anything after "--" is Spark configuration that we don't have types for.
-            break
+    for element in elements:
         if element[0] == "-":
             if cmdline_key is not None:
                 if arguments.get(cmdline_key):
@@ -65,10 +56,35 @@ def parse_program_command(command: str) -> ParsedCommand:
             raise Exception(f"Cannot have two boolean arguments. Found two of {cmdline_key}.")
         arguments[cmdline_key] = True
 
+    return positional_arguments, arguments
+
+def parse_program_command(command: str) -> ParsedCommand:
+    # below is not parsed in shlex, so do it for it
+    command = command.replace("\\\n", "")
+    # Remove technically-invalid but frequently-used comments after a line continuation.
+    command = re.sub(r"\\\s+#.*$", "", command, flags=re.MULTILINE)
+    # Split up arguments like "--foo=bar".
+    command = re.sub(r"(--[^\s=]+)=(\S+)", r"\1 \2", command)
+    lexed_command = shlex.split(command, comments=True, posix=False)
+    program_name = lexed_command[0]
+
+    elements = lexed_command[1:]
+    spark_elements: List[str] = []
+
+    if "--" in elements:
+        # Anything after "--" is Spark configuration, e.g. "-- --spark-runner LOCAL --spark-master local[4]".
+        # Some of these are arguments of the Spark tools, the others are for the gatk launcher script.
+        spark_elements = elements[elements.index("--") + 1:]
+        elements = elements[:elements.index("--")]
+
+    positional_arguments, arguments = parse_arguments(elements)
+    _, spark_arguments = parse_arguments(spark_elements)
+
     return ParsedCommand(
         program_name=program_name,
         positional_arguments=positional_arguments,
-        arguments=arguments
+        arguments=arguments,
+        spark_arguments=spark_arguments
     )
 
 T = TypeVar("T")
@@ -78,7 +94,7 @@ def remove_from_dict_if_exists(input_dict: Dict[T, Any], keys: Iterable[T]) -> N
         if input_dict.get(key) is not None:
             del input_dict[key]
 
-GATKCommand = namedtuple("GATKCommand", ["tool_name", "arguments"])
+GATKCommand = namedtuple("GATKCommand", ["tool_name", "arguments", "spark_arguments"])
 def parse_gatk_command(gatk_command: str) -> Optional[GATKCommand]:
     parsed_command = parse_program_command(gatk_command)
 
@@ -105,7 +121,8 @@ def parse_gatk_command(gatk_command: str) -> Optional[GATKCommand]:
 
     return GATKCommand(
         tool_name=gatk_tool_name,
-        arguments=arguments
+        arguments=arguments,
+        spark_arguments=parsed_command.spark_arguments
     )
 
 def parse_gatk_pre_box(pre_box_text: str) -> List[GATKCommand]:
@@ -0,0 +1,293 @@
+"""
+Generating companion scatter-gather workflows for tools that take intervals.
+
+The workflow splits the intervals into shards with SplitIntervals, runs the tool on each
+shard in parallel, and gathers the outputs with the GATK tool that merges them.
+"""
+
+import logging
+from collections import namedtuple
+from typing import *
+
+from .common import GATKVersion
+from .GATK_classes import *
+from .overrides import get_overrides
+
+_logger = logging.getLogger("gatkcwlgenerator")
+
+
+# How to gather an output: the GATK tool that merges the shards, the extra arguments
+# to give it, and the secondaryFiles of the merged output (with and without JavaScript).
+GatherTool = namedtuple("GatherTool", ["tool_name", "arguments", "secondary_files", "secondary_files_without_javascript"])
+
+# The kinds of output in the "gather" override property
+GATHER_TOOLS = {
+    "vcf": GatherTool(
+        "MergeVcfs",
+        [],
+        ["$(self.basename + (self.basename.endsWith('.gz')? '.tbi' : '.idx'))"],
+        [".tbi", ".idx"]
+    ),
+    "bam": GatherTool(
+        "GatherBamFiles",
+        ["--CREATE_INDEX", "true"],
+        ["^.bai"],
+        ["^.bai"]
+    ),
+    "bqsr_report": GatherTool(
+        "GatherBQSRReports",
+        [],
+        [],
+        []
+    )
+}
+
+# The argument of the tools whose output is gathered
+GATHERED_ARGUMENT = "output"
+
+SPLIT_INTERVALS_DIR = "shards"
+
+DEFAULT_SCATTER_COUNT = 4
+
+
+def _get_input(cwl: Dict, input_id: str) -> Optional[Dict]:
+    return next((cwl_input for cwl_input in cwl["inputs"] if cwl_input["id"] == input_id), None)
+
+def _get_argument_inputs(cwl: Dict, input_id: str) -> List[Dict]:
+    """
+    Return the input with the given id and its tags input, if it has one.
+    """
+    return [
+        cwl_input for cwl_input in (_get_input(cwl, input_id), _get_input(cwl, input_id + "_tags"))
+        if cwl_input is not None
+    ]
+
+def _without_input_binding(cwl_input: Dict) -> Dict:
+    return {key: value for key, value in cwl_input.items() if key != "inputBinding"}
+
+def _without_type_input_bindings(cwl_type: Any) -> Any:
+    """
+    Return a CWL type object without the inputBindings of its array types, which
+    workflow inputs can't have from CWL v1.1.
+    """
+    if isinstance(cwl_type, list):
+        return [_without_type_input_bindings(item) for item in cwl_type]
+    elif isinstance(cwl_type, dict):
+        return {
+            key: _without_type_input_bindings(value) if key in ("items", "fields", "type") else value
+            for key, value in cwl_type.items()
+            if key != "inputBinding"
+        }
+
+    return cwl_type
+
+def get_workflow_input(cwl_input: Dict, cwl_version: str) -> Dict:
+    """
+    Return the workflow input for an input of the scattered tool.
+    """
+    workflow_input = _without_input_binding(cwl_input)
+
+    if cwl_version != "v1.0":
+        workflow_input["type"] = _without_type_input_bindings(workflow_input["type"])
+
+    return workflow_input
+
+def get_split_intervals_tool(
+        base_command: List[str],
+        reference_inputs: List[Dict],
+        interval_inputs: List[Dict],
+        javascript: bool = True
+    ) -> Dict:
+    """
+    Return a CommandLineTool that splits the intervals into a number of shards with SplitIntervals.
+
+    :param reference_inputs: the reference inputs of the scattered tool (the reference and its tags)
+    :param interval_inputs: the intervals inputs of the scattered tool (the intervals and their tags)
+    """
+    shards_binding = {
+        "glob": f"{SPLIT_INTERVALS_DIR}/*.interval_list"
+    }
+    if javascript:
+        # The shards are gathered in the order of their names, which is the order of the intervals.
+        # Without JavaScript, this relies on the runner sorting the files matched by the glob, as cwltool does.
+        shards_binding["outputEval"] = "$(self.sort(function(a, b) { return a.basename < b.basename ? -1 : 1; }))"
+
+    return {
+        "class": "CommandLineTool",
+        "baseCommand": base_command + ["SplitIntervals"],
+        "arguments": [
+            {
+                "prefix": "--output",
+                "valueFrom": SPLIT_INTERVALS_DIR
+            }
+        ],
+        "inputs": reference_inputs + interval_inputs + [
+            {
+                "id": "scatter_count",
+                "type": "int",
+                "inputBinding": {
+                    "prefix": "--scatter-count"
+                }
+            }
+        ],
+        "outputs": [
+            {
+                "id": "shards",
+                "type": "File[]",
+                "outputBinding": shards_binding
+            }
+        ]
+    }
+
+def get_gather_tool(base_command: List[str], gather_tool: GatherTool, javascript: bool = True) -> Dict:
+    """
+    Return a CommandLineTool that merges the outputs of the shards into one file.
+    """
+    gathered_output = {
+        "id": "gathered",
+        "type": "File",
+        "outputBinding": {
+            "glob": "$(inputs.output_filename)"
+        }
+    }
+
+    secondary_files = gather_tool.secondary_files if javascript else gather_tool.secondary_files_without_javascript
+    if secondary_files:
+        gathered_output["secondaryFiles"] = secondary_files
+
+    return {
+        "class": "CommandLineTool",
+        "baseCommand": base_command + [gather_tool.tool_name] + gather_tool.arguments,
+        "inputs": [
+            {
+                "id": "shards",
+                "type": {
+                    "type": "array",
+                    "items": "File",
+                    "inputBinding": {
+                        "prefix": "-I"
+                    }
+                }
+            },
+            {
+                "id": "output_filename",
+                "type": "string",
+                "inputBinding": {
+                    "prefix": "-O"
+                }
+            }
+        ],
+        "outputs": [gathered_output]
+    }
+
+def get_scatter_workflow(gatk_tool: GATKTool, tool_cwl: Dict, cmd_line_options) -> Optional[Dict]:
+    """
+    Return a Workflow that runs the tool (generated as tool_cwl) scattered over shards of its intervals,
+    or None if it isn't known how to gather the tool's output (see the "gather" override property).
+    """
+    from .gatk_argument_to_cwl import get_input_argument_name
+
+    version = GATKVersion(cmd_line_options.version)
+    javascript = not cmd_line_options.no_javascript
+    overrides = get_overrides(cmd_line_options.overrides)
+    gather_kind = overrides.lookup_tool(gatk_tool.name, version, javascript).get("gather")
+
+    if gather_kind is None:
+        return None
+
+    try:
+        intervals_argument = gatk_tool.get_argument("--intervals")
+        reference_argument = gatk_tool.get_argument("--reference")
+        gathered_argument = gatk_tool.get_argument("--" + GATHERED_ARGUMENT)
+    except KeyError as error:
+        _logger.warning(f"Not generating a scatter workflow for {gatk_tool.name}, as it has no argument {error}")
+        return None
+
+    intervals_id = get_input_argument_name(intervals_argument, version)
+    interval_inputs = _get_argument_inputs(tool_cwl, intervals_id)
+    reference_inputs = _get_argument_inputs(tool_cwl, get_input_argument_name(reference_argument, version))
+
+    if not interval_inputs or not reference_inputs:
+        _logger.warning(f"Not generating a scatter workflow for {gatk_tool.name}, as it has no intervals or reference input")
+        return None
+    output_filename_id = get_input_argument_name(gathered_argument, version)
+
+    base_command = cmd_line_options.gatk_command.split(" ")
+
+    workflow_inputs = [get_workflow_input(cwl_input, tool_cwl["cwlVersion"]) for cwl_input in tool_cwl["inputs"]] + [
+        {
+            "doc": "The number of shards to split the intervals into, which are processed in parallel",
+            "id": "scatter_count",
+            "type": "int",
+            "default": DEFAULT_SCATTER_COUNT
+        }
+    ]
+
+    # The workflow needs the tool's schema definitions for its inputs, and its expression
+    # library (if it has one) and container for the SplitIntervals and gather tools
+    requirements = [
+        requirement for requirement in tool_cwl["requirements"]
+        if requirement["class"] in ("InlineJavascriptRequirement", "SchemaDefRequirement", "DockerRequirement")
+    ] + [
+        {
+            "class": "ScatterFeatureRequirement"
+        }
+    ]
+
+    sharded_intervals_input = {"id": intervals_id, "source": "split_intervals/shards"}
+
+    if not javascript:
+        # Without JavaScript, the tool's intervals input only accepts arrays, so each shard is wrapped in one.
+        # This is the only expression in the workflow, and is evaluated by the runner rather than in the tool's job.
+        sharded_intervals_input["valueFrom"] = "$([self])"
+        if not any(requirement["class"] == "InlineJavascriptRequirement" for requirement in requirements):
+            requirements.insert(0, {"class": "InlineJavascriptRequirement"})
+        requirements.append({"class": "StepInputExpressionRequirement"})
+
+    return {
+        "id": f"{gatk_tool.name}_scatter",
+        "cwlVersion": tool_cwl["cwlVersion"],
+        "class": "Workflow",
+        "doc": f"Runs {gatk_tool.name} on shards of the intervals in parallel, and merges the outputs " +
+            f"with {GATHER_TOOLS[gather_kind].tool_name}",
+        "requirements": requirements,
+        "inputs": workflow_inputs,
+        "outputs": [
+            {
+                "id": gathered_argument.name,
+                "type": "File",
+                "outputSource": "gather/gathered"
+            }
+        ],
+        "steps": [
+            {
+                "id": "split_intervals",
+                "run": get_split_intervals_tool(base_command, reference_inputs, interval_inputs, javascript),
+                "in": [
+                    {"id": cwl_input["id"], "source": cwl_input["id"]}
+                    for cwl_input in reference_inputs + interval_inputs
+                ] + [{"id": "scatter_count", "source": "scatter_count"}],
+                "out": ["shards"]
+            },
+            {
+                "id": "scatter",
+                "run": f"{gatk_tool.name}.cwl",
+                "scatter": intervals_id,
+                "in": [
+                    {"id": cwl_input["id"], "source": cwl_input["id"]}
+                    for cwl_input in tool_cwl["inputs"]
+                    if cwl_input not in interval_inputs
+                ] + [sharded_intervals_input],
+                "out": [gathered_argument.name]
+            },
+            {
+                "id": "gather",
+                "run": get_gather_tool(base_command, GATHER_TOOLS[gather_kind], javascript),
+                "in": [
+                    {"id": "shards", "source": f"scatter/{gathered_argument.name}"},
+                    {"id": "output_filename", "source": output_filename_id}
+                ],
+                "out": ["gathered"]
+            }
+        ]
+    }
@@ -0,0 +1,91 @@
+"""
+Generating variants of tools that write their main output to stdout, so that a CWL runner
+that supports streaming can pipe it to the next step rather than writing it to disk.
+
+The variant of a tool is the same as the tool, except that the output argument (see the
+"stdout_output" override property) is /dev/stdout, which is captured as the file named by
+the output argument's input. As an index or MD5 can't be written for a stream, these are
+turned off.
+"""
+
+from typing import *
+
+from .common import GATKVersion
+from .GATK_classes import *
+from .overrides import get_overrides
+
+# The arguments that write side files of the output, which would fail when writing to stdout
+SIDE_FILE_ARGUMENTS = [
+    "create-output-bam-index",
+    "create-output-bam-md5",
+    "create-output-variant-index",
+    "create-output-variant-md5"
+]
+
+STDOUT_PATH = "/dev/stdout"
+
+
+def get_stdout_tool(gatk_tool: GATKTool, tool_cwl: Dict, cmd_line_options) -> Optional[Dict]:
+    """
+    Return a CommandLineTool that is tool_cwl writing its main output to stdout, or
+    None if the tool can't (see the "stdout_output" override property).
+    """
+    from .gatk_argument_to_cwl import get_input_argument_name
+
+    version = GATKVersion(cmd_line_options.version)
+    javascript = not cmd_line_options.no_javascript
+    overrides = get_overrides(cmd_line_options.overrides)
+    stdout_output = overrides.lookup_tool(gatk_tool.name, version, javascript).get("stdout_output")
+
+    if stdout_output is None:
+        return None
+
+    output_argument = gatk_tool.get_argument("--" + stdout_output)
+    output_input_id = get_input_argument_name(output_argument, version)
+
+    side_file_arguments = [
+        argument for argument in gatk_tool.arguments
+        if argument.name in SIDE_FILE_ARGUMENTS
+    ]
+    removed_input_ids = {get_input_argument_name(argument, version) for argument in side_file_arguments}
+
+    inputs = []
+    for cwl_input in tool_cwl["inputs"]:
+        if cwl_input["id"] == output_input_id:
+            # The input is the name of the file stdout is captured to
+            inputs.append({key: value for key, value in cwl_input.items() if key != "inputBinding"})
+        elif cwl_input["id"] not in removed_input_ids:
+            inputs.append(cwl_input)
+
+    arguments = tool_cwl.get("arguments", []) + [
+        {
+            "prefix": output_argument.long_prefix,
+            "valueFrom": STDOUT_PATH
+        }
+    ] + [
+        {
+            "prefix": argument.long_prefix,
+            "valueFrom": "false"
+        }
+        for argument in side_file_arguments
+    ]
+
+    outputs = [
+        {
+            "id": cwl_output["id"],
+            "doc": cwl_output["doc"],
+            "type": "stdout"
+        } if cwl_output["id"] == output_argument.name else cwl_output
+        for cwl_output in tool_cwl["outputs"]
+    ]
+
+    return {
+        **tool_cwl,
+        "id": f"{gatk_tool.name}_stdout",
+        "doc": f"{gatk_tool.name}, writing {output_argument.long_prefix} to stdout, so that it can be streamed to " +
+            "the next step.\n\n" + tool_cwl["doc"],
+        "arguments": arguments,
+        "inputs": inputs,
+        "outputs": outputs,
+        "stdout": f"$(inputs['{output_input_id}'])"
+    }
@@ -1,4 +1,7 @@
 import string
+from typing import *
+
+from gatkcwlgenerator.GATK_classes import GATKTool
 
 
 TESTED_VERSIONS = [
@@ -32,3 +35,66 @@ def escape_for_mark(s: str, initial_char: str = None) -> str:
     return initial_char + "".join(
         c if c in ALLOWED_CHARACTERS else "_" for c in s
     )
+
+
+def get_argument(
+        name: str,
+        gatk_type: str = "String",
+        summary: str = "An argument",
+        required: str = "no",
+        synonyms: str = "NA",
+        default_value: str = "NA",
+        options: List[Dict] = None,
+        fulltext: str = ""
+    ) -> Dict:
+    """
+    Return the documentation of a GATK argument, as in the JSON documentation of a tool.
+    """
+    return {
+        "name": name,
+        "type": gatk_type,
+        "summary": summary,
+        "required": required,
+        "synonyms": synonyms,
+        "defaultValue": default_value,
+        "options": [] if options is None else options,
+        "fulltext": fulltext
+    }
+
+
+def get_gatk_tool(name: str, arguments: List[Dict], description: str = "A tool") -> GATKTool:
+    """
+    Return a GATK tool with the given arguments (see get_argument), and no extra arguments.
+    """
+    return GATKTool({"name": name, "description": description, "arguments": arguments}, [])
+
+
+HAPLOTYPE_CALLER_DESCRIPTION = """<p>Call germline SNPs and indels</p>
+<pre>
+ gatk --java-options "-Xmx4g" HaplotypeCaller  \\
+   -R Homo_sapiens_assembly38.fasta \\
+   -I input.bam \\
+   -O output.g.vcf.gz \\
+   -L chr20 \\
+   --max-reads-per-alignment-start 10
+</pre>"""
+
+
+def get_haplotype_caller_tool(description: str = HAPLOTYPE_CALLER_DESCRIPTION) -> GATKTool:
+    """
+    Return HaplotypeCaller with a few of its arguments, and an example command in its description.
+    """
+    return GATKTool({
+        "name": "HaplotypeCaller",
+        "description": description,
+        "arguments": [
+            get_argument("--reference", "String", "Reference sequence file", "yes", "-R"),
+            get_argument("--input", "List[String]", "BAM/SAM/CRAM file containing reads", "yes", "-I"),
+            get_argument("--output", "File", "File to which variants should be written", "yes", "-O"),
+            get_argument("--intervals", "List[String]", "One or more genomic intervals over which to operate", synonyms="-L"),
+            get_argument("--max-reads-per-alignment-start", "int", "Maximum number of reads to retain per alignment start position"),
+            get_argument("--smith-waterman", "String", "Which Smith-Waterman implementation to use"),
+            {**get_argument("--disable-bam-index-caching", "boolean", "If true, don't cache bam indexes"), "kind": "common"},
+            {**get_argument("--use-jdk-deflater", "boolean", "Whether to use the JdkDeflater (as opposed to IntelDeflater)"), "kind": "common"}
+        ]
+    }, [])
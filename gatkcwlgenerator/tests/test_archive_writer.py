@@ -0,0 +1,41 @@
+import os
+import tarfile
+import zipfile
+
+import pytest
+
+from gatkcwlgenerator.archive_writer import ArchiveWriter, get_archive_format
+
+
+FILES = {
+    "root/3.8-0/cwl/HaplotypeCaller.cwl": b"id: HaplotypeCaller\n",
+    "root/3.8-0/json/HaplotypeCaller.json": b"{}",
+    # Large enough to be compressed in several chunks
+    "root/4.0.0.0/json/" + "LongName" * 20 + ".json": os.urandom(1 << 19) * 5,
+    "root/4.0.0.0/cwl/Empty.cwl": b""
+}
+
+
+def test_get_archive_format():
+    assert get_archive_format("release.zip") == "zip"
+    assert get_archive_format("release.tgz") == "gz"
+    assert get_archive_format("release.tar.bz2") == "bz2"
+
+    with pytest.raises(ValueError):
+        get_archive_format("release.rar")
+
+
+def test_archive_writer(tmpdir):
+    archive_paths = [str(tmpdir.join(name)) for name in ("release.zip", "release.tgz", "release.tar.bz2")]
+
+    with ArchiveWriter(archive_paths, jobs=3) as archive_writer:
+        for name, data in FILES.items():
+            archive_writer.add_file(name, data)
+
+    with zipfile.ZipFile(archive_paths[0]) as zip_file:
+        assert zip_file.testzip() is None
+        assert {name: zip_file.read(name) for name in zip_file.namelist()} == FILES
+
+    for archive_path in archive_paths[1:]:
+        with tarfile.open(archive_path) as tar_file:
+            assert {member.name: tar_file.extractfile(member).read() for member in tar_file} == FILES
@@ -0,0 +1,51 @@
+from gatkcwlgenerator.argument_store import ArgumentStore
+from gatkcwlgenerator.gatk_tool_to_cwl import gatk_tool_to_cwl
+from gatkcwlgenerator.main import parse_cmdline_arguments
+from gatkcwlgenerator.tests.globals import get_argument, get_gatk_tool
+
+
+def record_tool(argument_store: ArgumentStore, name: str, version: str, arguments: list) -> None:
+    gatk_tool = get_gatk_tool(name, arguments)
+    tool_cwl = gatk_tool_to_cwl(gatk_tool, parse_cmdline_arguments(["--version", version]), [])
+
+    argument_store.record_tool(gatk_tool, tool_cwl, version)
+
+
+def test_find(tmp_path):
+    with ArgumentStore(str(tmp_path / "arguments.sqlite")) as argument_store:
+        for version in ("4.0.6.0", "4.0.10.0"):
+            record_tool(argument_store, "HaplotypeCaller", version, [get_argument("--intervals", "List[String]", synonyms="-L")])
+            record_tool(argument_store, "CountReads", version, [get_argument("--intervals", "List[String]", synonyms="-L")])
+        record_tool(argument_store, "PrintReads", "4.0.6.0", [get_argument("--output", "File")])
+
+    # The store persists
+    with ArgumentStore(str(tmp_path / "arguments.sqlite")) as argument_store:
+        assert argument_store.get_versions() == ["4.0.6.0", "4.0.10.0"]
+
+        records = argument_store.find(argument="--intervals", versions=["4.0.6.0"])
+        assert [record.tool for record in records] == ["CountReads", "HaplotypeCaller"]
+        assert records[0].synonym == "L"
+        assert records[0].gatk_type == "List[String]"
+        assert records[0].cwl_type is not None
+
+        assert argument_store.find(argument="L") == argument_store.find(argument="intervals")
+        assert [record.version for record in argument_store.find("HaplotypeCaller", "intervals")] == ["4.0.6.0", "4.0.10.0"]
+
+        # The output argument has the type of its filename input
+        assert argument_store.find("PrintReads", "output")[0].cwl_type == "string?"
+
+
+def test_get_changes(tmp_path):
+    with ArgumentStore(str(tmp_path / "arguments.sqlite")) as argument_store:
+        record_tool(argument_store, "HaplotypeCaller", "4.0.0.0", [])
+        record_tool(argument_store, "HaplotypeCaller", "4.0.6.0", [get_argument("--min-base-quality-score", "byte", default_value="10")])
+        record_tool(argument_store, "HaplotypeCaller", "4.0.8.0", [get_argument("--min-base-quality-score", "byte", default_value="10")])
+        record_tool(argument_store, "HaplotypeCaller", "4.0.10.0", [get_argument("--min-base-quality-score", "byte", default_value="12")])
+        record_tool(argument_store, "HaplotypeCaller", "4.0.11.0", [])
+
+        changes = argument_store.get_changes("HaplotypeCaller", "min-base-quality-score")
+
+    assert [change.version for change in changes] == ["4.0.6.0", "4.0.10.0", "4.0.11.0"]
+    assert changes[0].old is None
+    assert (changes[1].old.default_value, changes[1].new.default_value) == ("10", "12")
+    assert changes[2].new is None
@@ -0,0 +1,74 @@
+import os
+
+import pytest
+
+from gatkcwlgenerator.benchmark import *
+from gatkcwlgenerator.cwl_yaml import dump_cwl
+from gatkcwlgenerator.gatk_tool_to_cwl import gatk_tool_to_cwl
+from gatkcwlgenerator.main import parse_cmdline_arguments
+from gatkcwlgenerator.tests.globals import get_argument, get_gatk_tool
+
+
+def test_get_benchmark_name():
+    assert get_benchmark_name(os.path.join("gatk_cmdline_tools", "4.0.6.0", "cwl", "HaplotypeCaller.cwl")) == \
+        "4.0.6.0/HaplotypeCaller"
+    assert get_benchmark_name(os.path.join("out", "3.8-0", "PrintReads.cwl")) == "3.8-0/PrintReads"
+
+
+def test_get_regressions():
+    baseline_benchmark = ToolBenchmark("4.0.6.0/PrintReads", 1000, 10, 0.010, 0.020)
+
+    assert get_regressions(baseline_benchmark, baseline_benchmark, SIZE_FIELDS + TIME_FIELDS, 0.0) == []
+    assert get_regressions(baseline_benchmark._replace(size=1100), baseline_benchmark, SIZE_FIELDS, 0.2) == []
+    assert get_regressions(baseline_benchmark._replace(size=1500, parse_seconds=1.0), baseline_benchmark, SIZE_FIELDS, 0.2) == \
+        ["size +50% (1000 bytes -> 1500 bytes)"]
+
+
+def test_baseline(tmpdir):
+    tool_benchmarks = [
+        ToolBenchmark("4.0.6.0/PrintReads", 1000, 10, 0.010, 0.020),
+        ToolBenchmark("4.0.6.0/MergeVcfs", 500, 5, 0.005, 0.010)
+    ]
+    baseline_path = str(tmpdir.join("baseline.json"))
+
+    save_baseline(tool_benchmarks, baseline_path)
+    assert load_baseline(baseline_path) == {tool_benchmark.name: tool_benchmark for tool_benchmark in tool_benchmarks}
+
+    assert get_total("total", tool_benchmarks) == ToolBenchmark("total", 1500, 15, 0.015, 0.030)
+
+
+def test_get_missing_names():
+    baseline = {
+        name: ToolBenchmark(name, 1000, 10, 0.010, 0.020)
+        for name in ["4.0.6.0/PrintReads", "4.0.6.0/MergeVcfs", "4.0.0.0/PrintReads"]
+    }
+
+    # Only the tools of the benchmarked versions are compared
+    assert get_missing_names(baseline, ["4.0.6.0/PrintReads", "4.0.6.0/MergeVcfs"], ["4.0.6.0/PrintReads"]) == \
+        ["4.0.6.0/MergeVcfs"]
+    assert get_missing_names(baseline, ["4.0.6.0/PrintReads"], ["4.0.6.0/PrintReads"]) == ["4.0.6.0/MergeVcfs"]
+    assert get_missing_names(baseline, ["4.0.0.0/PrintReads"], ["4.0.0.0/PrintReads"]) == []
+
+
+def test_benchmark_main(tmpdir, capsys):
+    pytest.importorskip("cwltool")
+
+    cwl_dir = tmpdir.mkdir("4.0.6.0").mkdir("cwl")
+    cmd_line_options = parse_cmdline_arguments(["--version", "4.0.6.0"])
+    for name in ["PrintReads", "SelectVariants", "HaplotypeCaller"]:
+        gatk_tool = get_gatk_tool(name, [get_argument("--output", "File", "Write output to this file", "yes", "-O", "null")])
+        cwl_dir.join(name + ".cwl").write(dump_cwl(gatk_tool_to_cwl(gatk_tool, cmd_line_options, [])))
+
+    baseline_path = str(tmpdir.join("baseline.json"))
+    benchmark_main([str(cwl_dir), "--repeats", "1", "--save_baseline", baseline_path])
+
+    # A tool that can't be loaded, or is missing, fails the comparison, although the others aren't heavier
+    cwl_dir.join("HaplotypeCaller.cwl").write("cwlVersion: v1.0\nclass: CommandLineTool\ninputs: [\n")
+    cwl_dir.join("SelectVariants.cwl").remove()
+    with pytest.raises(SystemExit) as exit_info:
+        benchmark_main([str(cwl_dir), "--repeats", "1", "--baseline", baseline_path, "--time_tolerance", "100"])
+
+    assert exit_info.value.code == 1
+    output = capsys.readouterr().out
+    assert "4.0.6.0/HaplotypeCaller: couldn't be loaded" in output
+    assert "4.0.6.0/SelectVariants is in the baseline, but wasn't benchmarked" in output
@@ -0,0 +1,141 @@
+import json
+import subprocess
+
+import pytest
+
+from gatkcwlgenerator.command_line import *
+from gatkcwlgenerator.cwl_yaml import dump_cwl
+from gatkcwlgenerator.gatk_tool_to_cwl import gatk_tool_to_cwl, get_js_library
+from gatkcwlgenerator.main import parse_cmdline_arguments
+from gatkcwlgenerator.tests.globals import get_haplotype_caller_tool
+from gatkcwlgenerator.validate import find_node
+
+RUNTIME = {"cores": 2, "ram": 1000, "tmpdir": "/tmp"}
+
+JOB = {
+    "reference": {"class": "File", "path": "/ref/hg38.fasta"},
+    "input": [{"class": "File", "path": "/a.bam"}, {"class": "File", "path": "/b.bam"}],
+    "input_tags": ["normal", ["tumor", "1"]],
+    "output-filename": "out.vcf",
+    "intervals": ["chr1", "chr2"],
+    "max-reads-per-alignment-start": 10,
+    "use-jdk-deflater": False
+}
+
+EXPRESSIONS = [
+    ("$(generateGATK4BooleanValue())", True),
+    ("$(generateGATK4BooleanValue())", 2.0),
+    ("$(generateArrayCmd('--x'))", ["a", 0.5]),
+    ("$(generateArrayCmd('--x'))", ""),
+    ("$(applyTagsToArgument('--x', ['t', ['u', 'v']]))", ["a", "b"]),
+    ("$(applyTagsToArgument('--x', [1, null]))", "a"),
+    ("$(applyTagsToArgument('--x', null))", ["a"]),
+    ("$('-Xmx' + (self == null ? Math.floor(1000 * 0.8) : self) + 'm')", None),
+    ("$('-Xmx' + (self == null ? Math.floor(1000 * 0.8) : self) + 'm')", 1e-7),
+    ("$(self == null ? 'local[' + 4 + ']' : self)", 0)
+]
+
+
+def test_library_functions():
+    assert generate_gatk4_boolean_value(False) == "false"
+    assert generate_gatk4_boolean_value(1.5) == 1.5
+
+    assert generate_array_cmd("a", "--x") == ["--x", "a"]
+    assert generate_array_cmd([], "--x") == []
+    assert generate_array_cmd(0, "--x") is None
+
+    assert apply_tags_to_argument(["a", "b"], "--x", ["t", ["u", "v"]]) == ["--x:t", "a", "--x:u,v", "b"]
+    assert apply_tags_to_argument("a", "--x", "") == ["--x", "a"]
+    assert apply_tags_to_argument(None, "--x", "t") is None
+
+    with pytest.raises(TypeError):
+        apply_tags_to_argument(["a", "b"], "--x", ["t"])
+
+
+def test_number_to_string():
+    assert number_to_string(2.0) == "2"
+    assert number_to_string(0.5) == "0.5"
+    assert number_to_string(0.000001) == "0.000001"
+    assert number_to_string(1e-7) == "1e-7"
+    assert number_to_string(1.5e21) == "1.5e+21"
+    assert number_to_string(-123.25) == "-123.25"
+
+
+def test_interpolate():
+    context = {"inputs": {"x": None, "y": 3}, "self": 1.0, "runtime": {"cores": 4, "ram": 1000}}
+
+    assert interpolate("-Xmx$(self)m", context) == "-Xmx1.0m"
+    assert interpolate("$(self)", context) == 1.0
+    assert interpolate("$(generateGATK4BooleanValue())", context) == 1
+    assert interpolate("$(inputs['x'] == null ? 'local[' + runtime.cores + ']' : inputs['x'])", context) == "local[4]"
+    assert interpolate("$(Math.floor(runtime.ram * 0.8) + inputs.y)", context) == 803
+    assert interpolate("\\$(self)", context) == "$(self)"
+
+    with pytest.raises(UnsupportedExpressionError):
+        interpolate("$(inputs.x.map(function(x) { return x; }))", context)
+
+
+def test_render_command_line():
+    tool_cwl = gatk_tool_to_cwl(get_haplotype_caller_tool(), parse_cmdline_arguments(["--version", "4.0.6.0"]), [])
+
+    assert [argument for argument, _ in render_arguments(tool_cwl, JOB, RUNTIME)] == [
+        "java", "-Xmx800m", "-XX:ParallelGCThreads=2", "-Djava.io.tmpdir=/tmp", "-jar", "/gatk/gatk.jar", "HaplotypeCaller",
+        "--input:normal", "/a.bam", "--input:tumor,1", "/b.bam", "--intervals", "chr1", "--intervals", "chr2",
+        "--max-reads-per-alignment-start", "10", "--output", "out.vcf", "--reference", "/ref/hg38.fasta",
+        "--use-jdk-deflater", "false"
+    ]
+    assert render_command_line(tool_cwl, {**JOB, "output-filename": "my out.vcf"}, RUNTIME)[:2] == ["/bin/sh", "-c"]
+    assert "'my out.vcf'" in render_command_line(tool_cwl, {**JOB, "output-filename": "my out.vcf"}, RUNTIME)[2]
+
+    with pytest.raises(ValueError):
+        render_command_line(tool_cwl, {**JOB, "reference": None}, RUNTIME)
+
+    # The inputs are in the order of their ids, so the fields of the engine_arguments input come before --input
+    cmd_line_options = parse_cmdline_arguments(["--version", "4.0.6.0", "--group_engine_arguments", "--no_javascript"])
+    tool_cwl = gatk_tool_to_cwl(get_haplotype_caller_tool(), cmd_line_options, [])
+    job = {key: value for key, value in JOB.items() if key not in ("input_tags", "use-jdk-deflater")}
+    command_line = render_command_line(tool_cwl, {**job, "engine_arguments": {"use-jdk-deflater": True}}, RUNTIME)
+
+    assert command_line[command_line.index("HaplotypeCaller"):][:3] == ["HaplotypeCaller", "--use-jdk-deflater=true", "--input"]
+
+
+@pytest.mark.skipif(find_node() is None, reason="node.js is not installed")
+def test_expressions_match_javascript():
+    script = get_js_library() + """
+        var cases = JSON.parse(require("fs").readFileSync(0, "utf8"));
+        console.log(JSON.stringify(cases.map(function(c) {
+            self = c[1];
+            return eval(c[0].slice(2, -1));
+        })));
+    """
+    output = subprocess.run(
+        [find_node(), "-e", script],
+        input=json.dumps(EXPRESSIONS),
+        stdout=subprocess.PIPE,
+        check=True,
+        universal_newlines=True
+    ).stdout
+
+    assert [evaluate_expression(expression, {"self": self}) for expression, self in EXPRESSIONS] == json.loads(output)
+
+
+@pytest.mark.skipif(find_node() is None, reason="node.js is not installed")
+def test_check_command_line(tmpdir):
+    pytest.importorskip("cwltool")
+
+    tool_cwl = gatk_tool_to_cwl(get_haplotype_caller_tool(), parse_cmdline_arguments(["--version", "4.0.6.0", "--no_docker"]), [])
+    cwl_path = tmpdir.join("HaplotypeCaller.cwl")
+    cwl_path.write(dump_cwl(tool_cwl))
+
+    for name in ["hg38.fasta", "hg38.fasta.fai", "hg38.dict", "a.bam", "a.bam.bai", "b.bam", "b.bam.bai"]:
+        tmpdir.join(name).write("")
+
+    job = {
+        **JOB,
+        "reference": {"class": "File", "path": str(tmpdir.join("hg38.fasta"))},
+        "input": [{"class": "File", "path": str(tmpdir.join("a.bam"))}, {"class": "File", "path": str(tmpdir.join("b.bam"))}]
+    }
+
+    for checked_job in [job, {**job, "input_tags": None, "java_heap_size": 2048, "use-jdk-deflater": None}]:
+        command_line, cwltool_command_line = check_command_line(str(cwl_path), checked_job)
+        assert command_line == cwltool_command_line
@@ -0,0 +1,61 @@
+import json
+
+from gatkcwlgenerator.corpus import LARGE_TEXT_LENGTH, GATKCorpus
+from gatkcwlgenerator.GATK_classes import GATKTool
+from gatkcwlgenerator.gatk_tool_to_cwl import gatk_tool_to_cwl
+from gatkcwlgenerator.main import parse_cmdline_arguments
+from gatkcwlgenerator.tests.globals import get_argument
+
+
+LONG_FULLTEXT = "The number of reads to process. " * 40
+
+def get_raw_json(default_value: str) -> bytes:
+    return json.dumps({
+        "name": "HaplotypeCaller",
+        "description": "<p>Call germline SNPs and indels</p>" * 100,
+        "arguments": [
+            get_argument("--output", "File"),
+            get_argument("--mode", "Mode", options=[{"name": "A", "summary": ""}, {"name": "B", "summary": ""}]),
+            get_argument("--max-reads", "int", default_value=default_value, fulltext=LONG_FULLTEXT)
+        ]
+    }).encode()
+
+
+def test_corpus_shares_versions():
+    corpus = GATKCorpus()
+    extra_arguments = [get_argument("--read-filter", "List[String]")]
+
+    old_tool = corpus.add_tool(GATKTool.from_raw_json(get_raw_json("10"), json.loads(json.dumps(extra_arguments))))
+    new_tool = corpus.add_tool(GATKTool.from_raw_json(get_raw_json("12"), json.loads(json.dumps(extra_arguments))))
+
+    old_arguments = old_tool.original_dict["arguments"]
+    new_arguments = new_tool.original_dict["arguments"]
+
+    # The unchanged arguments, option lists and added arguments are shared between the versions
+    assert old_arguments[0] is new_arguments[0]
+    assert old_arguments[1]["options"] is new_arguments[1]["options"]
+    assert old_tool.additional_arguments is new_tool.additional_arguments
+    assert old_arguments[2] is not new_arguments[2]
+    assert old_arguments[2]["summary"] is new_arguments[2]["summary"]
+    assert old_arguments[2] != new_arguments[2]
+
+    # A tool documented the same way is the same record
+    assert corpus.add_tool(GATKTool.from_raw_json(get_raw_json("12"), [])).original_dict is new_tool.original_dict
+
+
+def test_corpus_tool():
+    corpus = GATKCorpus()
+    extra_arguments = [get_argument("--read-filter", "List[String]")]
+    gatk_tool = GATKTool.from_raw_json(get_raw_json("10"), extra_arguments)
+    corpus_tool = corpus.add_tool(gatk_tool)
+
+    assert len(LONG_FULLTEXT) >= LARGE_TEXT_LENGTH
+    assert corpus_tool.get_argument("--max-reads").dict.fulltext == LONG_FULLTEXT
+    assert corpus_tool.description == gatk_tool.description
+    assert corpus_tool.raw_json == gatk_tool.raw_json
+    assert corpus_tool.original_dict == gatk_tool.original_dict
+    assert [argument.dict for argument in corpus_tool.arguments] == [argument.dict for argument in gatk_tool.arguments]
+
+    cmd_line_options = parse_cmdline_arguments(["--version", "4.0.6.0"])
+
+    assert gatk_tool_to_cwl(corpus_tool, cmd_line_options, []) == gatk_tool_to_cwl(gatk_tool, cmd_line_options, [])
@@ -10,3 +10,8 @@ def test_cwl_type_contains():
     assert CWLStringType().contains(CWLEnumType(["one", "two"]))
 
     assert CWLFileType().contains(CWLFileType())
+
+def test_parse_cwl_type():
+    assert parse_cwl_type("File").get_cwl_object() == "File"
+    assert parse_cwl_type("string[]?").get_cwl_object() == "string[]?"
+    assert parse_cwl_type("File | File[] | Directory").get_cwl_object() == ["File", "File[]", "Directory"]
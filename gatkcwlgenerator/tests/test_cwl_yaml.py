@@ -0,0 +1,52 @@
+import copy
+
+import pytest
+from ruamel import yaml
+
+from gatkcwlgenerator.common import GATKVersion
+from gatkcwlgenerator.cwl_yaml import dump_cwl
+from gatkcwlgenerator.GATK_classes import GATKArgument
+from gatkcwlgenerator.gatk_argument_to_cwl import gatk_argument_to_cwl
+
+
+def _get_tags_inputs():
+    tags_inputs = []
+    for name in ("variant", "comp"):
+        argument = GATKArgument(
+            name="--" + name,
+            type="List[FeatureInput[VariantContext]]",
+            summary="",
+            fulltext="",
+            required="no",
+            synonyms="NA",
+            defaultValue="[]",
+            options=[]
+        )
+        inputs, _ = gatk_argument_to_cwl(argument, "ToolName", GATKVersion("4.0.0.0"))
+        tags_inputs.append(inputs[1])
+
+    return tags_inputs
+
+
+def test_shared_fragments():
+    variant_tags, comp_tags = _get_tags_inputs()
+
+    assert variant_tags["type"] is comp_tags["type"]
+
+    # The shared fragments can't be modified, but copies of them can
+    with pytest.raises(TypeError):
+        variant_tags["type"].append("int")
+
+    copied_type = copy.deepcopy(variant_tags["type"])
+    copied_type.append("int")
+    assert copied_type[:-1] == variant_tags["type"]
+
+
+def test_dump_cwl():
+    cwl = {"inputs": _get_tags_inputs()}
+
+    assert "&" not in dump_cwl(cwl)
+
+    anchored_yaml = dump_cwl(cwl, yaml_anchors=True)
+    assert "&" in anchored_yaml and "*" in anchored_yaml
+    assert yaml.safe_load(anchored_yaml) == yaml.safe_load(dump_cwl(cwl))
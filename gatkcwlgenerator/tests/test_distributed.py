@@ -0,0 +1,69 @@
+import os
+
+import pytest
+
+from gatkcwlgenerator.distributed import *
+
+
+def get_units():
+    return [
+        WorkUnit(f"default/4.0.6.0/{tool_name}", f"https://example.org/{tool_name}.json", ["--version", "4.0.6.0"])
+        for tool_name in ("HaplotypeCaller", "PrintReads")
+    ]
+
+
+@pytest.fixture(params=["file", "sqlite"])
+def work_queue(request, tmpdir):
+    if request.param == "file":
+        return open_work_queue(str(tmpdir.join("queue")))
+    else:
+        return open_work_queue("sqlite://" + str(tmpdir.join("queue.sqlite")))
+
+
+def test_work_queue(work_queue):
+    units = get_units()
+
+    assert work_queue.publish(units) == 2
+    assert work_queue.publish(units) == 0
+
+    # Each unit is only claimed once
+    claimed_units = [work_queue.claim("worker1"), work_queue.claim("worker2")]
+    assert sorted(claimed_units) == sorted(units)
+    assert work_queue.claim("worker3") is None
+
+    work_queue.complete(claimed_units[0])
+    work_queue.fail(claimed_units[1], "Traceback")
+    assert work_queue.counts() == {"pending": 0, "claimed": 0, "done": 1, "failed": 1}
+
+    # Failed units are retried when they are published again
+    assert work_queue.publish(units) == 1
+    assert work_queue.claim("worker1") == claimed_units[1]
+
+
+def test_work_queue_lease(work_queue):
+    unit = get_units()[0]
+    work_queue.publish([unit])
+
+    assert work_queue.claim("worker1") == unit
+    assert work_queue.claim("worker2") is None
+
+    # The unit is given to another worker once the lease of the first one has expired
+    assert work_queue.claim("worker2", lease_seconds=-1) == unit
+
+
+def test_staged_output_writer(tmpdir):
+    output_dir = str(tmpdir.join("4.0.6.0"))
+
+    output_writer = StagedOutputWriter(output_dir)
+    output_writer.write_gatk_json_file(b"{}", "PrintReads")
+    output_writer.write_cwl_file({"id": "PrintReads"}, "PrintReads")
+
+    # Nothing is in place until the files are committed
+    assert not os.path.exists(os.path.join(output_dir, "cwl"))
+
+    output_writer.commit()
+
+    assert sorted(os.listdir(output_dir)) == ["cwl", "json"]
+    assert os.listdir(os.path.join(output_dir, "cwl")) == ["PrintReads.cwl"]
+    with open(os.path.join(output_dir, "json", "PrintReads.json"), "rb") as json_file:
+        assert json_file.read() == b"{}"
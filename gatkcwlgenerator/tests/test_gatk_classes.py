@@ -1,3 +1,5 @@
+import pytest
+
 from gatkcwlgenerator.GATK_classes import GATKTool
 
 def test_gatk_tool_override():
@@ -24,3 +26,35 @@ def test_gatk_tool_override():
 
     assert gatk_tool.get_argument("arg1").dict.prop == 1
     assert gatk_tool.get_argument("arg2").dict.prop == 1
+
+def test_gatk_tool_raw_json():
+    raw_json = b'{"name": "Tool",\n "arguments": [{"name": "--arg1", "synonyms": "-a"}]}'
+    gatk_tool = GATKTool.from_raw_json(raw_json, [])
+
+    # The JSON should be passed through byte for byte
+    assert gatk_tool.raw_json is raw_json
+    assert gatk_tool.name == "Tool"
+    assert gatk_tool.get_argument("-a").name == "arg1"
+
+    assert GATKTool({"name": "Tool", "arguments": []}, []).raw_json == b'{"name": "Tool", "arguments": []}'
+
+def test_gatk_tool_invalid_json():
+    gatk_tool = GATKTool.from_raw_json(b"<html>Not found</html>", [], "https://example.com/Tool.json")
+
+    with pytest.raises(Exception, match="Could not decode JSON retrieved from https://example.com/Tool.json"):
+        gatk_tool.name
+
+def test_gatk_tool_takes_read_filters():
+    # GATK 3 tools say what kind of walker they are
+    assert GATKTool({"name": "PrintReads", "walkertype": "ReadWalker", "arguments": []}, []).takes_read_filters
+    assert not GATKTool({"name": "SelectVariants", "walkertype": "RodWalker", "arguments": []}, []).takes_read_filters
+
+    # GATK 4 tools that take read filters have a --read-filter argument and require reads
+    def gatk4_tool(input_required: str) -> GATKTool:
+        return GATKTool({"name": "Tool", "arguments": [
+            {"name": "--read-filter", "required": "no"},
+            {"name": "--input", "required": input_required}
+        ]}, [])
+
+    assert gatk4_tool("yes").takes_read_filters
+    assert not gatk4_tool("no").takes_read_filters
@@ -0,0 +1,276 @@
+import argparse
+import io
+import json
+import os
+import shutil
+
+import pytest
+
+from gatkcwlgenerator.cwl_yaml import dump_cwl
+from gatkcwlgenerator.GATK_classes import GATKArgument, GATKTool
+from gatkcwlgenerator.gatk_tool_to_cwl import (gatk_tool_to_cwl, get_indexed_input_kind, get_jvm_arguments, get_sizing_expression,
+                                               has_directory_type)
+from gatkcwlgenerator.main import parse_cmdline_arguments
+from gatkcwlgenerator.tests.globals import get_argument, get_gatk_tool
+
+
+def test_get_sizing_expression():
+    input_names_by_kind = {"reference": ["reference"], "reads": ["input", "bam"]}
+
+    assert get_sizing_expression({"base": 4096, "reference": 0.5, "reads": 2, "variants": 1}, input_names_by_kind) == \
+        "$(Math.ceil(4096 + 0.5 * inputSizeMiB([inputs['reference']]) + 2 * inputSizeMiB([inputs['input'], inputs['bam']])))"
+
+    # The tool has no inputs of this kind
+    assert get_sizing_expression({"base": 1024, "variants": 1.1}, input_names_by_kind) == 1024
+
+
+def test_get_jvm_arguments():
+    jvm_arguments = get_jvm_arguments(["-jar", "/gatk/gatk.jar", "HaplotypeCaller"])
+
+    # The JVM options come before the jar and the tool, which come before the tool's arguments
+    positions = [argument["position"] for argument in jvm_arguments]
+    assert positions == sorted(positions) and positions[-1] < 0
+    assert [argument["valueFrom"] for argument in jvm_arguments[-3:]] == ["-jar", "/gatk/gatk.jar", "HaplotypeCaller"]
+
+
+def test_spark_tool():
+    gatk_tool = GATKTool({
+        "name": "MarkDuplicatesSpark",
+        "description": "Marks duplicates",
+        "arguments": [get_argument(
+            "--spark-master",
+            summary="URL of the Spark Master to submit jobs to when using the Spark pipeline runner.",
+            default_value="local[*]"
+        )]
+    }, [])
+
+    cwl = gatk_tool_to_cwl(gatk_tool, parse_cmdline_arguments(["--version", "4.0.6.0"]), [])
+
+    input_ids = [cwl_input["id"] for cwl_input in cwl["inputs"]]
+    assert "spark_executor_memory" in input_ids and "spark_local_dir" in input_ids
+    assert {
+        "prefix": "--spark-master",
+        "valueFrom": "$(inputs['spark-master'] == null ? 'local[' + runtime.cores + ']' : inputs['spark-master'])"
+    } in cwl["arguments"]
+
+
+def test_no_javascript():
+    gatk_tool = GATKTool({
+        "name": "PrintReads",
+        "description": "Prints reads",
+        "arguments": [get_argument("--input", "List[String]", "BAM/SAM/CRAM file containing reads", "yes", "-I", "[]")]
+    }, [])
+
+    cwl = gatk_tool_to_cwl(gatk_tool, parse_cmdline_arguments(["--version", "4.0.6.0", "--no_javascript"]), [])
+
+    requirement_classes = [requirement["class"] for requirement in cwl["requirements"]]
+    assert "InlineJavascriptRequirement" not in requirement_classes
+    assert "ShellCommandRequirement" not in requirement_classes
+
+    # There's no tags input, and the prefix is given to each element of the array
+    input_ids = [cwl_input["id"] for cwl_input in cwl["inputs"]]
+    assert "input_tags" not in input_ids
+    assert cwl["inputs"][0]["type"] == {"type": "array", "items": "File", "inputBinding": {"prefix": "--input"}}
+
+    # The expressions computing the resources from the sizes of the inputs can only be written in JavaScript
+    cwl = gatk_tool_to_cwl(gatk_tool, parse_cmdline_arguments(["--version", "4.0.6.0", "--no_javascript", "--size_resources"]), [])
+    assert cwl["requirements"][0]["class"] == "InlineJavascriptRequirement"
+
+
+def test_no_javascript_inputs():
+    gatk_tool = GATKTool({
+        "name": "GenotypeGVCFs",
+        "description": "Genotypes GVCFs",
+        "arguments": [
+            get_argument("--variant", "List[FeatureInput[VariantContext]]", "A VCF file containing variants", "yes", "-V", "[]"),
+            get_argument("--input", "List[String]", "BAM/SAM/CRAM file containing reads", "no", "-I", "[]")
+        ]
+    }, [])
+
+    cwl = gatk_tool_to_cwl(gatk_tool, parse_cmdline_arguments(
+        ["--version", "4.0.6.0", "--no_javascript", "--cwl_version", "v1.1", "--gatk_command", "java -jar gatk.jar"]
+    ), [])
+    inputs = {cwl_input["id"]: cwl_input for cwl_input in cwl["inputs"]}
+
+    # A GenomicsDB workspace is given as an array of one Directory
+    assert inputs["variant"]["type"] == {"type": "array", "items": ["File", "Directory"], "inputBinding": {"prefix": "--variant"}}
+
+    # The index of a BAM or CRAM is optional
+    assert {"pattern": ".crai", "required": False} in inputs["input"]["secondaryFiles"]
+
+    # The heap size defaults to the memory allocated to the job, before the java_heap_size input
+    assert cwl["arguments"][0] == {"position": -3, "valueFrom": "-Xmx$(runtime.ram)m"}
+    assert inputs["java_heap_size"]["inputBinding"]["position"] == -3
+
+
+def test_group_engine_arguments():
+    gatk_tool = GATKTool({
+        "name": "PrintReads",
+        "description": "Prints reads",
+        "arguments": [get_argument("--max-reads", "int")]
+    }, [get_argument("--verbosity", "String"), get_argument("--read-filter", "List[String]")])
+
+    cwl = gatk_tool_to_cwl(gatk_tool, parse_cmdline_arguments(["--version", "4.0.6.0", "--group_engine_arguments"]), [])
+    inputs = {cwl_input["id"]: cwl_input for cwl_input in cwl["inputs"]}
+
+    # The tool's own arguments and commonly used engine arguments keep their own inputs
+    assert "max-reads" in inputs and "read-filter" in inputs and "verbosity" not in inputs
+
+    engine_arguments = inputs["engine_arguments"]
+    assert engine_arguments["type"][0] == "null"
+    assert [field["name"] for field in engine_arguments["type"][1]["fields"]] == ["verbosity"]
+    assert engine_arguments["type"][1]["fields"][0]["inputBinding"] == {"prefix": "--verbosity"}
+
+
+def test_cwl_version():
+    gatk_tool = GATKTool({
+        "name": "GenomicsDBImport",
+        "description": "Imports VCFs to GenomicsDB",
+        "arguments": [
+            get_argument("--genomicsdb-workspace-path", summary="Workspace"),
+            get_argument("--genomicsdb-update-workspace-path", summary="Workspace")
+        ]
+    }, [])
+
+    cwl = gatk_tool_to_cwl(gatk_tool, parse_cmdline_arguments(["--version", "4.1.0.0"]), [])
+    assert cwl["cwlVersion"] == "v1.0"
+    assert {requirement["class"] for requirement in cwl["requirements"]} == \
+        {"ShellCommandRequirement", "InlineJavascriptRequirement", "SchemaDefRequirement", "DockerRequirement"}
+    inputs = {cwl_input["id"]: cwl_input for cwl_input in cwl["inputs"]}
+    outputs = {cwl_output["id"]: cwl_output for cwl_output in cwl["outputs"]}
+    assert inputs["genomicsdb-workspace-path"]["type"] == "Directory?"
+    assert outputs["genomicsdb-workspace-path-out"]["type"] == "Directory"
+
+    cwl = gatk_tool_to_cwl(gatk_tool, parse_cmdline_arguments(["--version", "4.1.0.0", "--cwl_version", "v1.2"]), [])
+    requirements = {requirement["class"]: requirement for requirement in cwl["requirements"]}
+    assert cwl["cwlVersion"] == "v1.2"
+
+    # The workspaces aren't listed, and the existing one is updated in place, so the tool can't be reused
+    assert requirements["LoadListingRequirement"]["loadListing"] == "no_listing"
+    assert requirements["InitialWorkDirRequirement"]["listing"] == [
+        {"entry": "$(inputs['genomicsdb-update-workspace-path'])", "writable": True}
+    ]
+    assert requirements["InplaceUpdateRequirement"]["inplaceUpdate"]
+    assert not requirements["WorkReuse"]["enableReuse"]
+    assert "genomicsdb-update-workspace-path-out" in [cwl_output["id"] for cwl_output in cwl["outputs"]]
+
+    # The new workspace is only created by a full import
+    inputs = {cwl_input["id"]: cwl_input for cwl_input in cwl["inputs"]}
+    outputs = {cwl_output["id"]: cwl_output for cwl_output in cwl["outputs"]}
+    assert inputs["genomicsdb-workspace-path"]["type"] == "string?"
+    assert outputs["genomicsdb-workspace-path-out"]["type"] == "Directory?"
+
+
+# Instead of GATK, creates or updates the GenomicsDB workspaces it's given
+STUB_JAVA = """#!/bin/sh
+while [ $# -gt 0 ]; do
+    case "$1" in
+        --genomicsdb-workspace-path|--genomicsdb-update-workspace-path) mkdir -p "$2" && touch "$2/callset.json"; shift;;
+    esac
+    shift
+done
+"""
+
+def test_genomicsdb_update_workspace(tmpdir, monkeypatch):
+    cwltool_main = pytest.importorskip("cwltool.main")
+    if shutil.which("node") is None and shutil.which("nodejs") is None:
+        pytest.skip("node is needed to evaluate the expressions")
+
+    stub_java = tmpdir.mkdir("bin").join("java")
+    stub_java.write(STUB_JAVA)
+    stub_java.chmod(0o755)
+    monkeypatch.setenv("PATH", stub_java.dirname + os.pathsep + os.environ["PATH"])
+
+    gatk_tool = get_gatk_tool("GenomicsDBImport", [
+        get_argument("--genomicsdb-workspace-path", summary="Workspace"),
+        get_argument("--genomicsdb-update-workspace-path", summary="Workspace")
+    ])
+    cmd_line_options = parse_cmdline_arguments(
+        ["--version", "4.1.0.0", "--cwl_version", "v1.2", "--no_docker", "--gatk_command", "java -jar gatk.jar"]
+    )
+    cwl_path = tmpdir.join("GenomicsDBImport.cwl")
+    cwl_path.write(dump_cwl(gatk_tool_to_cwl(gatk_tool, cmd_line_options, [])))
+
+    # An incremental import updates the existing workspace, and doesn't create one
+    workspace = tmpdir.mkdir("workspace")
+    job_path = tmpdir.join("job.json")
+    job_path.write(json.dumps({"genomicsdb-update-workspace-path": {"class": "Directory", "path": str(workspace)}}))
+
+    stdout = io.StringIO()
+    exit_code = cwltool_main.main(
+        ["--no-container", "--outdir", str(tmpdir.join("out")), str(cwl_path), str(job_path)],
+        stdout=stdout
+    )
+
+    assert exit_code == 0
+    outputs = json.loads(stdout.getvalue())
+    assert outputs["genomicsdb-workspace-path-out"] is None
+    assert outputs["genomicsdb-update-workspace-path-out"]["basename"] == "workspace"
+    assert workspace.join("callset.json").check()
+
+
+def test_index_secondary_files():
+    gatk_tool = GATKTool({
+        "name": "MergeVcfs",
+        "description": "Merges VCFs",
+        "arguments": [
+            get_argument("--input", "List[File]", "VCF or BCF input files"),
+            get_argument("--dbsnp", "FeatureInput[VariantContext]", "dbSNP file"),
+            get_argument("--reference", "String", "Reference sequence file"),
+            get_argument("--sequence-dictionary", "File", "The sequence dictionary")
+        ]
+    }, [])
+
+    cwl = gatk_tool_to_cwl(gatk_tool, parse_cmdline_arguments(["--version", "4.1.0.0"]), [])
+    inputs = {cwl_input["id"]: cwl_input for cwl_input in cwl["inputs"]}
+    # Optional secondaryFiles need CWL v1.1, and the inputs of MergeVcfs aren't BAMs
+    assert "secondaryFiles" not in inputs["dbsnp"]
+    assert "secondaryFiles" not in inputs["input"]
+
+    cwl = gatk_tool_to_cwl(gatk_tool, parse_cmdline_arguments(["--version", "4.1.0.0", "--cwl_version", "v1.1"]), [])
+    inputs = {cwl_input["id"]: cwl_input for cwl_input in cwl["inputs"]}
+    optional_vcf_indexes = [{"pattern": ".tbi", "required": False}, {"pattern": ".idx", "required": False}]
+    assert inputs["input"]["secondaryFiles"] == optional_vcf_indexes
+    assert inputs["dbsnp"]["secondaryFiles"] == optional_vcf_indexes
+    # The reference's own secondaryFiles are kept, and files that aren't indexed have none
+    assert inputs["reference"]["secondaryFiles"] == [".fai", "^.dict"]
+    assert "secondaryFiles" not in inputs["sequence-dictionary"]
+
+    # With JavaScript too, the index of a BAM or CRAM is optional from CWL v1.1, rather than required
+    gatk_tool = GATKTool({
+        "name": "PrintReads",
+        "description": "Prints reads",
+        "arguments": [get_argument("--input", "List[String]", "BAM/SAM/CRAM file containing reads", "yes", "-I", "[]")]
+    }, [])
+
+    cwl = gatk_tool_to_cwl(gatk_tool, parse_cmdline_arguments(["--version", "4.1.0.0"]), [])
+    assert cwl["inputs"][0]["secondaryFiles"] == "$(self.basename + self.nameext.replace('m','i'))"
+
+    cwl = gatk_tool_to_cwl(gatk_tool, parse_cmdline_arguments(["--version", "4.1.0.0", "--cwl_version", "v1.1"]), [])
+    assert cwl["inputs"][0]["secondaryFiles"] == [
+        {"pattern": pattern, "required": False} for pattern in [".bai", "^.bai", ".crai", "^.crai"]
+    ]
+
+
+def test_get_indexed_input_kind():
+    assert get_indexed_input_kind(GATKArgument(**get_argument("--known-sites", "List[FeatureInput[VariantContext]]", "Known sites")), {}) == "variants"
+    assert get_indexed_input_kind(GATKArgument(**get_argument("--targets", "FeatureInput[BEDFeature]", "Targets")), {}) == "features"
+    assert get_indexed_input_kind(GATKArgument(**get_argument("--tumor-bam", "String", "The tumor BAM or CRAM")), {}) == "reads"
+    assert get_indexed_input_kind(GATKArgument(**get_argument("--output", "File", "The output VCF")), {}) is None
+    assert get_indexed_input_kind(GATKArgument(**get_argument("--input", "List[String]", "Input files")), {"input_kind": "reads"}) == "reads"
+
+
+def test_has_directory_type():
+    assert has_directory_type("Directory[]?")
+    assert has_directory_type(["null", "File", {"type": "array", "items": "Directory"}])
+    assert not has_directory_type(["null", "File", "File[]"])
+
+
+def test_older_cmd_line_options():
+    gatk_tool = GATKTool({"name": "PrintReads", "description": "Prints reads", "arguments": []}, [])
+
+    # Only the options the generator has always had
+    cmd_line_options = argparse.Namespace(version="4.0.6.0", gatk_command="java -jar /gatk/gatk.jar", no_docker=True)
+
+    assert gatk_tool_to_cwl(gatk_tool, cmd_line_options, []) == \
+        gatk_tool_to_cwl(gatk_tool, parse_cmdline_arguments(["--version", "4.0.6.0", "--no_docker"]), [])
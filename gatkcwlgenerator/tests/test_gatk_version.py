@@ -6,3 +6,17 @@ def test_version_comparisons():
     assert v("4.0.5.0") < v("4.0.6.0")
     assert v("3.8-0") > v("3.5-0")
     assert v("4.beta.6") < v("4.0.0.0")
+    assert v("3.8-0") > v("3.8") > v("3.7-0")
+    assert v("4.0.12.0") > v("4.0.6.0")
+    assert v("4.alpha.2") < v("4.beta.6") < v("4")
+
+
+def test_other_versions():
+    assert v("3.8-1-0-gf15c1c3ef") < v("3.5-0")
+    assert v("3.8-1-0-gf15c1c3ef") == v("3.8-1-0-gf15c1c3ef")
+    assert v("nightly-2018-06-01") < v("nightly-2018-10-01")
+    assert v("3.8-1-0-gf15c1c3ef").is_3()
+
+
+def test_version_hash():
+    assert len({v("4"), v("4.0.0.0"), v("3.8-0")}) == 2
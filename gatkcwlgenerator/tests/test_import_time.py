@@ -0,0 +1,54 @@
+"""
+Regression tests for the start up time of the command line tool:
+modules that are slow to import should only be loaded when they are needed.
+"""
+
+import subprocess
+import sys
+
+import pytest
+
+# The modules are only imported lazily from Python 3.7 (see gatkcwlgenerator/__init__.py)
+pytestmark = pytest.mark.skipif(sys.version_info < (3, 7), reason="Lazy imports need Python 3.7")
+
+SLOW_MODULES = [
+    "pkg_resources",
+    "bs4",
+    "requests",
+    "ruamel",
+    "coloredlogs",
+    "gatkcwlgenerator.web_to_gatk_tool",
+    "gatkcwlgenerator.gatk_tool_to_cwl"
+]
+
+
+def get_loaded_slow_modules(code: str):
+    """Run code in a new interpreter, and return the slow modules it imported."""
+    output = subprocess.run(
+        [sys.executable, "-c", code + "\nimport sys\nprint('\\n'.join(sys.modules))"],
+        stdout=subprocess.PIPE,
+        check=True,
+        universal_newlines=True
+    ).stdout
+
+    loaded_modules = set(output.splitlines())
+    return [module for module in SLOW_MODULES if module in loaded_modules]
+
+
+def test_import_loads_no_slow_modules():
+    assert get_loaded_slow_modules("import gatkcwlgenerator") == []
+
+
+def test_help_loads_no_slow_modules():
+    code = """
+from gatkcwlgenerator import cmdline_main
+try:
+    cmdline_main(["--help"])
+except SystemExit:
+    pass
+"""
+    assert get_loaded_slow_modules(code) == []
+
+
+def test_version_parsing_loads_no_slow_modules():
+    assert get_loaded_slow_modules("from gatkcwlgenerator.common import GATKVersion; GATKVersion('4.0.0.0')") == []
@@ -0,0 +1,61 @@
+from gatkcwlgenerator.cwl_yaml import dump_cwl
+from gatkcwlgenerator.gatk_tool_to_cwl import gatk_tool_to_cwl
+from gatkcwlgenerator.job_templates import get_job_template, get_job_value
+from gatkcwlgenerator.main import parse_cmdline_arguments
+from gatkcwlgenerator.tests.globals import get_haplotype_caller_tool
+
+
+def test_job_template():
+    cmd_line_options = parse_cmdline_arguments(["--version", "4.0.6.0"])
+    gatk_tool = get_haplotype_caller_tool()
+    tool_cwl = gatk_tool_to_cwl(gatk_tool, cmd_line_options, [])
+
+    job = get_job_template(gatk_tool, tool_cwl, "throughput", cmd_line_options)
+
+    assert job["reference"] == {"class": "File", "path": "Homo_sapiens_assembly38.fasta"}
+    assert job["input"] == {"class": "File", "path": "input.bam"}
+    assert job["output-filename"] == "output.g.vcf.gz"
+    assert job["intervals"] == "chr20"
+    assert job["max-reads-per-alignment-start"] == 10
+    assert job["smith-waterman"] == "FASTEST_AVAILABLE"
+    assert "disable-bam-index-caching" not in job
+    # GATK's default deflater is already the fastest
+    assert "use-jdk-deflater" not in job
+    assert "profile" in dump_cwl(job).splitlines()[0]
+
+    # The preset replaces the example's value
+    job = get_job_template(gatk_tool, tool_cwl, "low-memory", cmd_line_options)
+
+    assert job["max-reads-per-alignment-start"] == 25
+    assert job["disable-bam-index-caching"] is True
+    assert "smith-waterman" not in job
+
+
+def test_job_template_without_example():
+    cmd_line_options = parse_cmdline_arguments(["--version", "4.0.6.0", "--group_engine_arguments"])
+    gatk_tool = get_haplotype_caller_tool("<p>Call germline SNPs and indels</p>")
+    tool_cwl = gatk_tool_to_cwl(gatk_tool, cmd_line_options, [])
+
+    job = get_job_template(gatk_tool, tool_cwl, "low-memory", cmd_line_options)
+
+    # The required inputs are left to be filled in
+    assert job["reference"] is None
+    assert job["input"] is None
+    assert job["output-filename"] is None
+    assert "intervals" not in job
+    assert job["engine_arguments"] == {"disable-bam-index-caching": True}
+
+
+def test_get_job_value():
+    assert get_job_value("10", "int?") == 10
+    assert get_job_value("0.5", ["null", "double"]) == 0.5
+    assert get_job_value("true", "boolean?") is True
+    assert get_job_value(["a.vcf", "b.vcf"], ["null", {"type": "array", "items": "File"}]) == [
+        {"class": "File", "path": "a.vcf"},
+        {"class": "File", "path": "b.vcf"}
+    ]
+    # Only arrays can be given
+    assert get_job_value("a.vcf", "File[]") == [{"class": "File", "path": "a.vcf"}]
+    # An interval rather than an intervals file
+    assert get_job_value("chr20", ["null", "string", "File"]) == "chr20"
+    assert get_job_value("chr20.interval_list", ["null", "string", "File"]) == {"class": "File", "path": "chr20.interval_list"}
@@ -0,0 +1,117 @@
+import json
+
+import pytest
+
+from gatkcwlgenerator.common import FrozenDict, GATKVersion
+from gatkcwlgenerator.GATK_classes import GATKArgument
+from gatkcwlgenerator.gatk_argument_to_cwl import gatk_argument_to_cwl, get_CWL_type_for_argument, get_runtime_default_argument
+from gatkcwlgenerator.overrides import OverrideRegistry, get_overrides
+
+
+def test_override_precedence():
+    registry = OverrideRegistry([
+        {"argument": "intervals", "gatk_type": "List[String]", "skip": False},
+        {"tool": "ToolA", "argument": "intervals", "gatk_type": "String"},
+        {"tool": ["ToolA", "ToolB"], "argument": "intervals", "max_version": "4.0.6.0", "gatk_type": "File"},
+        {"tool": "ToolA", "gatk": 3, "warning": "A warning"}
+    ])
+
+    assert registry.lookup("ToolA", "intervals", GATKVersion("4.0.6.0")) == {"gatk_type": "String", "skip": False}
+    assert registry.lookup("ToolA", "intervals", GATKVersion("4.0.5.0"))["gatk_type"] == "File"
+    assert registry.lookup("ToolC", "intervals", GATKVersion("4.0.5.0"))["gatk_type"] == "List[String]"
+    assert registry.lookup("ToolC", "other", GATKVersion("4.0.5.0")) == {}
+
+    assert registry.lookup_tool("ToolA", GATKVersion("3.8-0")) == {"warning": "A warning"}
+    assert registry.lookup_tool("ToolA", GATKVersion("4.0.0.0")) == {}
+
+    assert registry.is_version_dependent("ToolB", "intervals")
+    assert not registry.is_version_dependent("ToolC", "intervals")
+
+
+def test_object_properties_are_merged():
+    registry = OverrideRegistry([
+        {"resources": {"coresMin": 1, "ramMin": 4096}},
+        {"tool": "ToolA", "resources": {"coresMin": 4}}
+    ])
+
+    assert registry.lookup_tool("ToolA", GATKVersion("4.0.0.0")) == {"resources": {"coresMin": 4, "ramMin": 4096}}
+    assert registry.lookup_tool("ToolB", GATKVersion("4.0.0.0")) == {"resources": {"coresMin": 1, "ramMin": 4096}}
+    assert registry.lookup("ToolA", "intervals", GATKVersion("4.0.0.0")) == {}
+
+
+def test_nested_object_properties_are_merged():
+    registry = OverrideRegistry([
+        {"sizing": {"ramMin": {"base": 4096, "reference": 0.25}, "tmpdirMin": {"base": 1024, "reads": 0.5}}},
+        {"tool": "ToolA", "sizing": {"ramMin": {"base": 8192}}}
+    ])
+
+    assert registry.lookup_tool("ToolA", GATKVersion("4.0.0.0")) == {
+        "sizing": {"ramMin": {"base": 8192, "reference": 0.25}, "tmpdirMin": {"base": 1024, "reads": 0.5}}
+    }
+
+
+def test_lookups_are_cached():
+    registry = OverrideRegistry([
+        {"argument": "input", "secondary_files": [".bai"]},
+        {"tool": "ToolA", "argument": "input", "input_kind": "reads"}
+    ])
+    version = GATKVersion("4.0.0.0")
+
+    properties = registry.lookup("ToolA", "input", version)
+    assert registry.lookup("ToolA", "input", version) is properties
+    assert isinstance(properties, FrozenDict)
+    assert properties == {"secondary_files": [".bai"], "input_kind": "reads"}
+
+
+def test_unknown_override_property():
+    with pytest.raises(ValueError):
+        OverrideRegistry([{"argument": "intervals", "gatk_typo": "String"}])
+
+
+def test_site_local_overrides(tmpdir):
+    overrides_path = tmpdir.join("overrides.json")
+    overrides_path.write(json.dumps([
+        {"tool": "GenotypeGVCFs", "argument": "variant", "cwl_type": "File[]"}
+    ]))
+
+    argument = GATKArgument(name="--variant", type="String", summary="A VCF file", required="yes", options=[])
+    version = GATKVersion("4.0.0.0")
+
+    assert get_CWL_type_for_argument(argument, "GenotypeGVCFs", version).get_cwl_object() == ["File", "File[]", "Directory"]
+
+    site_overrides = get_overrides([str(overrides_path)])
+    cwl_type = get_CWL_type_for_argument(argument, "GenotypeGVCFs", version, site_overrides)
+    assert cwl_type.get_cwl_object() == ["File[]", "File"]
+
+
+def test_runtime_default_argument():
+    argument = GATKArgument(name="--native-pair-hmm-threads", type="int", summary="How many threads to use",
+        required="no", options=[], synonyms="NA", defaultValue="4")
+    version = GATKVersion("4.0.0.0")
+
+    inputs, _ = gatk_argument_to_cwl(argument, "HaplotypeCaller", version)
+    assert "inputBinding" not in inputs[0]
+
+    assert get_runtime_default_argument(argument, version, "cores") == {
+        "prefix": "--native-pair-hmm-threads",
+        "valueFrom": "$(inputs['native-pair-hmm-threads'] == null ? runtime.cores : inputs['native-pair-hmm-threads'])"
+    }
+
+    # Without JavaScript, the argument is always set from runtime
+    inputs, _ = gatk_argument_to_cwl(argument, "HaplotypeCaller", version, javascript=False)
+    assert inputs == []
+
+    assert get_runtime_default_argument(argument, version, "cores", javascript=False) == {
+        "prefix": "--native-pair-hmm-threads",
+        "valueFrom": "$(runtime.cores)"
+    }
+
+
+def test_no_javascript_properties():
+    registry = OverrideRegistry([
+        {"argument": "input", "secondary_files": "$(self.basename + '.bai')", "no_javascript": {"secondary_files": [".bai"]}}
+    ])
+    version = GATKVersion("4.0.0.0")
+
+    assert registry.lookup("ToolA", "input", version)["secondary_files"] == "$(self.basename + '.bai')"
+    assert registry.lookup("ToolA", "input", version, javascript=False) == {"secondary_files": [".bai"]}
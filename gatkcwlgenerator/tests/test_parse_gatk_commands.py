@@ -35,10 +35,29 @@ gatk --java-options "-Xmx4g" HaplotypeCaller  \
 """
 
 
+gatk_4_spark_test = r"""
+gatk MarkDuplicatesSpark \
+    -I input.bam \
+    -O marked_duplicates.bam \
+    -- \
+    --spark-runner SPARK --spark-master spark://23.195.26.187:7077 --conf=spark.executor.cores=4
+"""
+
+
 def test_parse_gatk_pre_box():
     assert len(parse_gatk_pre_box(gatk_3_test)) == 2
     assert len(parse_gatk_pre_box(gatk_4_test)) == 1
 
+def test_parse_spark_arguments():
+    command, = parse_gatk_pre_box(gatk_4_spark_test)
+
+    assert command.arguments == {"-I": "input.bam", "-O": "marked_duplicates.bam"}
+    assert command.spark_arguments == {
+        "--spark-runner": "SPARK",
+        "--spark-master": "spark://23.195.26.187:7077",
+        "--conf": "spark.executor.cores=4"
+    }
+
 def test_does_cwl_type_match_value():
     assert assert_cwl_type_matches_value(CWLFileType(), "a_file.file")
     assert assert_cwl_type_matches_value(CWLFloatType(), "1234")
@@ -120,9 +139,21 @@ def test_docs_for_tool(gatk_version, gatk_tool):
                 except KeyError:
                     raise AssertionError(f"Argument {argument_name} not found for tool {gatk_tool.name}") from None
 
-                cwl_type = get_CWL_type_for_argument(cwlgen_argument, gatk_tool.name, gatk_version)
-                if not assert_cwl_type_matches_value(cwl_type, argument_value):
-                    raise AssertionError(f"Argument {argument_name} in tool {gatk_tool.name} is invalid (type {cwl_type} does not match inferred type for value {argument_value!r})")
+                assert_argument_value_is_valid(gatk_version, gatk_tool, cwlgen_argument, argument_value)
+
+            for argument_name, argument_value in command.spark_arguments.items():
+                try:
+                    cwlgen_argument = gatk_tool.get_argument(argument_name)
+                except KeyError:
+                    # The other Spark arguments are for the gatk launcher script, e.g. --spark-runner
+                    continue
+
+                assert_argument_value_is_valid(gatk_version, gatk_tool, cwlgen_argument, argument_value)
+
+def assert_argument_value_is_valid(gatk_version, gatk_tool, cwlgen_argument, argument_value):
+    cwl_type = get_CWL_type_for_argument(cwlgen_argument, gatk_tool.name, gatk_version)
+    if not assert_cwl_type_matches_value(cwl_type, argument_value):
+        raise AssertionError(f"Argument {cwlgen_argument.long_prefix} in tool {gatk_tool.name} is invalid (type {cwl_type} does not match inferred type for value {argument_value!r})")
 
 
 # Do the parametrization for test_docs_for_tool().
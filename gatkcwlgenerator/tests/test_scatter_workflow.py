@@ -0,0 +1,40 @@
+from gatkcwlgenerator.gatk_tool_to_cwl import gatk_tool_to_cwl
+from gatkcwlgenerator.main import parse_cmdline_arguments
+from gatkcwlgenerator.scatter_workflow import get_scatter_workflow
+from gatkcwlgenerator.tests.globals import get_argument, get_gatk_tool
+
+
+VARIANT_CALLER_ARGUMENTS = [
+    get_argument("--reference", "ReferenceInputArgumentCollection", "Reference sequence file", "yes"),
+    get_argument("--intervals", "List[String]", "One or more genomic intervals over which to operate"),
+    get_argument("--output", "File", "File to which variants should be written", "yes")
+]
+
+
+def test_scatter_workflow():
+    cmd_line_options = parse_cmdline_arguments(["--version", "4.0.6.0", "--scatter_workflows"])
+    gatk_tool = get_gatk_tool("HaplotypeCaller", VARIANT_CALLER_ARGUMENTS)
+    tool_cwl = gatk_tool_to_cwl(gatk_tool, cmd_line_options, [])
+
+    workflow = get_scatter_workflow(gatk_tool, tool_cwl, cmd_line_options)
+
+    assert workflow["class"] == "Workflow"
+    assert "scatter_count" in [workflow_input["id"] for workflow_input in workflow["inputs"]]
+    assert all("inputBinding" not in workflow_input for workflow_input in workflow["inputs"])
+
+    split_step, scatter_step, gather_step = workflow["steps"]
+    assert split_step["run"]["baseCommand"][-1] == "SplitIntervals"
+    assert scatter_step["run"] == "HaplotypeCaller.cwl"
+    assert scatter_step["scatter"] == "intervals"
+    assert {"id": "intervals", "source": "split_intervals/shards"} in scatter_step["in"]
+    assert gather_step["run"]["baseCommand"][-1] == "MergeVcfs"
+    assert {"id": "output_filename", "source": "output-filename"} in gather_step["in"]
+    assert workflow["outputs"] == [{"id": "output", "type": "File", "outputSource": "gather/gathered"}]
+
+
+def test_no_scatter_workflow():
+    # It isn't known how to merge the outputs of this tool
+    cmd_line_options = parse_cmdline_arguments(["--version", "4.0.6.0", "--scatter_workflows"])
+    gatk_tool = get_gatk_tool("CountReads", VARIANT_CALLER_ARGUMENTS)
+
+    assert get_scatter_workflow(gatk_tool, gatk_tool_to_cwl(gatk_tool, cmd_line_options, []), cmd_line_options) is None
@@ -0,0 +1,53 @@
+from gatkcwlgenerator.gatk_tool_to_cwl import gatk_tool_to_cwl
+from gatkcwlgenerator.main import parse_cmdline_arguments
+from gatkcwlgenerator.streaming import get_stdout_tool
+from gatkcwlgenerator.tests.globals import get_argument, get_gatk_tool
+
+
+VARIANT_FILTER_ARGUMENTS = [
+    get_argument("--variant", "FeatureInput[VariantContext]", "A VCF file containing variants", "yes"),
+    get_argument("--output", "File", "File to which variants should be written", "yes"),
+    get_argument("--create-output-variant-index", "boolean", "If true, create a VCF index when writing a coordinate-sorted VCF file.")
+]
+
+
+def test_streamable():
+    gatk_tool = get_gatk_tool("SelectVariants", VARIANT_FILTER_ARGUMENTS)
+
+    tool_cwl = gatk_tool_to_cwl(gatk_tool, parse_cmdline_arguments(["--version", "4.0.6.0", "--streaming"]), [])
+    inputs = {cwl_input["id"]: cwl_input for cwl_input in tool_cwl["inputs"]}
+
+    assert inputs["variant"]["streamable"]
+    assert "streamable" not in inputs["output-filename"]
+    assert tool_cwl["outputs"][0]["streamable"]
+
+    tool_cwl = gatk_tool_to_cwl(gatk_tool, parse_cmdline_arguments(["--version", "4.0.6.0"]), [])
+
+    assert not any("streamable" in cwl_input for cwl_input in tool_cwl["inputs"])
+
+
+def test_stdout_tool():
+    cmd_line_options = parse_cmdline_arguments(["--version", "4.0.6.0", "--streaming"])
+    gatk_tool = get_gatk_tool("SelectVariants", VARIANT_FILTER_ARGUMENTS)
+    tool_cwl = gatk_tool_to_cwl(gatk_tool, cmd_line_options, [])
+
+    stdout_tool = get_stdout_tool(gatk_tool, tool_cwl, cmd_line_options)
+    inputs = {cwl_input["id"]: cwl_input for cwl_input in stdout_tool["inputs"]}
+
+    assert stdout_tool["id"] == "SelectVariants_stdout"
+    assert stdout_tool["stdout"] == "$(inputs['output-filename'])"
+    assert "inputBinding" not in inputs["output-filename"]
+    assert "create-output-variant-index" not in inputs
+    assert {"prefix": "--output", "valueFrom": "/dev/stdout"} in stdout_tool["arguments"]
+    assert {"prefix": "--create-output-variant-index", "valueFrom": "false"} in stdout_tool["arguments"]
+    assert stdout_tool["outputs"][0]["type"] == "stdout"
+    # The tool itself is unchanged
+    assert "stdout" not in tool_cwl
+
+
+def test_no_stdout_tool():
+    # It isn't known whether this tool can write its output to stdout
+    cmd_line_options = parse_cmdline_arguments(["--version", "4.0.6.0", "--streaming"])
+    gatk_tool = get_gatk_tool("HaplotypeCaller", VARIANT_FILTER_ARGUMENTS)
+
+    assert get_stdout_tool(gatk_tool, gatk_tool_to_cwl(gatk_tool, cmd_line_options, []), cmd_line_options) is None
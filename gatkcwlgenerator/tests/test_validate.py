@@ -0,0 +1,75 @@
+import pytest
+
+from gatkcwlgenerator.cwl_yaml import dump_cwl
+from gatkcwlgenerator.GATK_classes import GATKTool
+from gatkcwlgenerator.gatk_tool_to_cwl import gatk_tool_to_cwl, get_js_library
+from gatkcwlgenerator.main import parse_cmdline_arguments
+from gatkcwlgenerator.tests.globals import get_argument
+from gatkcwlgenerator.validate import *
+
+
+def test_get_expressions():
+    cwl = {
+        "doc": "Not an expression: $(inputs.x)",
+        "inputs": [{
+            "id": "x",
+            "inputBinding": {"valueFrom": "$(generateArrayCmd('--x'))"}
+        }],
+        "outputs": [{
+            "id": "out",
+            "outputBinding": {"glob": "$(inputs.x + ')') ${ return {}; } \\$(escaped)"}
+        }]
+    }
+
+    assert get_expressions(cwl) == [
+        Expression("inputs/x/inputBinding/valueFrom", "$(generateArrayCmd('--x'))"),
+        Expression("outputs/out/outputBinding/glob", "$(inputs.x + ')')"),
+        Expression("outputs/out/outputBinding/glob", "${ return {}; }")
+    ]
+
+
+def test_is_parameter_reference():
+    assert is_parameter_reference("$(inputs['output-filename'])")
+    assert is_parameter_reference("$(inputs.input[0].basename)")
+    assert is_parameter_reference("$(runtime.cores)")
+
+    assert not is_parameter_reference("$(inputs.x == null ? runtime.cores : inputs.x)")
+    assert not is_parameter_reference("$(generateArrayCmd('--x'))")
+    assert not is_parameter_reference("${ return null; }")
+
+
+@pytest.mark.skipif(find_node() is None, reason="node.js is not installed")
+def test_javascript_runtime():
+    expressions = ["$(generateArrayCmd('--x'))", "$(undefinedFunction())", "$(1 +)", "${ return self.basename; }"]
+
+    with JavascriptRuntime(find_node()) as javascript_runtime:
+        library_error, errors = javascript_runtime.check(
+            get_js_library(),
+            [expression_to_javascript(expression) for expression in expressions]
+        )
+
+    assert library_error is None
+    assert [i for i, error in errors] == [1, 2]
+    assert errors[0][1].startswith("ReferenceError")
+    assert errors[1][1].startswith("SyntaxError")
+
+
+def test_validate_cwl_files(tmpdir):
+    pytest.importorskip("cwltool")
+
+    cmd_line_options = parse_cmdline_arguments(["--version", "4.0.0.0"])
+    gatk_tool = GATKTool({
+        "name": "PrintReads",
+        "description": "Print reads",
+        "arguments": [get_argument("--output", "GATKPathSpecifier", "Write output to this file", "yes", "-O", "null")]
+    }, [])
+
+    cwl_path = tmpdir.join("PrintReads.cwl")
+    cwl_path.write(dump_cwl(gatk_tool_to_cwl(gatk_tool, cmd_line_options, [])))
+    invalid_cwl_path = tmpdir.join("Invalid.cwl")
+    invalid_cwl_path.write("cwlVersion: v1.0\nclass: CommandLineTool\ninputs: 1\noutputs: []\n")
+
+    tool_reports = list(validate_cwl_files([str(cwl_path), str(invalid_cwl_path)], jobs=1, node_command=find_node()))
+
+    assert tool_reports[0] == ToolReport(str(cwl_path), [])
+    assert tool_reports[1].path == str(invalid_cwl_path) and tool_reports[1].errors
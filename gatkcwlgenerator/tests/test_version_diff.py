@@ -0,0 +1,119 @@
+import copy
+import json
+
+import pytest
+
+from gatkcwlgenerator.common import GATKVersion
+from gatkcwlgenerator.GATK_classes import GATKTool
+from gatkcwlgenerator.gatk_tool_to_cwl import gatk_tool_to_cwl
+from gatkcwlgenerator.main import (OutputWriter, VersionContext, get_argument_options, get_generation_record,
+                                   parse_cmdline_arguments)
+from gatkcwlgenerator.tests.globals import get_argument
+from gatkcwlgenerator.version_diff import *
+
+
+OLD_ARGUMENTS = [
+    get_argument("--input", "List[String]", "BAM file"),
+    get_argument("--output", "File", "File to which variants should be written"),
+    get_argument("--removed", "int"),
+    get_argument("--retyped", "int"),
+    get_argument("--redefaulted", "int", default_value="1"),
+    get_argument("--redocumented", "int")
+]
+
+NEW_ARGUMENTS = [
+    get_argument("--input", "List[String]", "BAM file"),
+    get_argument("--output", "File", "File to which variants should be written"),
+    get_argument("--added", "int"),
+    get_argument("--retyped", "long"),
+    get_argument("--redefaulted", "int", default_value="2"),
+    get_argument("--redocumented", "int", "A better summary")
+]
+
+
+def test_diff_arguments():
+    changes = diff_arguments(OLD_ARGUMENTS, NEW_ARGUMENTS)
+
+    assert set(changes) == {
+        ArgumentChange("--added", ADDED, None, "int"),
+        ArgumentChange("--removed", REMOVED, "int", None),
+        ArgumentChange("--retyped", TYPE_CHANGED, "int", "long"),
+        ArgumentChange("--redefaulted", DEFAULT_CHANGED, "1", "2"),
+        ArgumentChange("--redocumented", DOC_CHANGED, None, None)
+    }
+
+
+def test_delta_generation_matches_full_generation():
+    old_version = GATKVersion("4.0.0.0")
+    new_version = GATKVersion("4.0.6.0")
+
+    old_tool = GATKTool({"name": "Tool", "description": "", "arguments": copy.deepcopy(OLD_ARGUMENTS)}, [])
+    new_tool = GATKTool({"name": "Tool", "description": "", "arguments": copy.deepcopy(NEW_ARGUMENTS)}, [])
+
+    old_cwl = gatk_tool_to_cwl(old_tool, parse_cmdline_arguments(["-v", str(old_version)]), [])
+
+    reusable_arguments = get_reusable_arguments(old_tool, old_cwl, new_tool, old_version, new_version)
+    assert set(reusable_arguments) == {"input", "output"}
+
+    cmd_line_options = parse_cmdline_arguments(["-v", str(new_version)])
+    assert gatk_tool_to_cwl(new_tool, cmd_line_options, [], reusable_arguments) == gatk_tool_to_cwl(new_tool, cmd_line_options, [])
+
+    # Arguments aren't reused between major versions
+    assert get_reusable_arguments(old_tool, old_cwl, new_tool, GATKVersion("3.8-0"), new_version) == {}
+
+
+def test_previous_version(tmpdir):
+    old_version = GATKVersion("4.0.0.0")
+    old_tool_json = json.dumps({"name": "Tool", "description": "", "arguments": OLD_ARGUMENTS}).encode()
+    extra_arguments = [get_argument("--read-filter", "List[String]")]
+
+    # The files of the previous version, as written by the generator
+    old_options = parse_cmdline_arguments(["-v", str(old_version), "-o", str(tmpdir)])
+    old_tool = GATKTool.from_raw_json(old_tool_json, extra_arguments)
+    output_writer = OutputWriter(old_options)
+    output_writer.write_generation_file(get_generation_record(old_options, VersionContext(None, extra_arguments, None, [], None)))
+    output_writer.write_gatk_json_file(old_tool_json, "Tool")
+    output_writer.write_cwl_file(gatk_tool_to_cwl(old_tool, old_options, []), "Tool")
+
+    new_version = GATKVersion("4.0.6.0")
+    new_tool = GATKTool({"name": "Tool", "description": "", "arguments": copy.deepcopy(NEW_ARGUMENTS)}, extra_arguments)
+    cmd_line_options = parse_cmdline_arguments(
+        ["-v", str(new_version), "--delta_from", str(old_version), "--delta_cwl_dir", str(tmpdir.join("cwl"))]
+    )
+
+    previous_version = PreviousVersion(old_version, cmd_line_options.delta_cwl_dir, get_argument_options(cmd_line_options))
+    assert previous_version.get_tool("Tool").raw_json == old_tool_json
+    assert previous_version.get_tool("Other") is None
+    assert set(previous_version.get_reusable_arguments(new_tool, new_version)) == {"input", "output", "read-filter"}
+
+    # CWL generated with other options isn't reused
+    cmd_line_options = parse_cmdline_arguments(["-v", str(new_version), "--no_javascript"])
+    with pytest.raises(Exception, match="no_javascript False rather than True"):
+        PreviousVersion(old_version, str(tmpdir.join("cwl")), get_argument_options(cmd_line_options))
+
+
+def test_previous_version_overrides(tmpdir, monkeypatch):
+    old_version = GATKVersion("4.0.0.0")
+    overrides_path = tmpdir.join("overrides.json")
+    overrides_path.write(json.dumps([{"argument": "output", "cwl_type": "File"}]))
+
+    old_options = parse_cmdline_arguments(["-v", str(old_version), "-o", str(tmpdir), "--overrides", str(overrides_path)])
+    OutputWriter(old_options).write_generation_file(
+        get_generation_record(old_options, VersionContext(None, [], None, [], None))
+    )
+
+    # The override files are compared by their contents, so can be given by another path
+    monkeypatch.chdir(tmpdir.mkdir("elsewhere"))
+    cmd_line_options = parse_cmdline_arguments(["-v", "4.0.6.0", "--overrides", "../overrides.json"])
+    PreviousVersion(old_version, str(tmpdir.join("cwl")), get_argument_options(cmd_line_options))
+
+    # CWL generated with other rules isn't reused
+    overrides_path.write(json.dumps([{"argument": "output", "cwl_type": "string"}]))
+    with pytest.raises(Exception, match="different options: overrides"):
+        PreviousVersion(old_version, str(tmpdir.join("cwl")), get_argument_options(cmd_line_options))
+
+    # Nor is CWL generated by another version of the generator
+    monkeypatch.setattr("gatkcwlgenerator.__version__", "0.0.0")
+    overrides_path.write(json.dumps([{"argument": "output", "cwl_type": "File"}]))
+    with pytest.raises(Exception, match="generator_version"):
+        PreviousVersion(old_version, str(tmpdir.join("cwl")), get_argument_options(cmd_line_options))
@@ -0,0 +1,300 @@
+"""
+Validating generated CWL files in process, in bulk.
+
+The CWL schema is loaded once (by cwltool, which caches it) and the files are validated in
+parallel. The JavaScript expressions in the files are checked against their expression
+library (js_library.js) in one node process for all the files, rather than one per expression.
+"""
+
+import argparse
+import concurrent.futures
+import glob
+import json
+import logging
+import os
+import re
+import shutil
+import subprocess
+import sys
+from collections import OrderedDict, namedtuple
+from typing import *
+
+from .common import Expression, get_expressions, is_parameter_reference, scan_expressions
+
+_logger: logging.Logger = logging.getLogger("gatkcwlgenerator")
+
+
+CHECK_EXPRESSIONS_SCRIPT = os.path.join(os.path.dirname(__file__), "check_expressions.js")
+
+# Matches the location at the start of a schema-salad error message, e.g. "path/Tool.cwl:110:1: "
+_ERROR_LOCATION_REGEX = re.compile(r"^\S+?:(\d+):\d+:\s*")
+
+# The result of validating a CWL file against the CWL schema, before its expressions are checked
+_SchemaValidation = namedtuple("_SchemaValidation", ["path", "errors", "expression_library", "expressions"])
+
+ToolReport = namedtuple("ToolReport", ["path", "errors"])
+
+
+def expression_to_javascript(source: str) -> str:
+    """
+    Convert a "$(...)" parameter reference or "${...}" expression to a JavaScript expression.
+    """
+    if source.startswith("${"):
+        return "(function(){" + source[2:-1] + "})()"
+    else:
+        return source[1:]
+
+def get_expression_library(cwl_dict: Dict) -> Optional[str]:
+    for requirement in cwl_dict.get("requirements", []):
+        if requirement.get("class") == "InlineJavascriptRequirement":
+            return "\n".join(requirement.get("expressionLib", []))
+
+    return None
+
+
+def _format_schema_error(error: Exception) -> List[str]:
+    """
+    Condense a schema-salad error message to one line per error, without the file paths.
+    """
+    lines: List[str] = []
+
+    for line in str(error).splitlines():
+        match = _ERROR_LOCATION_REGEX.match(line)
+        if match is not None:
+            lines.append(f"line {match.group(1)}: {line[match.end():].strip()}")
+        elif lines and line.strip():
+            lines[-1] += " " + line.strip()
+        elif line.strip():
+            lines.append(line.strip())
+
+    # Only keep the innermost errors, not the fields that were being checked when they happened
+    errors = [line for line in lines if not re.match(r"line \d+: checking ", line)]
+    return list(OrderedDict.fromkeys(errors or lines)) or [type(error).__name__]
+
+def validate_schema(cwl_path: str) -> _SchemaValidation:
+    """
+    Validate a CWL file against the CWL schema, and find its expressions.
+    """
+    from cwltool.context import LoadingContext
+    from cwltool.load_tool import fetch_document, make_tool, resolve_and_validate_document
+    from cwltool.workflow import default_make_tool
+
+    # The expressions are checked separately, all in one JavaScript runtime
+    loading_context = LoadingContext({
+        "construct_tool_object": default_make_tool,
+        "disable_js_validation": True
+    })
+
+    expression_library = None
+    expressions: List[Expression] = []
+
+    try:
+        loading_context, cwl_document, uri = fetch_document(cwl_path, loading_context)
+
+        expression_library = get_expression_library(cwl_document)
+        if expression_library is not None:
+            expressions = get_expressions(cwl_document)
+
+        loading_context, uri = resolve_and_validate_document(loading_context, cwl_document, uri)
+        make_tool(uri, loading_context)
+    except Exception as error:
+        return _SchemaValidation(cwl_path, _format_schema_error(error), expression_library, expressions)
+
+    return _SchemaValidation(cwl_path, [], expression_library, expressions)
+
+def require_cwltool() -> None:
+    """
+    Raise an ImportError that says how to install cwltool if it isn't installed. It's an optional
+    dependency, needed to validate, benchmark and render --check the generated files.
+    """
+    try:
+        import cwltool
+    except ImportError as error:
+        raise ImportError(
+            "cwltool is needed to load the CWL files, but isn't installed. " +
+            "Install it with: pip install 'gatk_cwl_generator[cwltool]'"
+        ) from error
+
+def init_cwltool(verbose: bool) -> None:
+    """
+    Load the CWL schema in this process (or worker process), so that loading the first CWL file isn't slower,
+    and quiet cwltool's logging unless verbose.
+    """
+    require_cwltool()
+
+    from cwltool.process import get_schema
+
+    if not verbose:
+        logging.getLogger("cwltool").setLevel(logging.WARNING)
+        logging.getLogger("salad").setLevel(logging.WARNING)
+
+    # This is cached, so is only loaded once per process. Forked workers inherit it from the main process.
+    get_schema("v1.0")
+
+
+class JavascriptRuntime:
+    """
+    A node process that checks expressions against an expression library (see check_expressions.js).
+    """
+    def __init__(self, node_command: str) -> None:
+        self._process = subprocess.Popen(
+            [node_command, CHECK_EXPRESSIONS_SCRIPT],
+            stdin=subprocess.PIPE,
+            stdout=subprocess.PIPE,
+            universal_newlines=True
+        )
+
+    def check(self, expression_library: str, expressions: List[str]) -> Tuple[Optional[str], List[Tuple[int, str]]]:
+        """
+        Return the error loading the expression library, if any, and the indices and errors of the invalid expressions.
+        """
+        self._process.stdin.write(json.dumps({"library": expression_library, "expressions": expressions}) + "\n")
+        self._process.stdin.flush()
+
+        response = self._process.stdout.readline()
+        if not response:
+            raise RuntimeError("The JavaScript runtime exited unexpectedly")
+
+        result = json.loads(response)
+        return result["library_error"], [tuple(error) for error in result["errors"]]
+
+    def close(self) -> None:
+        self._process.stdin.close()
+        self._process.wait()
+
+    def __enter__(self) -> "JavascriptRuntime":
+        return self
+
+    def __exit__(self, *exc_info) -> None:
+        self.close()
+
+def find_node() -> Optional[str]:
+    return shutil.which("node") or shutil.which("nodejs")
+
+
+def _check_expressions(schema_validation: _SchemaValidation, javascript_runtime: Optional[JavascriptRuntime]) -> ToolReport:
+    errors = list(schema_validation.errors)
+
+    if javascript_runtime is not None and schema_validation.expressions:
+        library_error, expression_errors = javascript_runtime.check(
+            schema_validation.expression_library,
+            [expression_to_javascript(expression.source) for expression in schema_validation.expressions]
+        )
+
+        if library_error is not None:
+            errors.append(f"expressionLib: {library_error}")
+
+        for i, error in expression_errors:
+            expression = schema_validation.expressions[i]
+            errors.append(f"{expression.location}: {error} in {expression.source}")
+
+    return ToolReport(schema_validation.path, errors)
+
+def validate_cwl_files(
+        cwl_paths: List[str],
+        jobs: int = None,
+        node_command: str = None,
+        verbose: bool = False
+    ) -> Iterator[ToolReport]:
+    """
+    Validate CWL files, in the given order. If node_command is None, expressions aren't checked.
+    """
+    init_cwltool(verbose)
+
+    if jobs == 1 or len(cwl_paths) <= 1:
+        schema_validations: Iterator[_SchemaValidation] = map(validate_schema, cwl_paths)
+        executor = None
+    else:
+        executor = concurrent.futures.ProcessPoolExecutor(jobs, initializer=init_cwltool, initargs=(verbose,))
+        schema_validations = executor.map(validate_schema, cwl_paths, chunksize=4)
+
+    javascript_runtime = JavascriptRuntime(node_command) if node_command is not None else None
+
+    try:
+        for schema_validation in schema_validations:
+            yield _check_expressions(schema_validation, javascript_runtime)
+    finally:
+        if javascript_runtime is not None:
+            javascript_runtime.close()
+        if executor is not None:
+            executor.shutdown()
+
+def format_tool_report(tool_report: ToolReport, base_dir: str = None) -> str:
+    name = os.path.relpath(tool_report.path, base_dir) if base_dir else tool_report.path
+
+    if not tool_report.errors:
+        return f"{name}: ok"
+
+    return "\n".join(
+        [f"{name}: {len(tool_report.errors)} error{'s' if len(tool_report.errors) > 1 else ''}"]
+        + ["  " + error for error in tool_report.errors]
+    )
+
+def get_cwl_paths(paths: List[str]) -> List[str]:
+    """
+    Return the CWL files in a list of files and directories.
+    """
+    cwl_paths = []
+
+    for path in paths:
+        if os.path.isdir(path):
+            cwl_paths.extend(sorted(glob.glob(os.path.join(path, "*.cwl"))))
+        else:
+            cwl_paths.append(path)
+
+    return cwl_paths
+
+
+def validate_main(args: List[str]) -> None:
+    """
+    Validate the CWL files generated for some versions of GATK, and print a report per tool.
+    """
+    parser = argparse.ArgumentParser(prog="gatk_cwl_generator validate",
+        description="Validates generated CWL files against the CWL schema and checks their JavaScript expressions")
+    parser.add_argument("paths", nargs="*", metavar="PATH",
+        help="A CWL file or a directory of CWL files to validate")
+    parser.add_argument("--version", "-v", dest="versions", action="append", default=[],
+        help="Validate the CWL files generated for this version of GATK, in <CWL_ROOT>/<VERSION>/cwl/. " +
+        "Can be given multiple times.")
+    parser.add_argument("--cwl_root", dest="cwl_root", default=os.path.join(os.getcwd(), "gatk_cmdline_tools"),
+        help="The directory containing the files generated for each version. Default is ./gatk_cmdline_tools/")
+    parser.add_argument("--jobs", "-j", dest="jobs", type=int,
+        help="Number of processes used for validation. Default is the number of CPUs.")
+    parser.add_argument("--no_js", dest="no_js", action="store_true",
+        help="Don't check the JavaScript expressions. Default is False.")
+    parser.add_argument("--node", dest="node_command",
+        help="The node.js executable used to check the JavaScript expressions. Default is node or nodejs on the PATH.")
+    parser.add_argument("--verbose", dest="verbose", action="store_true",
+        help="Set the logging to be verbose. Default is False.")
+    validate_options = parser.parse_args(args)
+
+    import coloredlogs
+    coloredlogs.install(level="DEBUG" if validate_options.verbose else "WARNING", logger=_logger,
+        fmt="%(asctime)s %(name)s[%(process)d] %(levelname)s %(message)s")
+
+    paths = validate_options.paths + [
+        os.path.join(validate_options.cwl_root, version, "cwl")
+        for version in validate_options.versions
+    ]
+    if not paths:
+        parser.error("no CWL files given; use PATH or --version")
+
+    node_command = None
+    if not validate_options.no_js:
+        node_command = validate_options.node_command or find_node()
+        if node_command is None:
+            _logger.warning("node.js wasn't found, so the JavaScript expressions won't be checked")
+
+    cwl_paths = get_cwl_paths(paths)
+    base_dir = validate_options.cwl_root if validate_options.versions and not validate_options.paths else None
+
+    invalid_tools = 0
+    for tool_report in validate_cwl_files(cwl_paths, validate_options.jobs, node_command, validate_options.verbose):
+        print(format_tool_report(tool_report, base_dir))
+        if tool_report.errors:
+            invalid_tools += 1
+
+    print(f"Validated {len(cwl_paths)} tools: {len(cwl_paths) - invalid_tools} valid, {invalid_tools} invalid")
+
+    if invalid_tools:
+        sys.exit(1)
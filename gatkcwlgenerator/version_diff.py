@@ -0,0 +1,355 @@
+"""
+Comparing the documentation of two GATK versions, at the level of tools and arguments,
+and reusing a previous version's CWL for the arguments that haven't changed.
+"""
+
+import argparse
+import logging
+import os
+import sys
+from collections import namedtuple
+from typing import *
+
+from .common import GATKVersion, loads_json
+from .GATK_classes import *
+from .overrides import OverrideRegistry, get_overrides
+
+_logger: logging.Logger = logging.getLogger("gatkcwlgenerator")
+
+
+# The kinds of change reported for an argument, in the order they are reported
+ADDED = "added"
+REMOVED = "removed"
+TYPE_CHANGED = "type"
+DEFAULT_CHANGED = "default"
+REQUIRED_CHANGED = "required"
+OPTIONS_CHANGED = "options"
+DOC_CHANGED = "doc"
+
+# The fields of the GATK documentation compared for each kind of change. Changes
+# to any other fields (e.g. the summary) are reported as DOC_CHANGED.
+COMPARED_FIELDS = {
+    TYPE_CHANGED: "type",
+    DEFAULT_CHANGED: "defaultValue",
+    REQUIRED_CHANGED: "required",
+    OPTIONS_CHANGED: "options"
+}
+
+ArgumentChange = namedtuple("ArgumentChange", ["argument_name", "change", "old_value", "new_value"])
+
+VersionDiff = namedtuple("VersionDiff", [
+    "old_version",
+    "new_version",
+    "added_tools",
+    "removed_tools",
+    "shared_argument_changes",  # Changes to the arguments added to every tool (read filters, CommandLineGATK)
+    "tool_argument_changes"     # Tool name -> changes to the tool's own arguments
+])
+
+# Tools and the arguments shared by all tools, as used by a version of GATK
+GATKDocumentation = namedtuple("GATKDocumentation", ["version", "tools", "extra_arguments", "annotation_names"])
+
+
+def get_gatk_documentation(gatk_version: GATKVersion, include_pattern: str = None, corpus=None) -> GATKDocumentation:
+    """
+    Fetch the documentation of all tools in a version of GATK (or the ones matching the include pattern).
+
+    :param corpus: a GATKCorpus to keep the documentation in, shared with the other versions in it
+    """
+    from .main import should_generate_file
+    from .web_to_gatk_tool import get_tool_name, get_gatk_links, get_gatk_tool, get_extra_arguments
+
+    gatk_links = get_gatk_links(gatk_version)
+    extra_arguments = get_extra_arguments(gatk_version, gatk_links)
+    if corpus is not None:
+        extra_arguments = corpus.add_arguments(extra_arguments)
+
+    tools = {}
+    for tool_url in gatk_links.tool_urls:
+        if should_generate_file(tool_url, gatk_version, include_pattern):
+            gatk_tool = get_gatk_tool(tool_url, extra_arguments=extra_arguments)
+            if corpus is not None:
+                gatk_tool = corpus.add_tool(gatk_tool)
+            tools[gatk_tool.name] = gatk_tool
+
+    return GATKDocumentation(
+        version=gatk_version,
+        tools=tools,
+        extra_arguments=extra_arguments,
+        annotation_names=[get_tool_name(url) for url in gatk_links.annotator_urls]
+    )
+
+def diff_arguments(old_arguments: Iterable[Dict], new_arguments: Iterable[Dict]) -> List[ArgumentChange]:
+    """
+    Compare two lists of GATK arguments (as dictionaries from the documentation).
+    """
+    old_by_name = {argument["name"]: argument for argument in old_arguments}
+    new_by_name = {argument["name"]: argument for argument in new_arguments}
+
+    changes = []
+
+    for name, new_argument in new_by_name.items():
+        old_argument = old_by_name.get(name)
+
+        if old_argument is None:
+            changes.append(ArgumentChange(name, ADDED, None, new_argument.get("type")))
+        elif old_argument != new_argument:
+            reported = False
+            for change, field in COMPARED_FIELDS.items():
+                if old_argument.get(field) != new_argument.get(field):
+                    changes.append(ArgumentChange(name, change, old_argument.get(field), new_argument.get(field)))
+                    reported = True
+
+            if not reported:
+                changes.append(ArgumentChange(name, DOC_CHANGED, None, None))
+
+    for name, old_argument in old_by_name.items():
+        if name not in new_by_name:
+            changes.append(ArgumentChange(name, REMOVED, old_argument.get("type"), None))
+
+    return changes
+
+def diff_gatk_versions(old: GATKDocumentation, new: GATKDocumentation) -> VersionDiff:
+    tool_argument_changes = {}
+
+    for tool_name in sorted(old.tools.keys() & new.tools.keys()):
+        changes = diff_arguments(
+            old.tools[tool_name].original_dict["arguments"],
+            new.tools[tool_name].original_dict["arguments"]
+        )
+        if changes:
+            tool_argument_changes[tool_name] = changes
+
+    return VersionDiff(
+        old_version=old.version,
+        new_version=new.version,
+        added_tools=sorted(new.tools.keys() - old.tools.keys()),
+        removed_tools=sorted(old.tools.keys() - new.tools.keys()),
+        shared_argument_changes=diff_arguments(old.extra_arguments, new.extra_arguments),
+        tool_argument_changes=tool_argument_changes
+    )
+
+def _format_argument_change(argument_change: ArgumentChange) -> str:
+    name, change, old_value, new_value = argument_change
+
+    if change == ADDED:
+        return f"  + {name} ({new_value})"
+    elif change == REMOVED:
+        return f"  - {name} ({old_value})"
+    elif change == DOC_CHANGED:
+        return f"  ~ {name}: documentation changed"
+    else:
+        return f"  ~ {name}: {change} {old_value!r} -> {new_value!r}"
+
+def format_version_diff(version_diff: VersionDiff) -> str:
+    """
+    Format a VersionDiff as a report for humans.
+    """
+    lines = [f"Changes from GATK {version_diff.old_version} to {version_diff.new_version}"]
+
+    if version_diff.added_tools:
+        lines.append("Added tools: " + ", ".join(version_diff.added_tools))
+    if version_diff.removed_tools:
+        lines.append("Removed tools: " + ", ".join(version_diff.removed_tools))
+
+    if version_diff.shared_argument_changes:
+        lines.append("Arguments shared by all tools:")
+        lines.extend(map(_format_argument_change, version_diff.shared_argument_changes))
+
+    for tool_name, changes in version_diff.tool_argument_changes.items():
+        lines.append(f"{tool_name}:")
+        lines.extend(map(_format_argument_change, changes))
+
+    return "\n".join(lines)
+
+
+def load_cwl_file(cwl_path: str) -> Optional[Dict]:
+    """
+    Load a previously generated CWL file, or return None if it doesn't exist.
+    """
+    from ruamel import yaml
+
+    try:
+        with open(cwl_path) as file:
+            return yaml.safe_load(file)
+    except FileNotFoundError:
+        return None
+
+def get_reusable_arguments(
+        old_tool: GATKTool,
+        old_cwl: Dict,
+        new_tool: GATKTool,
+        old_version: GATKVersion,
+        new_version: GATKVersion,
+        overrides: OverrideRegistry = None
+    ) -> Dict[str, Tuple[List[Dict], List[Dict]]]:
+    """
+    Return the CWL inputs and outputs of the arguments of new_tool that are the same in old_tool,
+    taken from old_cwl, as a dictionary of argument name to (inputs, outputs).
+
+    This assumes that old_cwl was generated from old_tool with the same options (which PreviousVersion checks).
+    """
+    from .gatk_argument_to_cwl import get_input_argument_name
+
+    if overrides is None:
+        overrides = get_overrides()
+
+    if old_version.is_3() != new_version.is_3():
+        return {}
+
+    # The secondary files of outputs depend on whether the tool has these arguments
+    def get_create_output_arguments(gatk_tool):
+        return {argument.name for argument in gatk_tool.arguments if argument.name.startswith("create-output-")}
+
+    if get_create_output_arguments(old_tool) != get_create_output_arguments(new_tool):
+        return {}
+
+    old_inputs = {cwl_input["id"]: cwl_input for cwl_input in old_cwl["inputs"]}
+    old_outputs = {cwl_output["id"]: cwl_output for cwl_output in old_cwl["outputs"]}
+
+    reusable_arguments = {}
+
+    for argument in new_tool.arguments:
+        # The CWL for these arguments depends on the exact GATK version, or has outputs
+        # or requirements that can't be found by the argument's name, or on the options, so is always converted again
+        argument_override = overrides.lookup(new_tool.name, argument.name, new_version)
+        if (overrides.is_version_dependent(new_tool.name, argument.name)
+                or "outputs" in argument_override or "inplace_update" in argument_override
+                or "streamable" in argument_override):
+            continue
+
+        try:
+            old_argument = old_tool.get_argument(argument.long_prefix)
+        except KeyError:
+            continue
+
+        if old_argument.dict != argument.dict:
+            continue
+
+        input_name = get_input_argument_name(argument, new_version)
+        if input_name not in old_inputs:
+            continue
+
+        inputs = [old_inputs[input_name]]
+        if argument.name + "_tags" in old_inputs:
+            inputs.append(old_inputs[argument.name + "_tags"])
+
+        if argument.is_output_argument():
+            if argument.name not in old_outputs:
+                continue
+            outputs = [old_outputs[argument.name]]
+        else:
+            outputs = []
+
+        reusable_arguments[argument.name] = (inputs, outputs)
+
+    return reusable_arguments
+
+
+class PreviousVersion:
+    """
+    The documentation and generated CWL of a previous version of GATK, for delta generation.
+    Both are read from the files generated for that version: the CWL files, the JSON documentation
+    of the tools next to them, and what they were generated with (see main.get_generation_record).
+    """
+    def __init__(
+            self,
+            gatk_version: GATKVersion,
+            cwl_dir: str,
+            argument_options: Dict,
+            overrides: OverrideRegistry = None,
+            corpus=None
+        ) -> None:
+        from .main import GENERATION_FILE
+
+        self.gatk_version = gatk_version
+        self._cwl_dir = cwl_dir
+        self._json_dir = os.path.join(os.path.dirname(os.path.normpath(cwl_dir)), "json")
+        self._overrides = overrides
+        self._corpus = corpus
+
+        generation_path = os.path.join(os.path.dirname(os.path.normpath(cwl_dir)), GENERATION_FILE)
+        try:
+            with open(generation_path, "rb") as file:
+                generation_record = loads_json(file.read())
+        except FileNotFoundError:
+            raise Exception(f"The CWL files in {cwl_dir} can't be reused, as {generation_path} doesn't exist. " +
+                "Generate them again with this version of gatk_cwl_generator") from None
+
+        previous_options = generation_record["argument_options"]
+        if previous_options != argument_options:
+            raise Exception(f"The CWL files in {cwl_dir} can't be reused, as they were generated with different options: " +
+                ", ".join(
+                    f"{option} {previous_options.get(option)!r} rather than {value!r}"
+                    for option, value in argument_options.items() if previous_options.get(option) != value
+                ))
+
+        self._extra_arguments = generation_record["extra_arguments"]
+        self._read_filter_arguments = generation_record["read_filter_arguments"]
+
+        if corpus is not None:
+            self._extra_arguments = corpus.add_arguments(self._extra_arguments)
+            if self._read_filter_arguments is not None:
+                self._read_filter_arguments = corpus.add_arguments(self._read_filter_arguments)
+
+    def get_tool(self, tool_name: str) -> Optional[GATKTool]:
+        """
+        Return the tool of the previous version with this name, or None if it wasn't generated.
+        """
+        from .web_to_gatk_tool import make_gatk_tool
+
+        try:
+            with open(os.path.join(self._json_dir, tool_name + ".json"), "rb") as file:
+                raw_tool_json = file.read()
+        except FileNotFoundError:
+            return None
+
+        gatk_tool = make_gatk_tool(raw_tool_json, tool_name, self._extra_arguments, self._read_filter_arguments)
+        if self._corpus is not None:
+            gatk_tool = self._corpus.add_tool(gatk_tool)
+
+        return gatk_tool
+
+    def get_reusable_arguments(self, gatk_tool: GATKTool, gatk_version: GATKVersion) -> Dict[str, Tuple[List[Dict], List[Dict]]]:
+        old_tool = self.get_tool(gatk_tool.name)
+        if old_tool is None:
+            return {}
+
+        old_cwl = load_cwl_file(os.path.join(self._cwl_dir, gatk_tool.name + ".cwl"))
+        if old_cwl is None:
+            _logger.warning(f"No CWL file for {gatk_tool.name} in {self._cwl_dir}, converting all its arguments")
+            return {}
+
+        return get_reusable_arguments(old_tool, old_cwl, gatk_tool, self.gatk_version, gatk_version, self._overrides)
+
+
+def diff_main(args: List[str]) -> None:
+    """
+    Print the changes to the tools and arguments between two versions of GATK.
+    """
+    from .main import DEFAULT_CACHE_LOCATION
+
+    parser = argparse.ArgumentParser(prog="gatk_cwl_generator diff",
+        description="Compares the documentation of two GATK versions at the level of tools and arguments")
+    parser.add_argument("old_version", help="The version of GATK to compare from")
+    parser.add_argument("new_version", help="The version of GATK to compare to")
+    parser.add_argument("--include", dest="include",
+        help="Only compare this tool")
+    parser.add_argument("--use_cache", dest="use_cache", nargs="?", const=DEFAULT_CACHE_LOCATION, metavar="CACHE_LOCATION",
+        help="Use requests_cache, using the cache at CACHE_LOCATION, or 'cache' if not specified. Default is False.")
+    diff_options = parser.parse_args(args)
+
+    if diff_options.use_cache:
+        import requests_cache
+        requests_cache.install_cache(diff_options.use_cache)
+
+    from .corpus import GATKCorpus
+
+    # The two versions share most of their documentation
+    corpus = GATKCorpus()
+    version_diff = diff_gatk_versions(
+        get_gatk_documentation(GATKVersion(diff_options.old_version), diff_options.include, corpus),
+        get_gatk_documentation(GATKVersion(diff_options.new_version), diff_options.include, corpus)
+    )
+
+    sys.stdout.write(format_version_diff(version_diff) + "\n")
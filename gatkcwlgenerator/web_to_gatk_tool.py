@@ -9,7 +9,7 @@ import requests
 from bs4 import BeautifulSoup
 
 from .GATK_classes import *
-from .common import GATKVersion
+from .common import GATKVersion, loads_json
 
 _logger: logging.Logger = logging.getLogger("gatkcwlgenerator")
 _logger.addHandler(logging.StreamHandler())
@@ -89,22 +89,31 @@ def get_gatk_links(gatk_version: GATKVersion) -> GATKLinks:
         command_line_gatk_url=cmd_line_gatk
     )
 
-def fetch_json_from(gatk_tool_url: str) -> Dict:
+def fetch_raw_json_from(gatk_tool_url: str) -> bytes:
+    """
+    Fetch the JSON documentation at the given URL, without decoding it.
+    """
     _logger.info(f"Fetching {gatk_tool_url}")
     gatk_info_request = requests.get(gatk_tool_url)
     gatk_info_request.raise_for_status()
 
+    return gatk_info_request.content
+
+def fetch_json_from(gatk_tool_url: str) -> Dict:
     try:
-        gatk_info_dict = gatk_info_request.json()
+        gatk_info_dict = loads_json(fetch_raw_json_from(gatk_tool_url))
     except ValueError as error:
         raise Exception("Could not decode JSON retrieved from " + gatk_tool_url) from error
 
     return gatk_info_dict
 
-def _get_extra_readfilter_arguments(readfilter_urls: Iterable[str]) -> List[Dict]:
+def get_read_filter_arguments(gatk_links: GATKLinks) -> List[Dict]:
+    """
+    Get the arguments of all the read filters, as optional arguments to add to the tools.
+    """
     arguments: List[Dict] = []
 
-    for readfilter_url in readfilter_urls:
+    for readfilter_url in gatk_links.readfilter_urls:
         readfilter_dict = fetch_json_from(readfilter_url)
 
         if "arguments" in readfilter_dict:
@@ -121,9 +130,14 @@ def _get_extra_readfilter_arguments(readfilter_urls: Iterable[str]) -> List[Dict
 
 def get_extra_arguments(
         gatk_version: GATKVersion,
-        gatk_links: GATKLinks
+        gatk_links: GATKLinks,
+        read_filters: bool = True
     ) -> List[Dict]:
-    read_filter_arguments = _get_extra_readfilter_arguments(gatk_links.readfilter_urls)
+    """
+    Get the arguments to add to every tool: the arguments of CommandLineGATK for GATK 3,
+    and the arguments of the read filters (if read_filters is True).
+    """
+    read_filter_arguments = get_read_filter_arguments(gatk_links) if read_filters else []
 
     if gatk_version.is_3():
         cmd_line_gatk_dict = fetch_json_from(gatk_links.command_line_gatk_url)
@@ -133,25 +147,49 @@ def get_extra_arguments(
 
 def get_gatk_tool(
         tool_url: str,
-        extra_arguments: List[Dict] = None
+        extra_arguments: List[Dict] = None,
+        read_filter_arguments: List[Dict] = None
     ) -> GATKTool:
     """
     Get GATK tools from the specified tool_urls.
+
+    :param read_filter_arguments: Arguments added after extra_arguments, only if the tool
+        takes read filters (see GATKTool.takes_read_filters)
+    """
+    # The tool's JSON is kept as downloaded, so it can be written out verbatim,
+    # and is only decoded when it is needed.
+    raw_tool_json = fetch_raw_json_from(tool_url)
+
+    return make_gatk_tool(raw_tool_json, get_tool_name(tool_url), extra_arguments, read_filter_arguments, tool_url)
+
+def make_gatk_tool(
+        raw_tool_json: bytes,
+        tool_name: str,
+        extra_arguments: List[Dict] = None,
+        read_filter_arguments: List[Dict] = None,
+        url: str = None
+    ) -> GATKTool:
+    """
+    Make a GATK tool from its JSON documentation (e.g. as written to the json/ directory),
+    with the arguments added to the tools as in get_gatk_tool.
     """
     if extra_arguments is None:
         extra_arguments = []
 
-    tool_dict = fetch_json_from(tool_url)
-    tool_name = tool_dict["name"]
-
     if tool_name in ("CommandLineGATK", "CatVariants"):
-        extra_arguments = []
+        return GATKTool.from_raw_json(raw_tool_json, [], url)
 
-    return GATKTool(
-        tool_dict,
-        extra_arguments
+    gatk_tool = GATKTool.from_raw_json(
+        raw_tool_json,
+        extra_arguments,
+        url
     )
 
+    if read_filter_arguments and gatk_tool.takes_read_filters:
+        gatk_tool = GATKTool(gatk_tool.original_dict, extra_arguments + read_filter_arguments, raw_tool_json, url)
+
+    return gatk_tool
+
 def get_tool_name(url: str) -> str:
     """Get the tool name from the specified URL."""
     if url.endswith(".json"):
@@ -19,8 +19,12 @@ setup(
     packages=find_packages(exclude=["tests"]),
     install_requires=open("requirements.txt", "r").readlines(),
     tests_require=open("test_requirements.txt", "r").readlines(),
+    extras_require={
+        # For the validate and benchmark commands, and render --check
+        "cwltool": ["cwltool>=3.1"]
+    },
     url="https://github.com/wtsi-hgi/gatk-cwl-generator",
-    package_data={'': ['*.js', "VERSION"]},
+    package_data={'': ['*.js', '*.json', "VERSION"]},
     include_package_data=True,
     license="MIT",
     description="Generates CWL files from the GATK documentation Edit",